@@ -1,14 +1,21 @@
 import tkinter as tk
-from tkinter import ttk, Toplevel, Label, messagebox
+from tkinter import ttk, Toplevel, Label, messagebox, filedialog
 import numpy as np
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from scipy import signal
-from numpy.linalg import svd, det, matrix_rank, inv
-from typing import Tuple, List, Dict
-from enum import Enum
+from typing import Callable, Tuple, List, Dict, Optional
+from QPSK_MIMO_engine import (SimulationParameters, SimulationResult, SweepPoint, default_channel_matrix,
+                              generate_bits, qpsk_modulate, generate_noise, get_qpsk_mapping, demodulate, calculate_ber,
+                              calculate_capacity, parse_channel_matrix, load_channel_matrix, SNR_RANGE, SNR_POINTS,
+                              RANDOM_SEED, MAX_ANTENNAS, MAX_MODES, MAX_STREAMS)
+from QPSK_MIMO_capacity import analyze_ensemble, ensemble_size, EnsembleCapacity, DEFAULT_NUM_REALIZATIONS
+from QPSK_MIMO_channel import fiber_channel, DEFAULT_BLOCK_SEGMENTS
+from QPSK_MIMO_propagation import launch_waveform, propagate_fiber, PropagationResult, DEFAULT_LAUNCH_POWER_DBM
+from QPSK_MIMO_detector import kbest_tradeoff, tradeoff_size, DetectorPoint, DEFAULT_K, MAX_TRADEOFF_STREAMS
+from QPSK_MIMO_cache import ResultCache, run_simulation_cached
+from QPSK_MIMO_capture import save_capture
+from QPSK_MIMO_profile import Profiler
+from QPSK_MIMO_worker import SimulationWorker
+from QPSK_MIMO_plot import (AxesArtists, Density, eye_traces, prepare_constellation, prepare_eye_diagram,
+                            draw_constellation, draw_eye_diagram)
 
 class ToolTip:
     def __init__(self, widget: tk.Widget, text: str):
@@ -35,14 +42,41 @@ class ToolTip:
             self.tooltip_window.destroy()
 
 class QPSK_MIMO_GUI:
-    SNR_RANGE = (0, 20)
-    SNR_POINTS = 10
+    SNR_RANGE = SNR_RANGE
+    SNR_POINTS = SNR_POINTS
     FIBER_LENGTH_POINTS = 100
-    RANDOM_SEED = 42
+    LAUNCH_POWER_DBM = DEFAULT_LAUNCH_POWER_DBM
+    RANDOM_SEED = RANDOM_SEED
+    ENSEMBLE_REALIZATIONS = DEFAULT_NUM_REALIZATIONS
+    MAX_LITERAL_ELEMENTS = 64  # veće matrice se u polju prikazuju samo sažeto
+    MAX_LEGEND_STREAMS = 8     # iznad ovoga grafovi prelaze na sažeti prikaz
+    MAX_PROFILE_LINES = 24
+    MAX_TIME_SAMPLES = 1000    # vremenski grafovi prikazuju samo početak signala
+    MAX_TX_MARKERS = 1000      # odašiljani simboli (bez šuma) leže u četiri tačke, pa je početak niza dovoljan
+    PLOT_TABS = (('tx_signal', "Odašiljani signal"), ('constellation', "Konstelacija"), ('channel', "Kanalna matrica"),
+                 ('eye_diagram', "Eye Dijagram"), ('noise_impact', "Utjecaj šuma na signal"), ('snr_ber', "SNR vs BER"),
+                 ('snr_capacity', "SNR vs Kapacitet"), ('detailed_fiber', "Detaljni prikaz vlakna"),
+                 ('capacity_cdf', "CDF kapaciteta"), ('equalizer_mse', "Konvergencija ekvalizatora"),
+                 ('stream_ber', "BER po toku"), ('kbest', "K-best kompleksnost"))
+    POLL_INTERVAL_MS = 50      # koliko često glavna petlja preuzima napredak pozadinske simulacije
+    SIMULATION_PROGRESS = 0.6  # udio run_simulation u traci napretka
+    ENSEMBLE_PROGRESS = 0.7    # ansambl kanala; do ANALYSIS_PROGRESS je K-best kompleksnost
+    ANALYSIS_PROGRESS = 0.8    # ansambl i K-best; ostatak je split-step propagacija
+    KBEST_K_VALUES = (1, 2, 4, 8, 16, 32, 64)
+    KBEST_TRADEOFF_VECTORS = 2000
+    FIBER_BLOCK_FLOPS = 2e8    # blok segmenata vlakna između dvije provjere prekida
+    FEC_OPTIONS = {"Bez FEC-a": 'none', "LDPC (2144, 1747)": 'ldpc'}
+    EQUALIZER_OPTIONS = {"Bez ekvalizacije": 'none', "ZF": 'zf', "MMSE": 'mmse', "MMSE-SIC": 'mmse-sic',
+                         "K-best (sferni)": 'kbest', "LMS (adaptivni)": 'lms', "CMA (adaptivni)": 'cma'}
 
     def __init__(self, master: tk.Tk):
         self.master = master
         master.title("QPSK MIMO Simulacija")
+        # Rezultati se čuvaju na disku, pa ponovljena simulacija (i nakon ponovnog pokretanja) ne računa ništa
+        try:
+            self.result_cache = ResultCache()
+        except OSError:
+            self.result_cache = None
         # master.attributes('-fullscreen', True)  # Start in full-screen
 
         # Simulation results frame (top right)
@@ -55,6 +89,11 @@ class QPSK_MIMO_GUI:
         self.ber_label = ttk.Label(self.results_frame, textvariable=self.ber_label_text)
         self.ber_label.pack(padx=5, pady=2)
 
+        self.post_fec_ber_label_text = tk.StringVar()
+        self.post_fec_ber_label_text.set("BER nakon FEC-a: N/A")
+        self.post_fec_ber_label = ttk.Label(self.results_frame, textvariable=self.post_fec_ber_label_text)
+        self.post_fec_ber_label.pack(padx=5, pady=2)
+
         self.snr_result_label_text = tk.StringVar()
         self.snr_result_label_text.set("SNR (dB): N/A")
         self.snr_result_label = ttk.Label(self.results_frame, textvariable=self.snr_result_label_text)
@@ -65,6 +104,23 @@ class QPSK_MIMO_GUI:
         self.capacity_label = ttk.Label(self.results_frame, textvariable=self.capacity_label_text)
         self.capacity_label.pack(padx=5, pady=2)
 
+        # Profil posljednje simulacije (vrijeme i memorija po fazi)
+        self.profile_frame = ttk.LabelFrame(self.results_frame, text="Profil")
+        self.profile_frame.pack(padx=5, pady=5, fill=tk.X)
+        ToolTip(self.profile_frame, "Vrijeme (zidno i CPU) po fazi simulacije i crtanja; uz praćenje memorije i vršna alocirana memorija.")
+        self.profile_label_text = tk.StringVar()
+        self.profile_label_text.set("Profil: N/A")
+        self.profile_label = ttk.Label(self.profile_frame, textvariable=self.profile_label_text, justify=tk.LEFT)
+        self.profile_label.pack(padx=5, pady=2, anchor=tk.W)
+        self.trace_memory_var = tk.BooleanVar(value=False)
+        self.trace_memory_check = ttk.Checkbutton(self.profile_frame, text="Prati memoriju (tracemalloc)",
+                                                  variable=self.trace_memory_var)
+        self.trace_memory_check.pack(padx=5, pady=2, anchor=tk.W)
+        self.profile_export_button = ttk.Button(self.profile_frame, text="Izvezi profil...", command=self.export_profile)
+        self.profile_export_button.pack(padx=5, pady=2, anchor=tk.W)
+        ToolTip(self.profile_export_button, "Sprema profil kao JSON ili kao Chrome trace (*.trace.json, za chrome://tracing ili Perfetto).")
+        self.last_profile = None
+
         # Input parameters frame
         self.input_frame = ttk.LabelFrame(master, text="Parametri simulacije")
         self.input_frame.pack(padx=10, pady=10, fill=tk.X, anchor=tk.NW, side=tk.TOP)
@@ -86,7 +142,7 @@ class QPSK_MIMO_GUI:
         ToolTip(self.snr_label, "Omjer signala i šuma u decibelima.")
 
         # Broj predajnih antena
-        self.num_tx_ant_label = ttk.Label(self.input_frame, text="Broj predajnih antena (1-4):")
+        self.num_tx_ant_label = ttk.Label(self.input_frame, text=f"Broj predajnih antena (1-{MAX_ANTENNAS}):")
         self.num_tx_ant_label.grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
         self.num_tx_ant_entry = ttk.Entry(self.input_frame)
         self.num_tx_ant_entry.insert(0, "2")
@@ -95,7 +151,7 @@ class QPSK_MIMO_GUI:
         self.num_tx_ant_entry.bind("<FocusOut>", self.update_channel_matrix_size)
 
         # Broj prijemnih antena
-        self.num_rx_ant_label = ttk.Label(self.input_frame, text="Broj prijemnih antena (1-4):")
+        self.num_rx_ant_label = ttk.Label(self.input_frame, text=f"Broj prijemnih antena (1-{MAX_ANTENNAS}):")
         self.num_rx_ant_label.grid(row=3, column=0, padx=5, pady=5, sticky=tk.W)
         self.num_rx_ant_entry = ttk.Entry(self.input_frame)
         self.num_rx_ant_entry.insert(0, "2")
@@ -104,7 +160,7 @@ class QPSK_MIMO_GUI:
         self.num_rx_ant_entry.bind("<FocusOut>", self.update_channel_matrix_size)
 
         # Broj modova
-        self.num_modes_label = ttk.Label(self.input_frame, text="Broj modova (1-4):")
+        self.num_modes_label = ttk.Label(self.input_frame, text=f"Broj modova (1-{MAX_MODES}):")
         self.num_modes_label.grid(row=4, column=0, padx=5, pady=5, sticky=tk.W)
         self.num_modes_entry = ttk.Entry(self.input_frame)
         self.num_modes_entry.insert(0, "2")
@@ -120,6 +176,13 @@ class QPSK_MIMO_GUI:
         self.channel_entry.grid(row=5, column=1, padx=5, pady=5)
         #self.channel_entry.config(state='readonly')
         ToolTip(self.channel_label, "Matrica koja opisuje propagaciju signala između predajnih i prijemnih antena/modova.")
+        self.fiber_channel_button = ttk.Button(self.input_frame, text="Generiši (vlakno)", command=self.generate_fiber_channel)
+        self.fiber_channel_button.grid(row=5, column=2, padx=5, pady=5)
+        ToolTip(self.fiber_channel_button, "Generiše H iz modela slučajnog sprezanja modova duž vlakna (dužina i slabljenje iz polja ispod).")
+        self.load_channel_button = ttk.Button(self.input_frame, text="Učitaj H...", command=self.load_channel_file)
+        self.load_channel_button.grid(row=5, column=3, padx=5, pady=5)
+        ToolTip(self.load_channel_button, "Učitava kanalnu matricu iz .npy, .npz (ključ 'H') ili .csv datoteke, npr. za massive MIMO.")
+        self.channel_matrix = None
 
         # Duljina vlakna (km)
         self.fiber_length_label = ttk.Label(self.input_frame, text="Dužina vlakna (km) (1-1000):")
@@ -137,6 +200,30 @@ class QPSK_MIMO_GUI:
         self.attenuation_entry.grid(row=7, column=1, padx=5, pady=5)
         ToolTip(self.attenuation_label, "Koeficijent slabljenja signala po kilometru vlakna.")
 
+        # Ekvalizator
+        self.equalizer_label = ttk.Label(self.input_frame, text="Ekvalizator:")
+        self.equalizer_label.grid(row=8, column=0, padx=5, pady=5, sticky=tk.W)
+        self.equalizer_combobox = ttk.Combobox(self.input_frame, values=list(self.EQUALIZER_OPTIONS), state='readonly')
+        self.equalizer_combobox.set("MMSE")
+        self.equalizer_combobox.grid(row=8, column=1, padx=5, pady=5)
+        ToolTip(self.equalizer_label, "Ekvalizator primijenjen na prijemu prije demodulacije (ZF, MMSE, MMSE-SIC, K-best sferni detektor ili adaptivni LMS/CMA u frekvencijskom domenu).")
+
+        # Parametar K za K-best detektor
+        self.kbest_k_label = ttk.Label(self.input_frame, text="K (K-best detektor):")
+        self.kbest_k_label.grid(row=9, column=0, padx=5, pady=5, sticky=tk.W)
+        self.kbest_k_entry = ttk.Entry(self.input_frame)
+        self.kbest_k_entry.insert(0, str(DEFAULT_K))
+        self.kbest_k_entry.grid(row=9, column=1, padx=5, pady=5)
+        ToolTip(self.kbest_k_label, "Broj kandidata koji se zadržavaju po sloju stabla; veći K je bliži ML detekciji, ali sporiji.")
+
+        # Kanalno kodiranje
+        self.fec_label = ttk.Label(self.input_frame, text="Kanalno kodiranje (FEC):")
+        self.fec_label.grid(row=10, column=0, padx=5, pady=5, sticky=tk.W)
+        self.fec_combobox = ttk.Combobox(self.input_frame, values=list(self.FEC_OPTIONS), state='readonly')
+        self.fec_combobox.set("Bez FEC-a")
+        self.fec_combobox.grid(row=10, column=1, padx=5, pady=5)
+        ToolTip(self.fec_label, "LDPC kod dekodiran slojevitim min-sum algoritmom iz mekih LLR vrijednosti; prikazuje se BER prije i nakon FEC-a.")
+
         self.explain_button = ttk.Button(master, text="Objasni koncept", command=self.explain_concept)
         self.explain_button.pack(pady=5, side=tk.RIGHT, padx=10, anchor=tk.NE)
 
@@ -149,83 +236,43 @@ class QPSK_MIMO_GUI:
         self.reset_button = ttk.Button(master, text="Resetuj", command=self.reset_simulation)
         self.reset_button.pack(pady=5, side=tk.LEFT, padx=10, anchor=tk.NW)
 
+        self.export_button = ttk.Button(master, text="Izvezi snimak...", command=self.export_capture)
+        self.export_button.pack(pady=5, side=tk.LEFT, padx=10, anchor=tk.NW)
+        ToolTip(self.export_button, "Sprema poslane bite, odašiljane signale, šum i primljene simbole posljednje simulacije (.npy + metadata.json) za kasniju reprodukciju.")
+        self.last_simulation = None
+
+        # Simulacija radi u pozadinskoj niti; napredak se preuzima iz glavne petlje (after)
+        self.cancel_button = ttk.Button(master, text="Prekini", command=self.cancel_simulation, state='disabled')
+        self.cancel_button.pack(pady=5, side=tk.LEFT, padx=10, anchor=tk.NW)
+        ToolTip(self.cancel_button, "Zaustavlja simulaciju u toku nakon tekuće SNR tačke ili koraka propagacije, odnosno generisanje kanala vlakna nakon tekućeg bloka segmenata.")
+        self.progress_var = tk.DoubleVar(value=0)
+        self.progress_bar = ttk.Progressbar(master, variable=self.progress_var, maximum=100, length=200)
+        self.progress_bar.pack(pady=5, side=tk.LEFT, padx=10, anchor=tk.NW)
+        self.status_label_text = tk.StringVar()
+        self.status_label = ttk.Label(master, textvariable=self.status_label_text)
+        self.status_label.pack(pady=5, side=tk.LEFT, padx=10, anchor=tk.NW)
+        self.worker = None
+        self.worker_done = None
+        self.run_profiler = None
+        self.sweep_points = []
+
         # Notebook for tabs
         self.notebook = ttk.Notebook(master)
         self.notebook.pack(expand=True, fill=tk.BOTH, padx=10, pady=10, side=tk.TOP)
 
-        # Tab 1: Transmitted Signal
-        self.tx_signal_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.tx_signal_tab, text="Odašiljani signal")
-        self.tx_signal_figure, self.tx_signal_ax = plt.subplots()
-        self.tx_signal_canvas = FigureCanvasTkAgg(self.tx_signal_figure, master=self.tx_signal_tab)
-        self.tx_signal_canvas_widget = self.tx_signal_canvas.get_tk_widget()
-        self.tx_signal_canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-        self.tx_signal_figure.tight_layout(pad=3.0)
-
-        # Tab 2: Constellation Diagram
-        self.constellation_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.constellation_tab, text="Konstelacija")
-        self.constellation_figure, self.constellation_ax = plt.subplots()
-        self.constellation_canvas = FigureCanvasTkAgg(self.constellation_figure, master=self.constellation_tab)
-        self.constellation_canvas_widget = self.constellation_canvas.get_tk_widget()
-        self.constellation_canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-        self.constellation_figure.tight_layout(pad=3.0)
-
-        # Tab 3: Channel Matrix
-        self.channel_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.channel_tab, text="Kanalna matrica")
-        self.channel_figure, self.channel_ax = plt.subplots()
-        self.channel_canvas = FigureCanvasTkAgg(self.channel_figure, master=self.channel_tab)
-        self.channel_canvas_widget = self.channel_canvas.get_tk_widget()
-        self.channel_canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-        self.channel_figure.tight_layout(pad=3.0)
-
-        # Tab 4: Eye Diagram
-        self.eye_diagram_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.eye_diagram_tab, text="Eye Dijagram")
-        self.eye_diagram_figure, self.eye_diagram_ax = plt.subplots()
-        self.eye_diagram_canvas = FigureCanvasTkAgg(self.eye_diagram_figure, master=self.eye_diagram_tab)
-        self.eye_diagram_canvas_widget = self.eye_diagram_canvas.get_tk_widget()
-        self.eye_diagram_canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-        self.eye_diagram_figure.tight_layout(pad=3.0)
-
-        # Tab 5: Utjecaj šuma
-        self.noise_impact_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.noise_impact_tab, text="Utjecaj šuma na signal")
-        self.noise_impact_figure, self.noise_impact_ax = plt.subplots()
-        self.noise_impact_canvas = FigureCanvasTkAgg(self.noise_impact_figure, master=self.noise_impact_tab)
-        self.noise_impact_canvas_widget = self.noise_impact_canvas.get_tk_widget()
-        self.noise_impact_canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-        self.noise_impact_figure.tight_layout(pad=3.0)
-
-        # Tab 6: SNR vs BER
-        self.snr_ber_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.snr_ber_tab, text="SNR vs BER")
-        self.snr_ber_figure, self.snr_ber_ax = plt.subplots()
-        self.snr_ber_canvas = FigureCanvasTkAgg(self.snr_ber_figure, master=self.snr_ber_tab)
-        self.snr_ber_canvas_widget = self.snr_ber_canvas.get_tk_widget()
-        self.snr_ber_canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-        self.snr_ber_figure.tight_layout(pad=3.0)
-
-        # Tab 7: SNR vs Kapacitet
-        self.snr_capacity_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.snr_capacity_tab, text="SNR vs Kapacitet")
-        self.snr_capacity_figure, self.snr_capacity_ax = plt.subplots()
-        self.snr_capacity_canvas = FigureCanvasTkAgg(self.snr_capacity_figure, master=self.snr_capacity_tab)
-        self.snr_capacity_canvas_widget = self.snr_capacity_canvas.get_tk_widget()
-        self.snr_capacity_canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-        self.snr_capacity_figure.tight_layout(pad=3.0)
-
-        # Tab 8: Detaljno vlakno
-        self.detailed_fiber_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.detailed_fiber_tab, text="Detaljni prikaz vlakna")
-        self.detailed_fiber_figure, self.detailed_fiber_ax = plt.subplots()
-        self.detailed_fiber_canvas = FigureCanvasTkAgg(self.detailed_fiber_figure, master=self.detailed_fiber_tab)
-        self.detailed_fiber_canvas_widget = self.detailed_fiber_canvas.get_tk_widget()
-        self.detailed_fiber_canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-        self.detailed_fiber_figure.tight_layout(pad=3.0)
-
-        self.channel_matrix_displayed = False
+        # Grafovi se kreiraju tek kad se njihov tab prvi put prikaže (matplotlib se tada i učitava)
+        self.figures = {}
+        self.pending_plots = {}
+        for name, title in self.PLOT_TABS:
+            tab = ttk.Frame(self.notebook)
+            self.notebook.add(tab, text=title)
+            setattr(self, name + '_tab', tab)
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
+        self.master.after_idle(self._on_tab_changed)  # graf prvog taba tek nakon prvog iscrtavanja prozora
+
+        self.displayed_channel_matrix = None  # H trenutno nacrtana na tabu kanala
+        self.channel_colorbar = None
+        self.plot_artists = {}
         self.fiber_propagation_ax = None
         self.fiber_propagation_canvas = None
         self.update_channel_matrix_size()
@@ -249,11 +296,15 @@ class QPSK_MIMO_GUI:
         - **Kanalna matrica (H):** Matrica koja opisuje propagaciju signala između predajnih i prijemnih antena/modova.
         - **Dužina vlakna (km):** Dužina optičkog vlakna u kilometrima.
         - **Koef. slabljenja (dB/km):** Koeficijent slabljenja signala po kilometru vlakna.
+        - **Ekvalizator:** ZF, MMSE ili MMSE-SIC ekvalizacija, K-best sferni detektor ili adaptivni LMS/CMA ekvalizator u frekvencijskom domenu, primijenjen na primljeni signal prije demodulacije.
+        - **K (K-best detektor):** Broj kandidata koji se zadržavaju po sloju stabla; veći K je bliži ML detekciji, ali sporiji.
+        - **Kanalno kodiranje (FEC):** Bez FEC-a ili LDPC kod dekodiran iz mekih LLR vrijednosti; prikazuje se BER prije i nakon FEC-a.
 
         **Rezultati simulacije:**
         - **BER:** Bit Error Rate - omjer broja pogrešno primljenih bitova i ukupnog broja poslanih bitova.
         - **SNR (dB):** Omjer signala i šuma na prijemu.
         - **Kapacitet (bps/Hz):** Maksimalna brzina prijenosa podataka po jedinici frekvencije.
+        - **Profil:** Zidno i CPU vrijeme svake faze simulacije i crtanja (uz praćenje memorije i vršna memorija); izvoz kao JSON ili Chrome trace.
 
         **Grafovi:**
         - **Odašiljani signal:** Prikazuje konstelaciju odašiljanih QPSK simbola.
@@ -261,15 +312,22 @@ class QPSK_MIMO_GUI:
         - **Kanalna matrica:** Prikazuje matricu kanala H.
         - **Eye Dijagram:** Prikazuje eye dijagram primljenog signala.
         - **Utjecaj šuma na signal:** Prikazuje utjecaj šuma na odašiljani i primljeni signal.
-        - **SNR vs BER:** Prikazuje ovisnost BER o SNR.
+        - **SNR vs BER:** Prikazuje ovisnost BER o SNR (uz LDPC kod prije i nakon dekodiranja).
         - **SNR vs Kapacitet:** Prikazuje ovisnost kapaciteta o SNR.
-        - **Detaljni prikaz vlakna:** Prikazuje slabljenje signala duž vlakna.
+        - **Detaljni prikaz vlakna:** Prikazuje snagu signala duž vlakna dobijenu split-step Fourier propagacijom (slabljenje, disperzija, DMD, Kerr nelinearnost), uz broj koraka i vrijeme proračuna.
+        - **CDF kapaciteta:** Prikazuje raspodjelu kapaciteta preko slučajnih realizacija kanala (ergodički i outage kapacitet).
+        - **Konvergencija ekvalizatora:** Prikazuje MSE po bloku adaptivnog LMS/CMA ekvalizatora.
+        - **BER po toku:** Prikazuje BER svakog prostornog toka (za veliki broj tokova kao histogram).
+        - **K-best kompleksnost:** Prikazuje BER K-best detektora u zavisnosti od broja posjećenih čvorova stabla, uz ML referencu. Broj vektora se smanjuje za veće kanale, a iznad 64 toka se kompleksnost ne mjeri.
 
         **Kako koristiti:**
         1. Unesite željene parametre simulacije.
-        2. Kliknite "Simuliraj" za pokretanje simulacije.
+        2. Kliknite "Simuliraj" za pokretanje simulacije. Simulacija radi u pozadini: traka prikazuje napredak,
+           SNR tačke se crtaju čim su gotove, a "Prekini" zaustavlja simulaciju.
         3. Pregledajte rezultate i grafove u odgovarajućim tabovima.
         4. Koristite "Resetuj" za brisanje svih grafova i rezultata.
+        5. "Izvezi snimak..." sprema signale posljednje simulacije (.npy + metadata.json); QPSK_MIMO_capture ih
+           reprodukuje kroz demodulaciju i BER analizu bez učitavanja cijelog snimka u memoriju.
         """
         help_window = tk.Toplevel(self.master)
         help_window.title("Pomoć")
@@ -302,67 +360,49 @@ class QPSK_MIMO_GUI:
         explanation_label.pack(padx=10, pady=10)
 
     def reset_simulation(self):
+        self.cancel_simulation()
         # Clear all plots
-        self.tx_signal_ax.clear()
-        self.tx_signal_canvas.draw()
-        self.constellation_ax.clear()
-        self.constellation_canvas.draw()
-        self.channel_ax.clear()
-        self.channel_canvas.draw()
-        self.snr_ber_ax.clear()
-        self.snr_ber_canvas.draw()
-        self.snr_capacity_ax.clear()
-        self.snr_capacity_canvas.draw()
-        self.noise_impact_ax.clear()
-        self.noise_impact_canvas.draw()
-        self.detailed_fiber_ax.clear()
-        self.detailed_fiber_canvas.draw()
-        self.eye_diagram_ax.clear()
-        self.eye_diagram_canvas.draw()
+        self.pending_plots.clear()
+        self._remove_channel_colorbar()  # prije brisanja osa, inače se ne može ukloniti
+        for name in self.figures:
+            getattr(self, name + '_ax').clear()
+            getattr(self, name + '_canvas').draw()
         if self.fiber_propagation_ax:
             self.fiber_propagation_ax.clear()
             self.fiber_propagation_canvas.draw()
 
         # Reset result labels
         self.ber_label_text.set("BER: N/A")
+        self.post_fec_ber_label_text.set("BER nakon FEC-a: N/A")
         self.snr_result_label_text.set("SNR (dB): N/A")
         self.capacity_label_text.set("Kapacitet (bps/Hz): N/A")
-        self.channel_matrix_displayed = False
+        self.displayed_channel_matrix = None
 
     def update_channel_matrix_size(self, event=None):
         try:
             self.channel_entry.config(state='normal')
             num_modes = int(self.num_modes_entry.get())
-            if not 1 <= num_modes <= 4:
-                messagebox.showerror("Greška", "Broj modova mora biti između 1 i 4.")
+            if not 1 <= num_modes <= MAX_MODES:
+                messagebox.showerror("Greška", f"Broj modova mora biti između 1 i {MAX_MODES}.")
                 self.num_modes_entry.delete(0, tk.END)
                 self.num_modes_entry.insert(0, "1")
                 return
             num_tx_antennas = int(self.num_tx_ant_entry.get())
-            if not 1 <= num_tx_antennas <= 4:
-                messagebox.showerror("Greška", "Broj predajnih antena mora biti između 1 i 4.")
+            if not 1 <= num_tx_antennas <= MAX_ANTENNAS:
+                messagebox.showerror("Greška", f"Broj predajnih antena mora biti između 1 i {MAX_ANTENNAS}.")
                 self.num_tx_ant_entry.delete(0, tk.END)
                 self.num_tx_ant_entry.insert(0, "1")
                 return
             num_rx_antennas = int(self.num_rx_ant_entry.get())
-            if not 1 <= num_rx_antennas <= 4:
-                messagebox.showerror("Greška", "Broj prijemnih antena mora biti između 1 i 4.")
+            if not 1 <= num_rx_antennas <= MAX_ANTENNAS:
+                messagebox.showerror("Greška", f"Broj prijemnih antena mora biti između 1 i {MAX_ANTENNAS}.")
                 self.num_rx_ant_entry.delete(0, tk.END)
                 self.num_rx_ant_entry.insert(0, "1")
                 return
-            new_matrix_size = (num_rx_antennas * num_modes, num_tx_antennas * num_modes)
-            default_matrix = np.eye(min(new_matrix_size))
-
-            if new_matrix_size[0] > new_matrix_size[1]:
-                padding = np.zeros((new_matrix_size[0] - new_matrix_size[1], new_matrix_size[1]))
-                default_matrix = np.vstack((default_matrix, padding))
-            elif new_matrix_size[1] > new_matrix_size[0]:
-                padding = np.zeros((new_matrix_size[0], new_matrix_size[1] - new_matrix_size[0]))
-                default_matrix = np.hstack((default_matrix, padding))
-
-            self.channel_entry.delete(0, tk.END)
-            self.channel_entry.insert(0, str(default_matrix.tolist()))
-            self.channel_entry.config(state='readonly')
+            if max(num_tx_antennas, num_rx_antennas) * num_modes > MAX_STREAMS:
+                messagebox.showerror("Greška", f"Broj prostornih kanala (antene x modovi) mora biti najviše {MAX_STREAMS}.")
+                return
+            self._set_channel_matrix(default_channel_matrix(num_tx_antennas, num_rx_antennas, num_modes))
         except ValueError:
             messagebox.showerror("Greška", "Neispravan unos za broj modova.")
             self.num_modes_entry.delete(0, tk.END)
@@ -370,374 +410,662 @@ class QPSK_MIMO_GUI:
 
             self.channel_entry.config(state='readonly')
 
+    def generate_fiber_channel(self):
+        """Generate H on the worker thread (long fibers with many modes take seconds)."""
+        if self.worker is not None:
+            return
+        try:
+            num_modes = int(self.num_modes_entry.get())
+            num_tx_antennas = int(self.num_tx_ant_entry.get())
+            num_rx_antennas = int(self.num_rx_ant_entry.get())
+            fiber_length = float(self.fiber_length_entry.get())
+            attenuation = float(self.attenuation_entry.get())
+        except ValueError:
+            messagebox.showerror("Greška", "Neispravan unos parametara vlakna.")
+            return
+        if not (1 <= num_modes <= MAX_MODES and 1 <= num_tx_antennas <= MAX_ANTENNAS and 1 <= num_rx_antennas <= MAX_ANTENNAS
+                and max(num_tx_antennas, num_rx_antennas) * num_modes <= MAX_STREAMS):
+            messagebox.showerror("Greška", f"Broj modova mora biti 1-{MAX_MODES}, antena 1-{MAX_ANTENNAS}, a prostornih kanala najviše {MAX_STREAMS}.")
+            return
+        if not (1 <= fiber_length <= 1000 and 0.1 <= attenuation <= 1):
+            messagebox.showerror("Greška", "Dužina vlakna mora biti 1-1000 km, a slabljenje 0.1-1 dB/km.")
+            return
+        num_rx, num_tx = num_rx_antennas * num_modes, num_tx_antennas * num_modes
+        # Blok se smanjuje s veličinom matrice, pa prekid i kod 256 tokova djeluje brzo
+        block_segments = int(max(1, min(DEFAULT_BLOCK_SEGMENTS, self.FIBER_BLOCK_FLOPS // max(num_rx, num_tx)**3)))
+        self.run_profiler = None
+        self._start_worker(lambda worker: fiber_channel(num_rx, num_tx, fiber_length, attenuation,
+                                                        block_segments=block_segments,
+                                                        rng=np.random.RandomState(self.RANDOM_SEED),
+                                                        progress=lambda fraction: worker.report(fraction, 'kanal vlakna')),
+                           self._set_channel_matrix)
+
+    def load_channel_file(self):
+        path = filedialog.askopenfilename(title="Učitaj kanalnu matricu",
+                                          filetypes=[("NumPy", "*.npy *.npz"), ("CSV", "*.csv *.txt"), ("Sve datoteke", "*.*")])
+        if not path:
+            return
+        try:
+            self._set_channel_matrix(load_channel_matrix(path))
+        except ValueError as e:
+            messagebox.showerror("Greška", str(e))
+
+    def export_capture(self):
+        if self.last_simulation is None:
+            messagebox.showerror("Greška", "Nema rezultata za izvoz; prvo pokrenite simulaciju.")
+            return
+        directory = filedialog.askdirectory(title="Direktorij za snimak signala")
+        if not directory:
+            return
+        params, result = self.last_simulation
+        try:
+            save_capture(directory, result, params)
+        except OSError as e:
+            messagebox.showerror("Greška", f"Snimak nije spremljen: {e}")
+
+    def _channel_summary(self, H: np.ndarray) -> str:
+        return f"<matrica {H.shape[0]}x{H.shape[1]}>"
+
+    def _set_channel_matrix(self, H: np.ndarray):
+        """Store H and show it in the entry (as a literal, or as a summary when it is large)."""
+        self.channel_matrix = H
+        self.channel_entry.config(state='normal')
+        self.channel_entry.delete(0, tk.END)
+        self.channel_entry.insert(0, str(H.tolist()) if H.size <= self.MAX_LITERAL_ELEMENTS else self._channel_summary(H))
+        self.channel_entry.config(state='readonly')
+
+    def _get_channel_matrix(self) -> np.ndarray:
+        """Matrix shown in the channel entry; large matrices come from the stored array."""
+        H_str = self.channel_entry.get()
+        if self.channel_matrix is not None and H_str == self._channel_summary(self.channel_matrix):
+            return self.channel_matrix
+        return parse_channel_matrix(H_str)
+
     def simulate(self):
+        """Start a run on the worker thread; results are shown by _poll_worker when it finishes."""
+        if self.worker is not None:
+            return
+        params = self._read_parameters()
+        if params is None:
+            return
+        profiler = Profiler(trace_memory=self.trace_memory_var.get())
+        profiler.start()
+        self.run_profiler = profiler
+        self.sweep_points = []
+        self._start_worker(lambda worker: self._compute(params, worker, profiler),
+                           lambda result: self._show_results(*result))
+
+    def _start_worker(self, job, on_done):
+        """Run job on the worker thread; _poll_worker passes its result to on_done on the main thread."""
+        self.worker = SimulationWorker(job)
+        self.worker_done = on_done
+        self._set_running(True)
+        self.worker.start()
+        self.master.after(self.POLL_INTERVAL_MS, self._poll_worker)
+
+    def cancel_simulation(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.status_label_text.set("Prekidanje...")
+
+    def _set_running(self, running: bool):
+        self.simulate_button.config(state='disabled' if running else 'normal')
+        self.fiber_channel_button.config(state='disabled' if running else 'normal')
+        self.cancel_button.config(state='normal' if running else 'disabled')
+        if running:
+            self.progress_var.set(0)
+            self.status_label_text.set("Pokretanje...")
+
+    def _poll_worker(self):
+        """Drain the worker queue on the Tk main loop; reschedules itself until the run ends."""
+        worker = self.worker
+        new_points = False
+        for message in worker.poll():
+            if message.kind == 'progress':
+                self.progress_var.set(100 * message.fraction)
+                self.status_label_text.set(f"{message.stage} ({message.fraction:.0%})")
+                if message.point is not None and not worker.cancelled:
+                    self.sweep_points.append(message.point)
+                    new_points = True
+                continue
+            self.worker = None
+            self._set_running(False)
+            if self.run_profiler is not None:
+                self.run_profiler.stop()
+            if message.kind == 'done' and not worker.cancelled:
+                self.progress_var.set(100)
+                self.status_label_text.set("Gotovo")
+                self.worker_done(message.result)
+            elif message.kind == 'error':
+                self.status_label_text.set("Greška")
+                messagebox.showerror("Greška", f"Došlo je do neočekivane greške: {message.error}")
+            else:
+                self.status_label_text.set("Prekinuto")
+            return
+        if new_points:
+            self._plot_sweep_points(self.sweep_points)
+        self.master.after(self.POLL_INTERVAL_MS, self._poll_worker)
+
+    def _plot_sweep_points(self, points: List[SweepPoint]):
+        """Plot the SNR points finished so far (streamed while the sweep runs)."""
+        snr = [point.snr_db for point in points]
+        post_fec = [point.post_fec_ber for point in points] if not np.isnan(points[0].post_fec_ber) else ()
+        self._draw_on_tab('snr_ber', self._plot_snr_ber, snr, [point.ber for point in points], post_fec)
+        self._draw_on_tab('snr_capacity', self._plot_snr_capacity, snr, [point.capacity for point in points],
+                          [point.water_filling_capacity for point in points])
+
+    def _show_profile(self, profiler: Profiler):
+        lines = profiler.summary_lines()
+        if len(lines) > self.MAX_PROFILE_LINES:
+            lines = lines[:self.MAX_PROFILE_LINES] + [f"... još {len(lines) - self.MAX_PROFILE_LINES} (u izvozu)"]
+        self.profile_label_text.set("\n".join(lines) if lines else "Profil: N/A")
+
+    def export_profile(self):
+        if self.last_profile is None:
+            messagebox.showerror("Greška", "Nema profila za izvoz; prvo pokrenite simulaciju.")
+            return
+        path = filedialog.asksaveasfilename(title="Izvezi profil", defaultextension=".json",
+                                            filetypes=[("Chrome trace", "*.trace.json"), ("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            if path.endswith('.trace.json'):
+                self.last_profile.save_chrome_trace(path)
+            else:
+                self.last_profile.save_json(path)
+        except OSError as e:
+            messagebox.showerror("Greška", f"Profil nije spremljen: {e}")
+
+    def _read_parameters(self) -> Optional[SimulationParameters]:
+        """Validated parameters from the input fields, or None after showing the error."""
         try:
-            np.random.seed(42) # Seed for reproducibility
             # Dohvati parametre simulacije iz GUI
             try:
                 num_bits = int(self.num_bits_entry.get())
             except ValueError:
                 messagebox.showerror("Greška", "Broj bita mora biti cijeli broj.")
-                return
-            if not 100 <= num_bits <= 1000:
-                messagebox.showerror("Greška", "Broj bita mora biti između 100 i 1000.")
-                return
+                return None
 
             try:
                 snr_db = float(self.snr_entry.get())
             except ValueError:
                 messagebox.showerror("Greška", "SNR mora biti broj.")
-                return
-            if not 0 <= snr_db <= 30:
-                messagebox.showerror("Greška", "SNR mora biti između 0 i 30 dB.")
-                return
+                return None
 
             try:
                 fiber_length = float(self.fiber_length_entry.get())
             except ValueError:
                 messagebox.showerror("Greška", "Dužina vlakna mora biti broj.")
-                return
-            if not 1 <= fiber_length <= 1000:
-                messagebox.showerror("Greška", "Dužina vlakna mora biti između 1 i 1000 km.")
-                return
+                return None
 
             try:
                 attenuation = float(self.attenuation_entry.get())
             except ValueError:
                  messagebox.showerror("Greška", "Koeficijent slabljenja mora biti broj.")
-                 return
-            if not 0.1 <= attenuation <= 1:
-                messagebox.showerror("Greška", "Koeficijent slabljenja mora biti između 0.1 i 1 dB/km.")
-                return
+                 return None
 
             try:
                 num_modes = int(self.num_modes_entry.get())
             except ValueError:
                 messagebox.showerror("Greška", "Broj modova mora biti cijeli broj.")
-                return
-            if not 1 <= num_modes <= 4:
-                messagebox.showerror("Greška", "Broj modova mora biti između 1 i 4.")
-                return
+                return None
 
             try:
-                H_str = self.channel_entry.get()
-                H = np.array(eval(H_str))
+                H = self._get_channel_matrix()
                 num_tx_antennas = int(self.num_tx_ant_entry.get())
-                if not 1 <= num_tx_antennas <= 4:
-                    messagebox.showerror("Greška", "Broj predajnih antena mora biti između 1 i 4.")
-                    return
                 num_rx_antennas = int(self.num_rx_ant_entry.get())
-                if not 1 <= num_rx_antennas <= 4:
-                    messagebox.showerror("Greška", "Broj prijemnih antena mora biti između 1 i 4.")
-                    return
-                if H.shape[0] != num_rx_antennas * num_modes or H.shape[1] != num_tx_antennas * num_modes:
-                    messagebox.showerror("Greška", "Dimenzije kanalne matrice ne odgovaraju broju antena i modova.")
-                    return
-            except:
+            except ValueError:
                 messagebox.showerror("Greška", "Neispravan format kanalne matrice.")
-                return
-
-            np.random.seed(self.RANDOM_SEED)
-            bits = np.random.randint(0, 2, num_bits)
-
-            # QPSK Modulacija
-            qpsk_symbols, tx_bits = self._qpsk_modulate(bits)
-
-            # MIMO dio
-            tx_signals = np.tile(qpsk_symbols, (num_tx_antennas * num_modes, 1))
-
-            # Prijem signala
-            rx_signals = np.dot(H, tx_signals)
-
-            # Dodavanje šuma (AWGN)
-            noise = self._generate_noise(rx_signals, snr_db)
-            received_symbols = rx_signals + noise
-
-            # Demodulacija
-            demodulated_bits = self._demodulate(received_symbols, self._get_qpsk_mapping())
-
-            # Proračun BER
-            ber_point = self._calculate_ber(tx_bits, demodulated_bits)
-            if not np.isnan(ber_point):
-                self.ber_label_text.set(f"BER: {ber_point:.4f}")
-            else:
-                self.ber_label_text.set("BER: N/A")
-
-            self.snr_result_label_text.set(f"SNR (dB): {snr_db:.2f}")
+                return None
 
-            # Proračun kapaciteta (pojednostavljeno za AWGN kanal)
-            capacity_point = self._calculate_capacity(H, snr_db, num_tx_antennas, num_rx_antennas, num_modes)
-            if not np.isnan(capacity_point):
-                self.capacity_label_text.set(f"Kapacitet (bps/Hz): {capacity_point:.2f}")
-            else:
-                self.capacity_label_text.set("Kapacitet (bps/Hz): N/A")
-
-            # Prikaz odasiljanog signala (prva antena)
-            self._plot_tx_signal(qpsk_symbols)
-
-            # Prikaz konstelacije
-            self._plot_constellation(received_symbols, self._get_qpsk_mapping(), num_rx_antennas, num_modes)
-
-            # Prikaz kanalne matrice
-            self._plot_channel_matrix(H, num_tx_antennas, num_rx_antennas, num_modes)
-
-            # SNR vs BER plot
-            snr_db_range = np.linspace(self.SNR_RANGE[0], self.SNR_RANGE[1], self.SNR_POINTS)
-            ber_values = []
-            for snr_db_val in snr_db_range:
-                received_symbols_ber = self._generate_noise(rx_signals, snr_db_val)
-                received_symbols_ber = rx_signals + received_symbols_ber
-                demodulated_bits_ber = self._demodulate(received_symbols_ber, self._get_qpsk_mapping())
-                ber = self._calculate_ber(tx_bits, demodulated_bits_ber)
-                ber_values.append(ber)
-
-            self._plot_snr_ber(snr_db_range, ber_values)
-
-            # SNR vs Kapacitet plot
-            capacity_values = []
-            for snr_db_val in snr_db_range:
-                capacity = self._calculate_capacity(H, snr_db_val, num_tx_antennas, num_rx_antennas, num_modes)
-                capacity_values.append(capacity)
-
-            self._plot_snr_capacity(snr_db_range, capacity_values)
-
-            # Utjecaj šuma na signal
-            self._plot_noise_impact(tx_signals, noise, received_symbols)
-
-            # Detaljni prikaz vlakna
-            self._plot_detailed_fiber(fiber_length, attenuation)
-
-            # Eye Diagram
-            self._plot_eye_diagram(received_symbols, num_tx_antennas, num_modes)
+            try:
+                kbest_k = int(self.kbest_k_entry.get())
+            except ValueError:
+                messagebox.showerror("Greška", "Parametar K mora biti cijeli broj.")
+                return None
+
+            params = SimulationParameters(
+                num_bits=num_bits,
+                snr_db=snr_db,
+                num_tx_antennas=num_tx_antennas,
+                num_rx_antennas=num_rx_antennas,
+                num_modes=num_modes,
+                channel_matrix=H,
+                fiber_length=fiber_length,
+                attenuation=attenuation,
+                snr_range=self.SNR_RANGE,
+                snr_points=self.SNR_POINTS,
+                seed=self.RANDOM_SEED,
+                equalizer=self.EQUALIZER_OPTIONS.get(self.equalizer_combobox.get(), 'mmse'),
+                kbest_k=kbest_k,
+                fec=self.FEC_OPTIONS.get(self.fec_combobox.get(), 'none'),
+            )
+            try:
+                params.validate()
+            except ValueError as e:
+                messagebox.showerror("Greška", str(e))
+                return None
 
+            return params
         except Exception as e:
             messagebox.showerror("Greška", f"Došlo je do neočekivane greške: {e}")
-            return
-
-    def _plot_noise_impact(self, tx_signals: np.ndarray, noise: np.ndarray, received_symbols: np.ndarray):
-        """Plot the impact of noise on the signal."""
-        self.noise_impact_ax.clear()
-        if tx_signals.size > 0 and noise.size > 0:
-            self.noise_impact_ax.plot(np.real(tx_signals[0, :]), label='Odašiljani signal (I komponenta)')
-            self.noise_impact_ax.plot(np.imag(tx_signals[0, :]), label='Odašiljani signal (Q komponenta)')
-            self.noise_impact_ax.plot(np.real(noise[0, :]), label='Šum (I komponenta)')
-            self.noise_impact_ax.plot(np.imag(noise[0, :]), label='Šum (Q komponenta)')
-            self.noise_impact_ax.plot(np.real(received_symbols[0, :]), label='Primljeni signal (I komponenta)')
-            self.noise_impact_ax.plot(np.imag(received_symbols[0, :]), label='Primljeni signal (Q komponenta)')
-            self.noise_impact_ax.set_xlabel('Vrijeme (uzorci)')
-            self.noise_impact_ax.set_ylabel('Amplituda')
-            self.noise_impact_ax.set_title('Utjecaj šuma na QPSK signal')
-            self.noise_impact_ax.legend()
-        self.noise_impact_canvas.draw()
+            return None
+
+    def _compute(self, params: SimulationParameters, worker: SimulationWorker, profiler: Profiler):
+        """The expensive part of a run; executes on the worker thread and touches no widgets."""
+        H = params.channel_matrix
+        with profiler.span('izračun (pozadinska nit)', 'pozadina'):
+            with profiler.span('run_simulation'):
+                result = run_simulation_cached(params, self.result_cache, profiler,
+                                               worker.stage_progress(0.0, self.SIMULATION_PROGRESS))
+            # CDF kapaciteta preko slučajnih realizacija kanala
+            ensemble_progress = worker.stage_progress(self.SIMULATION_PROGRESS, self.ENSEMBLE_PROGRESS)
+            ensemble_progress(0.0, 'ansambl kanala')
+            with profiler.span('ansambl kanala'):
+                ensemble = analyze_ensemble(H.shape[0], H.shape[1], params.snr_db,
+                                            ensemble_size(H.shape[0], H.shape[1], self.ENSEMBLE_REALIZATIONS),
+                                            rng=np.random.RandomState(self.RANDOM_SEED),
+                                            progress=lambda fraction: ensemble_progress(fraction, 'ansambl kanala'))
+            # Kompleksnost i BER K-best detektora; broj vektora se smanjuje s brojem tokova (kao ansambl kanala)
+            tradeoff = []
+            num_vectors = tradeoff_size(H.shape[1], self.KBEST_K_VALUES, self.KBEST_TRADEOFF_VECTORS)
+            if params.equalizer == 'kbest' and num_vectors > 0:
+                tradeoff_progress = worker.stage_progress(self.ENSEMBLE_PROGRESS, self.ANALYSIS_PROGRESS)
+                tradeoff_progress(0.0, 'K-best kompleksnost')
+                with profiler.span('K-best kompleksnost'):
+                    tradeoff = kbest_tradeoff(H, params.snr_db, self.KBEST_K_VALUES, num_vectors,
+                                              rng=np.random.RandomState(self.RANDOM_SEED),
+                                              progress=lambda fraction: tradeoff_progress(fraction,
+                                                                                          'K-best kompleksnost'))
+            # Split-step propagacija odašiljanog signala kroz vlakno
+            propagation_progress = worker.stage_progress(self.ANALYSIS_PROGRESS, 1.0)
+            with profiler.span('split-step propagacija'):
+                waveform = launch_waveform(result.tx_signals, launch_power_dbm=self.LAUNCH_POWER_DBM)
+                propagation = propagate_fiber(waveform, params.fiber_length, params.attenuation, params.dmd,
+                                              rng=np.random.RandomState(self.RANDOM_SEED),
+                                              progress=lambda fraction: propagation_progress(fraction, 'split-step propagacija'))
+            # Gustoće velikih konstelacija i eye dijagrama se binuju ovdje, pa crtanje samo zamijeni podatke
+            with profiler.span('gustoće za grafove'):
+                densities = (prepare_constellation(result.received_symbols, params.num_rx_streams,
+                                                   self.MAX_LEGEND_STREAMS),
+                             prepare_eye_diagram(eye_traces(result.received_symbols,
+                                                            2 * params.num_tx_antennas * params.num_modes)))
+        return params, result, ensemble, tradeoff, propagation, densities
+
+    def _show_results(self, params: SimulationParameters, result: SimulationResult, ensemble: EnsembleCapacity,
+                      tradeoff: List[DetectorPoint], propagation: PropagationResult,
+                      densities: Tuple[Optional[Density], Optional[Density]]):
+        """Show a finished run in the labels and plots (main thread)."""
+        profiler = self.run_profiler
+        try:
+            with profiler.span('prikaz rezultata', 'gui'):
+                self._plot_results(profiler, params, result, ensemble, tradeoff, propagation, densities)
+        except Exception as e:
+            messagebox.showerror("Greška", f"Došlo je do neočekivane greške: {e}")
+        self.last_profile = profiler
+        self._show_profile(profiler)
+
+    def _plot_results(self, profiler: Profiler, params: SimulationParameters, result: SimulationResult,
+                      ensemble: EnsembleCapacity, tradeoff: List[DetectorPoint], propagation: PropagationResult,
+                      densities: Tuple[Optional[Density], Optional[Density]]):
+        H = params.channel_matrix
+        constellation_density, eye_density = densities
+        num_tx_antennas, num_rx_antennas, num_modes = params.num_tx_antennas, params.num_rx_antennas, params.num_modes
+        self.last_simulation = (params, result)
+
+        # Proračun BER
+        if not np.isnan(result.ber):
+            self.ber_label_text.set(f"BER: {result.ber:.4f}")
+        else:
+            self.ber_label_text.set("BER: N/A")
+        if not np.isnan(result.post_fec_ber):
+            self.post_fec_ber_label_text.set(f"BER nakon FEC-a: {result.post_fec_ber:.4f}")
+        else:
+            self.post_fec_ber_label_text.set("BER nakon FEC-a: N/A")
+
+        self.snr_result_label_text.set(f"SNR (dB): {params.snr_db:.2f}")
+
+        # Proračun kapaciteta (pojednostavljeno za AWGN kanal)
+        if not np.isnan(result.capacity):
+            self.capacity_label_text.set(f"Kapacitet (bps/Hz): {result.capacity:.2f}")
+        else:
+            self.capacity_label_text.set("Kapacitet (bps/Hz): N/A")
+
+        # Prikaz odasiljanog signala (prva antena)
+        with profiler.span('crtanje: odašiljani signal', 'crtanje'):
+            self._draw_on_tab('tx_signal', self._plot_tx_signal, result.qpsk_symbols)
+
+        # Prikaz konstelacije
+        with profiler.span('crtanje: konstelacija', 'crtanje'):
+            self._draw_on_tab('constellation', self._plot_constellation, result.received_symbols,
+                              self._get_qpsk_mapping(), num_rx_antennas, num_modes, constellation_density)
+
+        # Prikaz kanalne matrice
+        with profiler.span('crtanje: kanalna matrica', 'crtanje'):
+            self._draw_on_tab('channel', self._plot_channel_matrix, H, num_tx_antennas, num_rx_antennas, num_modes)
+
+        # SNR vs BER plot
+        with profiler.span('crtanje: SNR vs BER', 'crtanje'):
+            self._draw_on_tab('snr_ber', self._plot_snr_ber, result.snr_db_range, result.ber_values,
+                              result.post_fec_ber_values)
+
+        # SNR vs Kapacitet plot
+        with profiler.span('crtanje: SNR vs kapacitet', 'crtanje'):
+            self._draw_on_tab('snr_capacity', self._plot_snr_capacity, result.snr_db_range, result.capacity_values,
+                              result.water_filling_capacity_values)
+
+        # CDF kapaciteta preko slučajnih realizacija kanala
+        with profiler.span('crtanje: CDF kapaciteta', 'crtanje'):
+            self._draw_on_tab('capacity_cdf', self._plot_capacity_cdf, ensemble)
+
+        # Konvergencija adaptivnog ekvalizatora
+        with profiler.span('crtanje: konvergencija ekvalizatora', 'crtanje'):
+            self._draw_on_tab('equalizer_mse', self._plot_equalizer_mse, result.equalizer_mse)
+
+        # BER po prostornom toku
+        with profiler.span('crtanje: BER po toku', 'crtanje'):
+            self._draw_on_tab('stream_ber', self._plot_stream_ber, result.stream_ber)
+
+        # Kompleksnost i BER K-best detektora
+        with profiler.span('crtanje: K-best kompleksnost', 'crtanje'):
+            self._draw_on_tab('kbest', self._plot_kbest_tradeoff, tradeoff, params.kbest_k, params.equalizer)
+
+        # Utjecaj šuma na signal
+        with profiler.span('crtanje: utjecaj šuma', 'crtanje'):
+            self._draw_on_tab('noise_impact', self._plot_noise_impact, result.tx_signals, result.noise,
+                              result.received_symbols)
+
+        # Detaljni prikaz vlakna
+        with profiler.span('crtanje: vlakno', 'crtanje'):
+            self._draw_on_tab('detailed_fiber', self._plot_detailed_fiber, params.fiber_length, params.attenuation,
+                              propagation)
+
+        # Eye Diagram
+        with profiler.span('crtanje: eye dijagram', 'crtanje'):
+            self._draw_on_tab('eye_diagram', self._plot_eye_diagram, result.received_symbols, num_tx_antennas,
+                              num_modes, eye_density)
 
     def _generate_bits(self, num_bits: int) -> np.ndarray:
         """Generate random bits."""
-        return np.random.randint(0, 2, num_bits)
+        return generate_bits(num_bits)
 
-    def _qpsk_modulate(self, bits: np.ndarray) -> Tuple[np.ndarray, List[int]]:
+    def _qpsk_modulate(self, bits: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """QPSK modulate the bits."""
-        qpsk_symbols = []
-        tx_bits = []
-        qpsk_mapping = self._get_qpsk_mapping()
-        for i in range(0, len(bits), 2):
-            if i + 1 < len(bits):
-                tx_bits.extend([bits[i], bits[i+1]])
-                symbol = qpsk_mapping.get((bits[i], bits[i+1]))
-                if symbol is None:
-                    raise ValueError("Invalid bit combination")
-                qpsk_symbols.append(symbol)
-        return np.array(qpsk_symbols), tx_bits
+        return qpsk_modulate(bits)
 
     def _generate_noise(self, signals: np.ndarray, snr_db: float) -> np.ndarray:
         """Generate AWGN noise."""
-        snr_linear = 10**(snr_db / 10)
-        signal_power = np.mean(np.abs(signals)**2)
-        noise_power = signal_power / snr_linear
-        noise_std = np.sqrt(noise_power / 2)
-        noise = noise_std * (np.random.randn(*signals.shape) + 1j * np.random.randn(*signals.shape))
-        return noise
+        return generate_noise(signals, snr_db)
 
     def _get_qpsk_mapping(self) -> Dict[Tuple[int, int], complex]:
         """Return the QPSK mapping dictionary."""
-        return {
-            (0, 0): complex(1/np.sqrt(2), 1/np.sqrt(2)),  # 00 -> 1+j
-            (0, 1): complex(-1/np.sqrt(2), 1/np.sqrt(2)), # 01 -> -1+j
-            (1, 0): complex(1/np.sqrt(2), -1/np.sqrt(2)), # 10 -> 1-j
-            (1, 1): complex(-1/np.sqrt(2), -1/np.sqrt(2))  # 11 -> -1-j
-        }
-
-    def _demodulate(self, received_symbols: np.ndarray, qpsk_mapping) -> List[int]:
+        return get_qpsk_mapping()
+
+    def _demodulate(self, received_symbols: np.ndarray, qpsk_mapping) -> np.ndarray:
         """Demodulate the received symbols."""
-        inverse_mapping = {value: key for key, value in qpsk_mapping.items()}
-        demodulated_bits = []
-        for rx_signal in received_symbols.T:  # Iterate through received symbols
-            for symbol in rx_signal:
-                min_dist = float('inf')
-                closest_symbol = None
-                for ref_symbol in qpsk_mapping.values():
-                    dist = np.abs(symbol - ref_symbol)**2
-                    if dist < min_dist:
-                        min_dist = dist
-                        closest_symbol = ref_symbol
-                if closest_symbol is not None:
-                    demodulated_bits.extend(inverse_mapping[closest_symbol])
-        return demodulated_bits
+        return demodulate(received_symbols, qpsk_mapping)
 
     def _calculate_ber(self, tx_bits: List[int], rx_bits: List[int]) -> float:
         """Calculate the Bit Error Rate."""
-        if not tx_bits or not rx_bits:
-            return np.nan
-        min_length = min(len(tx_bits), len(rx_bits))
-        return np.mean(np.array(tx_bits[:min_length]) != np.array(rx_bits[:min_length]))
+        return calculate_ber(tx_bits, rx_bits)
 
     def _calculate_capacity(self, H: np.ndarray, snr_db: float, num_tx_antennas: int, num_rx_antennas: int, num_modes: int) -> float:
         """Calculate the channel capacity."""
-        snr_linear = 10**(snr_db / 10)
-        if num_rx_antennas * num_modes == 0 or num_tx_antennas * num_modes == 0:
-            return np.nan
-        if H.shape[0] != H.shape[1]:
-            return np.nan
-        return np.log2(det(np.eye(num_rx_antennas * num_modes) + (snr_linear / (num_tx_antennas * num_modes)) * np.dot(H, H.conj().T)))
+        return calculate_capacity(H, snr_db, num_tx_antennas, num_rx_antennas, num_modes)
+
+    def _on_tab_changed(self, event=None):
+        self._show_tab(self.PLOT_TABS[self.notebook.index('current')][0])
+
+    def _show_tab(self, name: str):
+        """Create the figure of a tab on first display and draw the plot deferred while it was hidden."""
+        self._create_figure(name)
+        if name in self.pending_plots:
+            plot, args = self.pending_plots.pop(name)
+            plot(*args)
+
+    def _create_figure(self, name: str):
+        """Figure, axes and Tk canvas of a plot tab, as the attributes <name>_figure, _ax, _canvas."""
+        if name in self.figures:
+            return
+        # Odgođeni uvoz: matplotlib i Tk backend se učitavaju tek za prvi prikazani graf
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        figure = Figure()
+        ax = figure.add_subplot()
+        canvas = FigureCanvasTkAgg(figure, master=getattr(self, name + '_tab'))
+        canvas_widget = canvas.get_tk_widget()
+        canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+        figure.tight_layout(pad=3.0)
+        setattr(self, name + '_figure', figure)
+        setattr(self, name + '_ax', ax)
+        setattr(self, name + '_canvas', canvas)
+        setattr(self, name + '_canvas_widget', canvas_widget)
+        self.figures[name] = figure
+
+    def _draw_on_tab(self, name: str, plot: Callable, *args):
+        """Run plot(*args) now when the tab's figure exists, otherwise when the tab is first shown."""
+        if name in self.figures:
+            plot(*args)
+        else:
+            self.pending_plots[name] = (plot, args)
+
+    def _artists(self, ax) -> AxesArtists:
+        """Artists of ax kept between redraws (see QPSK_MIMO_plot)."""
+        if ax not in self.plot_artists:
+            self.plot_artists[ax] = AxesArtists(ax)
+        return self.plot_artists[ax]
 
     def _plot_tx_signal(self, qpsk_symbols: np.ndarray):
         """Plot the transmitted signal."""
-        self.tx_signal_ax.clear()
-        self.tx_signal_ax.plot(qpsk_symbols.real, qpsk_symbols.imag, 'o', label='Odašiljani simboli')
-        self.tx_signal_ax.set_xlabel('In-phase komponenta')
-        self.tx_signal_ax.set_ylabel('Quadrature komponenta')
-        self.tx_signal_ax.set_title('Odašiljani signal')
-        self.tx_signal_ax.grid(True)
+        view = self._artists(self.tx_signal_ax)
+        if not view.reuse('tx'):
+            view['symbols'], = self.tx_signal_ax.plot([], [], 'o', label='Odašiljani simboli')
+            self.tx_signal_ax.set_xlabel('In-phase komponenta')
+            self.tx_signal_ax.set_ylabel('Quadrature komponenta')
+            self.tx_signal_ax.set_title('Odašiljani signal')
+            self.tx_signal_ax.grid(True)
+            self.tx_signal_ax.legend()
+            self.tx_signal_figure.tight_layout(pad=3.0)
+        symbols = qpsk_symbols[:self.MAX_TX_MARKERS]
+        view['symbols'].set_data(symbols.real, symbols.imag)
+        view.rescale()
         self.tx_signal_ax.axis('equal')
-        self.tx_signal_ax.legend()
         self.tx_signal_canvas.draw()
-        self.tx_signal_figure.tight_layout(pad=3.0)
-
-    def _plot_constellation(self, received_symbols: np.ndarray, mapping: Dict[Tuple[int, int], complex], num_rx_antennas: int, num_modes: int):
-        """Plot the constellation diagram."""
-        self.constellation_ax.clear()
-        for i in range(num_rx_antennas * num_modes):
-            self.constellation_ax.plot(received_symbols[i].real, received_symbols[i].imag, '.', label=f'Primljeni simboli (Prijemnik {i+1})')
-
-        ideal_points = list(mapping.values())
-        self.constellation_ax.plot([p.real for p in ideal_points], [p.imag for p in ideal_points], 'r*', markersize=12, markeredgecolor='black', label='Idealni simboli')
-
-        self.constellation_ax.set_xlabel('In-phase komponenta')
-        self.constellation_ax.set_ylabel('Quadrature komponenta')
-        self.constellation_ax.set_title('Konstelacijski dijagram (QPSK MIMO)')
-        self.constellation_ax.grid(True)
-
-        # Create a legend for each receiver
-        handles, labels = self.constellation_ax.get_legend_handles_labels()
-        for i in range(num_rx_antennas * num_modes):
-            handles.append(matplotlib.lines.Line2D([0], [0], linestyle="none", marker='.', markersize=10, markerfacecolor=self.constellation_ax.lines[i].get_color()))
-            labels.append(f'Primljeni simboli (Prijemnik {i+1})')
-        self.constellation_ax.legend(handles, labels)
-
-        self.constellation_ax.axis('equal')
+
+    def _plot_constellation(self, received_symbols: np.ndarray, mapping: Dict[Tuple[int, int], complex], num_rx_antennas: int, num_modes: int,
+                            density: Optional[Density] = None):
+        """Plot the constellation diagram (a density of all receivers for many streams or samples)."""
+        if draw_constellation(self._artists(self.constellation_ax), received_symbols, num_rx_antennas * num_modes,
+                              list(mapping.values()), self.MAX_LEGEND_STREAMS, density):
+            self.constellation_figure.tight_layout(pad=3.0)
         self.constellation_canvas.draw()
-        self.constellation_figure.tight_layout(pad=3.0)
+
+    def _remove_channel_colorbar(self):
+        if self.channel_colorbar is not None:
+            self.channel_colorbar.remove()
+            self.channel_colorbar = None
 
     def _plot_channel_matrix(self, H: np.ndarray, num_tx_antennas: int, num_rx_antennas: int, num_modes: int):
-        """Plot the channel matrix."""
-        if not self.channel_matrix_displayed:
+        """Plot the channel matrix; redrawn only when H differs from the one shown."""
+        if self.displayed_channel_matrix is None or not np.array_equal(H, self.displayed_channel_matrix):
+            self._remove_channel_colorbar()
             self.channel_ax.clear()
             if num_rx_antennas * num_modes > 0 and num_tx_antennas * num_modes > 0:
                 im = self.channel_ax.imshow(np.abs(H), cmap='viridis')
-                self.channel_figure.colorbar(im, ax=self.channel_ax, fraction=0.046, pad=0.04, label='Amplituda')
-                self.channel_ax.set_xticks(np.arange(num_tx_antennas * num_modes))
-                self.channel_ax.set_yticks(np.arange(num_rx_antennas * num_modes))
+                self.channel_colorbar = self.channel_figure.colorbar(im, ax=self.channel_ax, fraction=0.046, pad=0.04,
+                                                                     label='Amplituda')
+                if max(H.shape) <= self.MAX_LEGEND_STREAMS:
+                    self.channel_ax.set_xticks(np.arange(num_tx_antennas * num_modes))
+                    self.channel_ax.set_yticks(np.arange(num_rx_antennas * num_modes))
                 self.channel_ax.set_xlabel('Predajni elementi')
                 self.channel_ax.set_ylabel('Prijemni elementi')
                 self.channel_ax.set_title('Kanalna matrica (H)')
             self.channel_canvas.draw()
-            self.channel_matrix_displayed = True
-
-    def _plot_snr_ber(self, snr_db_range: np.ndarray, ber_values: List[float]):
-        """Plot SNR vs BER."""
-        self.snr_ber_ax.clear()
-        self.snr_ber_ax.semilogy(snr_db_range, ber_values, marker='o', linestyle='-')
-        self.snr_ber_ax.set_xlabel('SNR (dB)')
-        self.snr_ber_ax.set_ylabel('BER')
-        self.snr_ber_ax.set_title('Ovisnost BER o SNR')
-        self.snr_ber_ax.grid(True)
+            self.displayed_channel_matrix = np.array(H)
+
+    def _plot_snr_ber(self, snr_db_range: np.ndarray, ber_values: List[float], post_fec_ber_values: List[float] = ()):
+        """Plot SNR vs BER (before and, with FEC, after decoding)."""
+        view = self._artists(self.snr_ber_ax)
+        with_fec = len(post_fec_ber_values) > 0
+        if not view.reuse(('snr_ber', with_fec)):
+            view['ber'], = self.snr_ber_ax.semilogy([], [], marker='o', linestyle='-',
+                                                    label='Prije FEC-a' if with_fec else None)
+            if with_fec:
+                view['post_fec'], = self.snr_ber_ax.semilogy([], [], marker='s', linestyle='--', label='Nakon FEC-a')
+                self.snr_ber_ax.legend()
+            self.snr_ber_ax.set_xlabel('SNR (dB)')
+            self.snr_ber_ax.set_ylabel('BER')
+            self.snr_ber_ax.set_title('Ovisnost BER o SNR')
+            self.snr_ber_ax.grid(True)
+        view['ber'].set_data(snr_db_range, ber_values)
+        if with_fec:
+            view['post_fec'].set_data(snr_db_range, post_fec_ber_values)
+        view.rescale()
         self.snr_ber_canvas.draw()
 
-    def _plot_snr_capacity(self, snr_db_range: np.ndarray, capacity_values: List[float]):
+    def _plot_snr_capacity(self, snr_db_range: np.ndarray, capacity_values: List[float], water_filling_values: List[float] = None):
         """Plot SNR vs Capacity."""
-        self.snr_capacity_ax.clear()
-        self.snr_capacity_ax.plot(snr_db_range, capacity_values, marker='o', linestyle='-')
-        self.snr_capacity_ax.set_xlabel('SNR (dB)')
-        self.snr_capacity_ax.set_ylabel('Kapacitet (bps/Hz)')
-        self.snr_capacity_ax.set_title('Ovisnost kapaciteta o SNR')
-        self.snr_capacity_ax.grid(True)
+        view = self._artists(self.snr_capacity_ax)
+        with_water_filling = water_filling_values is not None
+        if not view.reuse(('snr_capacity', with_water_filling)):
+            view['equal_power'], = self.snr_capacity_ax.plot([], [], marker='o', linestyle='-',
+                                                             label='Jednaka raspodjela snage')
+            if with_water_filling:
+                view['water_filling'], = self.snr_capacity_ax.plot([], [], marker='s', linestyle='--',
+                                                                   label='Water-filling')
+                self.snr_capacity_ax.legend()
+            self.snr_capacity_ax.set_xlabel('SNR (dB)')
+            self.snr_capacity_ax.set_ylabel('Kapacitet (bps/Hz)')
+            self.snr_capacity_ax.set_title('Ovisnost kapaciteta o SNR')
+            self.snr_capacity_ax.grid(True)
+        view['equal_power'].set_data(snr_db_range, capacity_values)
+        if with_water_filling:
+            view['water_filling'].set_data(snr_db_range, water_filling_values)
+        view.rescale()
         self.snr_capacity_canvas.draw()
 
     def _plot_noise_impact(self, tx_signals: np.ndarray, noise: np.ndarray, received_symbols: np.ndarray):
-        """Plot the impact of noise on the signal."""
-        self.noise_impact_ax.clear()
+        """Plot the impact of noise on the signal (the first MAX_TIME_SAMPLES samples of the first stream)."""
+        view = self._artists(self.noise_impact_ax)
         if tx_signals.size > 0 and noise.size > 0:
-            self.noise_impact_ax.plot(np.real(tx_signals[0, :]), label='Odašiljani signal (I komponenta)')
-            self.noise_impact_ax.plot(np.imag(tx_signals[0, :]), label='Odašiljani signal (Q komponenta)')
-            self.noise_impact_ax.plot(np.real(noise[0, :]), label='Šum (I komponenta)')
-            self.noise_impact_ax.plot(np.imag(noise[0, :]), label='Šum (Q komponenta)')
-            self.noise_impact_ax.plot(np.real(received_symbols[0, :]), label='Primljeni signal (I komponenta)')
-            self.noise_impact_ax.plot(np.imag(received_symbols[0, :]), label='Primljeni signal (Q komponenta)')
-            self.noise_impact_ax.set_xlabel('Vrijeme (uzorci)')
-            self.noise_impact_ax.set_ylabel('Amplituda')
-            self.noise_impact_ax.set_title('Utjecaj šuma na QPSK signal')
-            self.noise_impact_ax.legend()
+            curves = {'tx': tx_signals[0, :self.MAX_TIME_SAMPLES], 'noise': noise[0, :self.MAX_TIME_SAMPLES],
+                      'rx': received_symbols[0, :self.MAX_TIME_SAMPLES]}
+            if not view.reuse('noise_impact'):
+                for key, name in (('tx', 'Odašiljani signal'), ('noise', 'Šum'), ('rx', 'Primljeni signal')):
+                    view[key + '_i'], = self.noise_impact_ax.plot([], [], label=f'{name} (I komponenta)')
+                    view[key + '_q'], = self.noise_impact_ax.plot([], [], label=f'{name} (Q komponenta)')
+                self.noise_impact_ax.set_xlabel('Vrijeme (uzorci)')
+                self.noise_impact_ax.set_ylabel('Amplituda')
+                self.noise_impact_ax.set_title('Utjecaj šuma na QPSK signal')
+                self.noise_impact_ax.legend()
+            for key, values in curves.items():
+                samples = np.arange(len(values))
+                view[key + '_i'].set_data(samples, np.real(values))
+                view[key + '_q'].set_data(samples, np.imag(values))
+            view.rescale()
+        else:
+            self.noise_impact_ax.clear()
         self.noise_impact_canvas.draw()
 
-    def _plot_detailed_fiber(self, fiber_length: float, attenuation: float):
-        """Plot the detailed fiber propagation."""
-        self.detailed_fiber_ax.clear()
-        distance = np.linspace(0, fiber_length, self.FIBER_LENGTH_POINTS)
-        attenuation_linear = 10**(-attenuation / 10)
-        signal_power_linear = np.exp(-attenuation_linear * distance) # Simplified model
-        signal_power_dbm = 10 * np.log10(signal_power_linear) # Convert to dBm
-
-        # Assume initial noise power is -100 dBm (can be adjusted)
-        initial_noise_power_dbm = -100
-        noise_power_dbm = initial_noise_power_dbm + 10 * np.log10(1/signal_power_linear) # Noise increases with attenuation
-
-        snr_db = signal_power_dbm - noise_power_dbm
-
-        self.detailed_fiber_ax.plot(distance, signal_power_dbm, label='Snaga signala (dBm)', color='blue')
-        self.detailed_fiber_ax.plot(distance, noise_power_dbm, label='Snaga šuma (dBm)', color='red')
-        self.detailed_fiber_ax.plot(distance, snr_db, label='SNR (dB)', color='green')
-        self.detailed_fiber_ax.set_xlabel('Duljina vlakna (km)')
-        self.detailed_fiber_ax.set_ylabel('Snaga (dBm) / SNR (dB)')
-        self.detailed_fiber_ax.set_title(f'Prikaz vlakna (Duljina: {fiber_length} km, Atenuacija: {attenuation} dB/km)')
-        self.detailed_fiber_ax.grid(True)
-        self.detailed_fiber_ax.legend()
+    def _plot_capacity_cdf(self, ensemble: EnsembleCapacity):
+        """Plot the capacity CDF over the random channel ensemble."""
+        self.capacity_cdf_ax.clear()
+        capacities, probabilities = ensemble.cdf()
+        self.capacity_cdf_ax.semilogy(capacities, probabilities, linestyle='-')
+        self.capacity_cdf_ax.axvline(ensemble.ergodic, color='green', linestyle='--', label=f'Ergodički kapacitet: {ensemble.ergodic:.2f}')
+        self.capacity_cdf_ax.axvline(ensemble.outage, color='red', linestyle=':', label=f'Outage kapacitet ({ensemble.outage_probability:g}): {ensemble.outage:.2f}')
+        self.capacity_cdf_ax.set_xlabel('Kapacitet (bps/Hz)')
+        self.capacity_cdf_ax.set_ylabel('P(C < x)')
+        self.capacity_cdf_ax.set_title(f'CDF kapaciteta ({capacities.size} realizacija, SNR {ensemble.snr_db:.1f} dB)')
+        self.capacity_cdf_ax.grid(True)
+        self.capacity_cdf_ax.legend()
+        self.capacity_cdf_canvas.draw()
+
+    def _plot_equalizer_mse(self, mse: np.ndarray):
+        """Plot the per-block MSE trace of the adaptive equalizer."""
+        view = self._artists(self.equalizer_mse_ax)
+        if not view.reuse(len(mse) > 0):
+            if len(mse) == 0:
+                view['hint'] = self.equalizer_mse_ax.text(0.5, 0.5, 'Odaberite LMS ili CMA ekvalizator', ha='center',
+                                                          va='center', transform=self.equalizer_mse_ax.transAxes)
+            else:
+                view['mse'], = self.equalizer_mse_ax.plot([], [], marker='.', linestyle='-')
+                self.equalizer_mse_ax.set_xlabel('Blok')
+                self.equalizer_mse_ax.set_ylabel('MSE (dB)')
+                self.equalizer_mse_ax.grid(True)
+            self.equalizer_mse_ax.set_title('Konvergencija adaptivnog ekvalizatora')
+        if len(mse) > 0:
+            view['mse'].set_data(np.arange(1, len(mse) + 1), 10 * np.log10(mse))
+            view.rescale()
+        self.equalizer_mse_canvas.draw()
+
+    def _plot_stream_ber(self, stream_ber: np.ndarray):
+        """Plot the BER of every detected stream (a histogram for many streams)."""
+        self.stream_ber_ax.clear()
+        if len(stream_ber) > self.MAX_LEGEND_STREAMS:
+            self.stream_ber_ax.hist(stream_ber, bins=min(50, len(stream_ber)), color='tab:blue', edgecolor='black')
+            self.stream_ber_ax.axvline(np.mean(stream_ber), color='red', linestyle='--', label=f'Srednji BER: {np.mean(stream_ber):.4f}')
+            self.stream_ber_ax.set_xlabel('BER')
+            self.stream_ber_ax.set_ylabel('Broj tokova')
+            self.stream_ber_ax.legend()
+        elif len(stream_ber) > 0:
+            self.stream_ber_ax.bar(np.arange(1, len(stream_ber) + 1), stream_ber, color='tab:blue')
+            self.stream_ber_ax.set_xticks(np.arange(1, len(stream_ber) + 1))
+            self.stream_ber_ax.set_xlabel('Tok')
+            self.stream_ber_ax.set_ylabel('BER')
+        self.stream_ber_ax.set_title(f'BER po prostornom toku ({len(stream_ber)} tokova)')
+        self.stream_ber_ax.grid(True)
+        self.stream_ber_canvas.draw()
+
+    def _plot_kbest_tradeoff(self, points: List[DetectorPoint], selected_k: int, equalizer: str = 'kbest'):
+        """Plot BER against visited tree nodes per vector for several K (ML as reference)."""
+        self.kbest_ax.clear()
+        kbest_points = [point for point in points if point.k is not None]
+        title = 'Kompleksnost i BER K-best detektora'
+        if not kbest_points:
+            message = ('Odaberite K-best ekvalizator' if equalizer != 'kbest' else
+                       f'Kompleksnost se ne mjeri za više od {MAX_TRADEOFF_STREAMS} tokova')
+            self.kbest_ax.text(0.5, 0.5, message, ha='center', va='center', transform=self.kbest_ax.transAxes)
+        else:
+            nodes = [point.nodes_per_vector for point in kbest_points]
+            self.kbest_ax.semilogx(nodes, [point.ber for point in kbest_points], marker='o', linestyle='-', label='K-best')
+            for point in kbest_points:
+                self.kbest_ax.annotate(f'K={point.k}', (point.nodes_per_vector, point.ber), textcoords='offset points',
+                                       xytext=(0, 6), ha='center', fontsize=8,
+                                       fontweight='bold' if point.k == selected_k else 'normal')
+            for point in points:
+                if point.k is None:
+                    self.kbest_ax.semilogx(point.nodes_per_vector, point.ber, marker='*', markersize=12, color='red',
+                                           linestyle='none', label=f'ML ({point.seconds:.2f} s)')
+            self.kbest_ax.set_xlabel('Posjećeni čvorovi po vektoru')
+            self.kbest_ax.set_ylabel('BER')
+            self.kbest_ax.legend()
+            self.kbest_ax.grid(True, which='both')
+            title += f' ({kbest_points[0].num_vectors} vektora)'
+        self.kbest_ax.set_title(title)
+        self.kbest_canvas.draw()
+
+    def _plot_detailed_fiber(self, fiber_length: float, attenuation: float, propagation: PropagationResult):
+        """Plot the signal power along the fiber from a split-step propagation of the transmitted waveform."""
+        view = self._artists(self.detailed_fiber_ax)
+        if not view.reuse('fiber'):
+            view['power'], = self.detailed_fiber_ax.plot([], [], label='Snaga signala (dBm)', color='blue')
+            self.detailed_fiber_ax.set_xlabel('Duljina vlakna (km)')
+            self.detailed_fiber_ax.set_ylabel('Snaga (dBm)')
+            self.detailed_fiber_ax.grid(True)
+            self.detailed_fiber_ax.legend()
+        view['power'].set_data(propagation.distance, propagation.power_dbm)
+        view.rescale()
+        self.detailed_fiber_ax.set_title(f'Prikaz vlakna (Duljina: {fiber_length} km, Atenuacija: {attenuation} dB/km)\n'
+                                         f'Split-step: {propagation.num_steps} koraka, {propagation.wall_time:.2f} s, '
+                                         f'nelinearna faza {propagation.nonlinear_phase[-1]:.2f} rad')
         self.detailed_fiber_canvas.draw()
 
-    def _plot_eye_diagram(self, received_symbols: np.ndarray, num_tx_antennas: int, num_modes: int):
-        """Plot the eye diagram."""
-        self.eye_diagram_ax.clear()
-        if received_symbols.size > 0:
-            num_symbols_to_plot = min(received_symbols.shape[1], 1000)  # Limit for performance
-
-            # Reshape received symbols to have a single stream for eye diagram
-            received_stream = received_symbols.flatten()
-
-            # Calculate the number of traces to plot
-            num_traces = len(received_stream) // (2 * num_tx_antennas * num_modes)
-
-            # Create a time axis for the eye diagram
-            time_axis = np.arange(0, 2 * num_tx_antennas * num_modes)
-
-            # Plot the eye diagram
-            for i in range(num_traces):
-                start_index = i * 2 * num_tx_antennas * num_modes
-                end_index = start_index + 2 * num_tx_antennas * num_modes
-                trace = np.real(received_stream[start_index:end_index])
-                self.eye_diagram_ax.plot(time_axis, trace, color='b', alpha=0.5)
-
-            self.eye_diagram_ax.set_xlabel('Vrijeme (simboli)')
-            self.eye_diagram_ax.set_ylabel('Amplituda')
-            self.eye_diagram_ax.set_title('Eye Dijagram primljenog signala')
-            self.eye_diagram_ax.grid(True)
+    def _plot_eye_diagram(self, received_symbols: np.ndarray, num_tx_antennas: int, num_modes: int,
+                          density: Optional[Density] = None):
+        """Plot the eye diagram (one LineCollection, or a density image for many traces)."""
+        traces = eye_traces(received_symbols, 2 * num_tx_antennas * num_modes)
+        draw_eye_diagram(self._artists(self.eye_diagram_ax), traces, density)
         self.eye_diagram_canvas.draw()
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+"""Block frequency-domain adaptive MIMO equalizer (LMS and CMA).
+
+A channel with memory (differential mode delay) needs a multi-tap equalizer
+W[k]. Filtering and the gradient correlation are both done per FFT block:
+num_taps new samples are filtered by overlap-save with a 2 * num_taps FFT,
+and the weights are updated once per block from the block error. This costs
+O(log num_taps) per output sample and tap instead of O(num_taps) for a
+time-domain equalizer. The step is normalized per frequency bin by a running
+estimate of the input power, and the gradient is constrained to num_taps
+taps (constrained FLMS).
+
+CMA acquires blindly for the first training_symbols and then hands over to
+decision-directed LMS. Unless set explicitly, training covers at most
+MAX_TRAINING_FRACTION of the frame, so short frames (the GUI's 500 symbols,
+stream and Monte Carlo frames) still reach the decision-directed phase. It is blind to the carrier phase and to the symbol
+lag each stream locks to, so its output is aligned per stream against the
+known symbols (ideal frame synchronization, as a pilot-aided receiver does).
+"""
+import numpy as np
+import scipy.fft
+from dataclasses import dataclass
+from typing import List, Optional
+
+from QPSK_MIMO_equalizer import mmse_filter, qpsk_hard_decision
+
+ADAPTIVE_EQUALIZERS = ('lms', 'cma')
+MIN_ADAPTIVE_TAPS = 32
+DEFAULT_STEP_SIZES = {'lms': 0.3, 'cma': 0.1}
+# Dužina treninga (LMS) odnosno slijepe akvizicije (CMA) u simbolima
+DEFAULT_TRAINING_SYMBOLS = {'lms': 4096, 'cma': 16384}
+MAX_TRAINING_FRACTION = 0.25  # najveći udio okvira za trening odnosno akviziciju
+DEFAULT_FORGETTING = 0.9
+CMA_RADIUS = 1.0  # E|s|^4 / E|s|^2 za QPSK jedinične snage
+
+
+@dataclass
+class AdaptiveResult:
+    """Equalized (transmit streams x time) symbols and the convergence trace."""
+    symbols: np.ndarray
+    mse: np.ndarray
+    weights: np.ndarray
+    training_symbols: int = 0
+
+
+def training_length(kind: str, num_samples: int) -> int:
+    """Training (LMS) or blind acquisition (CMA) symbols for a frame of num_samples symbols."""
+    return min(DEFAULT_TRAINING_SYMBOLS[kind], int(MAX_TRAINING_FRACTION * num_samples))
+
+
+def adaptive_num_taps(channel_taps: int = 1) -> int:
+    """Power-of-two equalizer length covering twice the channel memory."""
+    return max(MIN_ADAPTIVE_TAPS, int(2**np.ceil(np.log2(2 * channel_taps))))
+
+
+class BlockAdaptiveEqualizer:
+    """Streaming block frequency-domain equalizer y[n] = sum_k W[k] r[n - k].
+
+    Samples are buffered until a full block of num_taps is available, so a call
+    returns num_taps * (complete blocks) samples. The output is delayed by
+    delay = num_taps // 2 (centre-spike initialization), i.e. y[n] estimates
+    the symbol sent at n - delay. While fewer than training_symbols symbols
+    have been processed and the desired symbols are known, LMS adapts on the
+    training symbols; CMA adapts blindly over the same span. Afterwards both
+    are decision directed.
+    """
+
+    def __init__(self, num_taps: int, num_rx: int, num_tx: int, algorithm: str = 'lms',
+                 step_size: Optional[float] = None, training_symbols: Optional[int] = None,
+                 initial: Optional[np.ndarray] = None, forgetting: float = DEFAULT_FORGETTING):
+        if algorithm not in ADAPTIVE_EQUALIZERS:
+            raise ValueError(f"Nepoznat adaptivni ekvalizator: {algorithm}")
+        self.num_taps = num_taps
+        self.num_rx = num_rx
+        self.num_tx = num_tx
+        self.algorithm = algorithm
+        self.step_size = DEFAULT_STEP_SIZES[algorithm] if step_size is None else step_size
+        self.training_symbols = DEFAULT_TRAINING_SYMBOLS[algorithm] if training_symbols is None else training_symbols
+        self.forgetting = forgetting
+        self.delay = num_taps // 2
+        self.fft_size = 2 * num_taps
+
+        weights = np.zeros((num_taps, num_tx, num_rx), dtype=complex)
+        weights[self.delay] = np.eye(num_tx, num_rx) if initial is None else initial
+        self.frequency_weights = scipy.fft.fft(weights, n=self.fft_size, axis=0)
+        self.power = None
+        self.previous_block = np.zeros((num_rx, num_taps), dtype=complex)
+        self.pending = np.zeros((num_rx, 0), dtype=complex)
+        # Željeni simbol za izlaz n je onaj poslan u n - delay; prije početka nije poznat
+        self.desired = np.full((num_tx, self.delay), np.nan, dtype=complex)
+        self.num_output = 0
+        self.mse: List[float] = []
+
+    @property
+    def weights(self) -> np.ndarray:
+        """Current time-domain taps (num_taps x num_tx x num_rx)."""
+        return scipy.fft.ifft(self.frequency_weights, axis=0)[:self.num_taps]
+
+    def __call__(self, received: np.ndarray, desired: Optional[np.ndarray] = None, adapt: bool = True) -> np.ndarray:
+        """Equalize the next (num_rx x T) samples; desired are the symbols sent at the same instants.
+
+        With adapt=False the weights are frozen (e.g. while flushing with zeros).
+        """
+        received = np.asarray(received)
+        if desired is None:
+            desired = np.full((self.num_tx, received.shape[-1]), np.nan, dtype=complex)
+        desired = np.broadcast_to(desired, (self.num_tx, received.shape[-1]))
+        self.pending = np.concatenate([self.pending, received], axis=1)
+        self.desired = np.concatenate([self.desired, desired], axis=1)
+
+        K = self.num_taps
+        num_blocks = self.pending.shape[1] // K
+        output = np.empty((self.num_tx, num_blocks * K), dtype=complex)
+        for block in range(num_blocks):
+            current = self.pending[:, block * K:(block + 1) * K]
+            spectrum = scipy.fft.fft(np.concatenate([self.previous_block, current], axis=1), axis=-1)
+            self.previous_block = current
+            # Jedan (tx x rx) proizvod po frekvenciji; valjana je druga polovina bloka
+            filtered = np.matmul(self.frequency_weights, spectrum.T[:, :, np.newaxis])[:, :, 0]
+            y = scipy.fft.ifft(filtered, axis=0)[K:].T
+            output[:, block * K:(block + 1) * K] = y
+            if adapt:
+                self._update(spectrum, y, self.desired[:, block * K:(block + 1) * K])
+            else:
+                self.num_output += K
+        self.pending = self.pending[:, num_blocks * K:]
+        self.desired = self.desired[:, num_blocks * K:]
+        return output
+
+    def _update(self, spectrum: np.ndarray, y: np.ndarray, desired: np.ndarray):
+        K = self.num_taps
+        time_index = self.num_output + np.arange(K)
+        self.num_output += K
+        valid = time_index >= self.delay
+        acquisition = time_index < self.training_symbols + self.delay
+        step_size = self.step_size
+        if self.algorithm == 'cma' and acquisition[0]:
+            dispersion = CMA_RADIUS - np.abs(y)**2
+            error = y * dispersion
+            self.mse.append(float(np.mean(dispersion[:, valid]**2)) if np.any(valid) else np.nan)
+        else:
+            if self.algorithm == 'cma':
+                step_size = DEFAULT_STEP_SIZES['lms']
+            training = acquisition & ~np.isnan(desired).any(axis=0) & (self.algorithm == 'lms')
+            target = np.where(training, desired, qpsk_hard_decision(y))
+            error = target - y
+            self.mse.append(float(np.mean(np.abs(error[:, valid])**2)) if np.any(valid) else np.nan)
+        error[:, ~valid] = 0
+
+        input_power = np.sum(np.abs(spectrum)**2, axis=0)
+        if self.power is None:
+            self.power = input_power
+        else:
+            self.power = self.forgetting * self.power + (1 - self.forgetting) * input_power
+        error_spectrum = scipy.fft.fft(np.concatenate([np.zeros_like(error), error], axis=1), axis=-1)
+        gradient = (error_spectrum.T[:, :, np.newaxis] * spectrum.conj().T[:, np.newaxis, :]
+                    / (self.power[:, np.newaxis, np.newaxis] + 1e-12))
+        # Ograničenje gradijenta na num_taps tapova (constrained FLMS)
+        gradient = scipy.fft.ifft(gradient, axis=0)[:K]
+        self.frequency_weights += step_size * scipy.fft.fft(gradient, n=self.fft_size, axis=0)
+
+
+def align_to_reference(output: np.ndarray, desired: np.ndarray, delay: int, max_lag: int) -> np.ndarray:
+    """Cut the (streams x T) block of output that best matches desired, derotated per stream.
+
+    A blind equalizer may lock each stream with an extra lag in [-delay, max_lag]
+    and a phase rotation; both are found from the cross-correlation with the
+    known symbols.
+    """
+    num_samples = desired.shape[-1]
+    aligned = np.empty((output.shape[0], num_samples), dtype=complex)
+    for stream in range(output.shape[0]):
+        window = output[stream, :delay + max_lag + num_samples]
+        # Korelacija za sve pomake u kojima desired cijeli leži u prozoru (kao scipy.signal.correlate 'valid')
+        spectrum = scipy.fft.fft(window) * np.conj(scipy.fft.fft(desired[stream], n=len(window)))
+        correlation = scipy.fft.ifft(spectrum)[:len(window) - num_samples + 1]
+        offset = int(np.argmax(np.abs(correlation)))
+        aligned[stream] = window[offset:offset + num_samples] * np.exp(-1j * np.angle(correlation[offset]))
+    return aligned
+
+
+def adaptive_equalize(received_symbols: np.ndarray, H: np.ndarray, noise_variance: float, kind: str = 'lms',
+                      desired: Optional[np.ndarray] = None, num_taps: Optional[int] = None,
+                      step_size: Optional[float] = None,
+                      training_symbols: Optional[int] = None) -> AdaptiveResult:
+    """Equalize a whole (receivers x time) block, aligned with the transmitted symbols.
+
+    The equalizer starts from the MMSE filter of the flat channel H as its
+    centre tap; desired holds the transmitted symbols (LMS training, and the
+    lag/phase alignment of the CMA output). training_symbols defaults to
+    training_length of the block.
+    """
+    received_symbols = np.asarray(received_symbols)
+    if num_taps is None:
+        num_taps = MIN_ADAPTIVE_TAPS
+    if training_symbols is None and kind in ADAPTIVE_EQUALIZERS:
+        training_symbols = training_length(kind, received_symbols.shape[-1])
+    equalizer = BlockAdaptiveEqualizer(num_taps, H.shape[0], H.shape[1], kind, step_size, training_symbols,
+                                       initial=mmse_filter(H, noise_variance))
+    num_samples = received_symbols.shape[-1]
+    if desired is not None:
+        desired = np.broadcast_to(desired, (H.shape[1], num_samples))
+    flush = np.zeros((H.shape[0], equalizer.delay + 2 * num_taps))
+    output = np.concatenate([equalizer(received_symbols, desired), equalizer(flush, adapt=False)], axis=1)
+    if kind == 'cma' and desired is not None:
+        symbols = align_to_reference(output, desired, equalizer.delay, num_taps)
+    else:
+        symbols = output[:, equalizer.delay:equalizer.delay + num_samples]
+    return AdaptiveResult(symbols=symbols, mse=np.array(equalizer.mse), weights=equalizer.weights,
+                          training_symbols=training_symbols)
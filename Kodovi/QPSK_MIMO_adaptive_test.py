@@ -0,0 +1,109 @@
+import unittest
+import numpy as np
+from QPSK_MIMO_adaptive import (BlockAdaptiveEqualizer, adaptive_equalize, adaptive_num_taps,
+                                MAX_TRAINING_FRACTION, MIN_ADAPTIVE_TAPS)
+from QPSK_MIMO_channel import OverlapSaveConvolver
+from QPSK_MIMO_engine import (SimulationParameters, run_simulation, qpsk_modulate, apply_channel, generate_noise,
+                              noise_variance, demodulate, count_bit_errors)
+
+class TestQPSK_MIMO_adaptive(unittest.TestCase):
+
+    def _dispersive_link(self, snr_db=15.0, num_bits=200000):
+        params = SimulationParameters(channel_model='fiber', dmd=50.0, snr_db=snr_db)
+        rng = np.random.RandomState(0)
+        symbols, tx_bits = qpsk_modulate(rng.randint(0, 2, num_bits))
+        rx_signals = apply_channel(params, np.tile(symbols, (params.num_tx_streams, 1)))
+        signal_power = np.mean(np.abs(rx_signals)**2)
+        received = rx_signals + generate_noise(rx_signals, snr_db, rng, signal_power)
+        return params, symbols, tx_bits, received, noise_variance(signal_power, snr_db)
+
+    ## @brief Testira filtriranje u frekvencijskom domenu.
+    ## @details Sa zamrznutim težinama izlaz mora biti jednak vremenskoj konvoluciji sa trenutnim tapovima.
+    def test_filtriranje_po_blokovima(self):
+        """
+        @brief Testira filtriranje u frekvencijskom domenu.
+        @details Sa zamrznutim težinama izlaz mora biti jednak vremenskoj konvoluciji sa trenutnim tapovima.
+        """
+        print("\nTest: Filtriranje po blokovima")
+        rng = np.random.RandomState(1)
+        equalizer = BlockAdaptiveEqualizer(16, 3, 2, initial=rng.randn(2, 3))
+        equalizer.frequency_weights += np.fft.fft(np.pad(0.1 * rng.randn(16, 2, 3), ((0, 16), (0, 0), (0, 0))), axis=0)
+        received = rng.randn(3, 200) + 1j * rng.randn(3, 200)
+        output = np.concatenate([equalizer(received[:, :37], adapt=False), equalizer(received[:, 37:], adapt=False)], axis=1)
+        self.assertEqual(output.shape, (2, 192))
+        expected = OverlapSaveConvolver(equalizer.weights)(received)[:, :192]
+        np.testing.assert_allclose(output, expected, atol=1e-10)
+
+    ## @brief Testira konvergenciju LMS ekvalizatora na kanalu sa DMD-om.
+    ## @details Nakon treninga MSE mora pasti za više od 10 dB, a BER biti mali iako MMSE sa ravnim kanalom ne radi.
+    def test_lms_konvergencija(self):
+        """
+        @brief Testira konvergenciju LMS ekvalizatora na kanalu sa DMD-om.
+        @details Nakon treninga MSE mora pasti za više od 10 dB, a BER biti mali iako MMSE sa ravnim kanalom ne radi.
+        """
+        print("\nTest: Konvergencija LMS ekvalizatora")
+        params, symbols, tx_bits, received, noise_var = self._dispersive_link()
+        result = adaptive_equalize(received, params.channel_matrix, noise_var, 'lms', symbols,
+                                   adaptive_num_taps(params.channel_taps.shape[0]))
+        print(f"  MSE (dB): početak {10 * np.log10(result.mse[0]):.1f}, kraj {10 * np.log10(result.mse[-1]):.1f}")
+        self.assertLess(10 * np.log10(result.mse[-1]), 10 * np.log10(result.mse[0]) - 10)
+        errors, compared = count_bit_errors(tx_bits[40000:], demodulate(result.symbols[:, 20000:]), params.num_tx_streams)
+        self.assertLess(errors / compared, 1e-3)
+
+    ## @brief Testira slijepi CMA ekvalizator.
+    ## @details Nakon slijepe akvizicije i poravnanja po kašnjenju i fazi BER mora biti mali.
+    def test_cma_konvergencija(self):
+        """
+        @brief Testira slijepi CMA ekvalizator.
+        @details Nakon slijepe akvizicije i poravnanja po kašnjenju i fazi BER mora biti mali.
+        """
+        print("\nTest: Konvergencija CMA ekvalizatora")
+        params, symbols, tx_bits, received, noise_var = self._dispersive_link()
+        result = adaptive_equalize(received, params.channel_matrix, noise_var, 'cma', symbols,
+                                   adaptive_num_taps(params.channel_taps.shape[0]))
+        errors, compared = count_bit_errors(tx_bits[80000:], demodulate(result.symbols[:, 40000:]), params.num_tx_streams)
+        self.assertLess(errors / compared, 1e-3)
+
+    ## @brief Testira adaptivni ekvalizator u simulaciji.
+    ## @details Rezultat simulacije mora sadržavati MSE po bloku, a bez adaptivnog ekvalizatora prazan niz.
+    def test_simulacija_sa_adaptivnim(self):
+        """
+        @brief Testira adaptivni ekvalizator u simulaciji.
+        @details Rezultat simulacije mora sadržavati MSE po bloku, a bez adaptivnog ekvalizatora prazan niz.
+        """
+        print("\nTest: Simulacija sa adaptivnim ekvalizatorom")
+        params = SimulationParameters(num_bits=1000, snr_db=20, equalizer='lms')
+        params.validate()
+        result = run_simulation(params)
+        self.assertGreater(len(result.equalizer_mse), 0)
+        self.assertLess(result.ber, 0.01)
+        self.assertEqual(len(run_simulation(SimulationParameters(equalizer='mmse')).equalizer_mse), 0)
+
+    ## @brief Testira prelazak na odlučivanje za okvire veličine GUI-ja.
+    ## @details Za 500 simbola trening traje četvrtinu okvira; nakon njega LMS ne koristi poznate simbole, a CMA prelazi na LMS.
+    def test_prelazak_na_odlucivanje(self):
+        """
+        @brief Testira prelazak na odlučivanje za okvire veličine GUI-ja.
+        @details Za 500 simbola trening traje četvrtinu okvira; nakon njega LMS ne koristi poznate simbole, a CMA prelazi na LMS.
+        """
+        print("\nTest: Prelazak na odlučivanje za okvire veličine GUI-ja")
+        params, symbols, _, received, noise_var = self._dispersive_link(snr_db=20.0, num_bits=1000)
+        H = params.channel_matrix
+        training = int(MAX_TRAINING_FRACTION * len(symbols))
+        lms = adaptive_equalize(received, H, noise_var, 'lms', symbols)
+        self.assertEqual(lms.training_symbols, training)
+        # Simboli nakon treninga ne utiču na izlaz: ekvalizator odlučuje sam
+        scrambled = symbols.copy()
+        scrambled[training:] = scrambled[training:][::-1]
+        decided = adaptive_equalize(received, H, noise_var, 'lms', scrambled)
+        np.testing.assert_array_equal(decided.symbols, lms.symbols)
+        np.testing.assert_array_equal(decided.mse, lms.mse)
+        cma = adaptive_equalize(received, H, noise_var, 'cma', symbols)
+        blind = adaptive_equalize(received, H, noise_var, 'cma', symbols, training_symbols=10**6)
+        print(f"  Trening: {training} od {len(symbols)} simbola")
+        self.assertEqual(cma.training_symbols, training)
+        self.assertFalse(np.array_equal(cma.mse, blind.mse))
+        np.testing.assert_array_equal(cma.mse[:training // MIN_ADAPTIVE_TAPS], blind.mse[:training // MIN_ADAPTIVE_TAPS])
+
+if __name__ == '__main__':
+    unittest.main()
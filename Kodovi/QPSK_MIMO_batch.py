@@ -0,0 +1,247 @@
+"""Command-line batch runner for parameter grids.
+
+A grid file (JSON or TOML) has a "base" table of SimulationParameters values
+shared by all jobs and a "grid" table whose lists are expanded into their
+Cartesian product, one job per combination:
+
+    {"base": {"equalizer": "mmse", "num_bits": 1000},
+     "grid": {"snr_db": {"start": 0, "stop": 20, "num": 5},
+              "num_modes": [1, 2], "channel_model": ["fiber", "rayleigh"]}}
+
+A {"start", "stop", "num"} table stands for np.linspace. Every job runs
+through run_simulation_cached, the same call the GUI makes, so batch and GUI
+numbers match. Jobs are spread over a process pool. Each finished job is
+appended to two tidy CSV tables: one summary row per job, and one row per
+job and SNR point for the curves. Rows are keyed by a hash of the job
+parameters, so an interrupted run picks up where it stopped.
+
+    python QPSK_MIMO_batch.py grid.json -o rezultati.csv -j 8
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from QPSK_MIMO_engine import SimulationParameters, parse_channel_matrix
+from QPSK_MIMO_cache import ResultCache, run_simulation_cached
+
+SUMMARY_COLUMNS = ('ber', 'post_fec_ber', 'capacity', 'seconds', 'error')
+CURVE_COLUMNS = ('job_id', 'snr_db', 'ber', 'post_fec_ber', 'capacity', 'water_filling_capacity')
+CURVES_SUFFIX = '_krive'
+
+
+def load_grid(path: str) -> Dict:
+    """Read a grid description from a .json or .toml file."""
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("TOML datoteke zahtijevaju Python 3.11 ili noviji (tomllib).")
+        with open(path, 'rb') as grid_file:
+            return tomllib.load(grid_file)
+    with open(path, encoding='utf-8') as grid_file:
+        return json.load(grid_file)
+
+
+def _axis_values(name: str, values) -> List:
+    if isinstance(values, dict):
+        if set(values) != {'start', 'stop', 'num'}:
+            raise ValueError(f"Raspon '{name}' mora imati ključeve start, stop i num.")
+        return [float(value) for value in np.linspace(values['start'], values['stop'], int(values['num']))]
+    if not isinstance(values, list) or not values:
+        raise ValueError(f"Vrijednosti parametra '{name}' moraju biti neprazna lista ili raspon.")
+    return values
+
+
+def expand_grid(grid: Dict) -> List[Dict]:
+    """List of job parameter dictionaries (base values updated by one grid combination each)."""
+    unknown = set(grid) - {'base', 'grid'}
+    if unknown:
+        raise ValueError(f"Nepoznati ključevi u opisu mreže: {', '.join(sorted(unknown))}")
+    base = dict(grid.get('base', {}))
+    axes = {name: _axis_values(name, values) for name, values in grid.get('grid', {}).items()}
+    fields = set(SimulationParameters.__dataclass_fields__)
+    unknown = (set(base) | set(axes)) - fields
+    if unknown:
+        raise ValueError(f"Nepoznati parametri simulacije: {', '.join(sorted(unknown))}")
+    jobs = []
+    for combination in itertools.product(*axes.values()):
+        job = dict(base)
+        job.update(zip(axes, combination))
+        jobs.append(job)
+    return jobs
+
+
+def job_id(job: Dict) -> str:
+    """Stable short hash of the job parameters (independent of the grid order)."""
+    return hashlib.sha1(json.dumps(job, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def job_parameters(job: Dict) -> SimulationParameters:
+    """SimulationParameters for a job; channel_matrix may be a list or a matrix literal.
+
+    Numeric and text parameters must have the type of their default, so a
+    mistyped grid cell (e.g. "500" for num_bits) is a ValueError of that job.
+    """
+    values = dict(job)
+    for name, value in values.items():
+        default = SimulationParameters.__dataclass_fields__[name].default
+        if isinstance(default, (int, float)) and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f"Parametar '{name}' mora biti broj, a ne {value!r}.")
+        if isinstance(default, str) and not isinstance(value, str):
+            raise ValueError(f"Parametar '{name}' mora biti tekst, a ne {value!r}.")
+    if isinstance(values.get('channel_matrix'), str):
+        values['channel_matrix'] = parse_channel_matrix(values['channel_matrix'])
+    elif values.get('channel_matrix') is not None:
+        values['channel_matrix'] = np.asarray(values['channel_matrix'])
+    if 'snr_range' in values:
+        values['snr_range'] = tuple(values['snr_range'])
+    return SimulationParameters(**values)
+
+
+def run_job(job: Dict, cache_dir: Optional[str] = None) -> Tuple[Dict, List[Dict]]:
+    """Run one job, returning its summary values and curve rows.
+
+    Invalid parameters (of a wrong value or type) do not abort the batch; the
+    message goes to the error column of the summary row.
+    """
+    identifier = job_id(job)
+    start = time.perf_counter()
+    try:
+        params = job_parameters(job)
+        params.validate()
+        result = run_simulation_cached(params, None if cache_dir is None else ResultCache(cache_dir))
+    except (TypeError, ValueError) as e:
+        return {'ber': np.nan, 'post_fec_ber': np.nan, 'capacity': np.nan,
+                'seconds': time.perf_counter() - start, 'error': str(e)}, []
+    summary = {'ber': result.ber, 'post_fec_ber': result.post_fec_ber, 'capacity': result.capacity,
+               'seconds': time.perf_counter() - start, 'error': ''}
+    post_fec = result.post_fec_ber_values or [np.nan] * len(result.snr_db_range)
+    curves = [{'job_id': identifier, 'snr_db': snr_db, 'ber': ber, 'post_fec_ber': post_fec_ber, 'capacity': capacity,
+               'water_filling_capacity': water_filling}
+              for snr_db, ber, post_fec_ber, capacity, water_filling in
+              zip(result.snr_db_range, result.ber_values, post_fec, result.capacity_values,
+                  result.water_filling_capacity_values)]
+    return summary, curves
+
+
+def _run_job_entry(arguments: Tuple[Dict, Optional[str]]) -> Tuple[Dict, List[Dict]]:
+    return run_job(*arguments)
+
+
+def curves_path(output: str) -> str:
+    root, extension = os.path.splitext(output)
+    return root + CURVES_SUFFIX + (extension or '.csv')
+
+
+def _completed_rows(path: str, columns: List[str]) -> List[Dict]:
+    """Complete rows of an earlier run; a torn last line (interrupted write) is dropped."""
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='', encoding='utf-8') as table:
+        reader = csv.DictReader(table)
+        if reader.fieldnames != columns:
+            raise ValueError(f"Datoteka {path} ima druge stupce; izaberite drugu izlaznu datoteku.")
+        return [row for row in reader if None not in row.values() and None not in row]
+
+
+def _open_table(path: str, columns: List[str], rows: List[Dict]):
+    """Rewrite the table with only the complete rows and return a writer for appending."""
+    table = open(path, 'w', newline='', encoding='utf-8')
+    writer = csv.DictWriter(table, fieldnames=columns)
+    writer.writeheader()
+    writer.writerows(rows)
+    table.flush()
+    return table, writer
+
+
+def run_batch(jobs: List[Dict], output: str, num_workers: Optional[int] = None, cache_dir: Optional[str] = None,
+              progress=None) -> int:
+    """Run every job that is not yet in the output tables; returns the number of jobs run.
+
+    progress, when given, is called as progress(done, total, job, summary)
+    after each job.
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    parameter_columns = list(dict.fromkeys(name for job in jobs for name in job))
+    columns = ['job_id'] + parameter_columns + list(SUMMARY_COLUMNS)
+    summary_rows = _completed_rows(output, columns)
+    done = {row['job_id'] for row in summary_rows}
+    # Krive bez pripadajućeg sažetka potiču od prekinutog upisa i računaju se ponovo
+    curve_rows = [row for row in _completed_rows(curves_path(output), list(CURVE_COLUMNS)) if row['job_id'] in done]
+    pending = [job for job in jobs if job_id(job) not in done]
+    pending = list({job_id(job): job for job in pending}.values())
+
+    summary_table, summary_writer = _open_table(output, columns, summary_rows)
+    curve_table, curve_writer = _open_table(curves_path(output), list(CURVE_COLUMNS), curve_rows)
+
+    def record(job, summary, curves, finished):
+        curve_writer.writerows(curves)
+        curve_table.flush()
+        summary_writer.writerow({'job_id': job_id(job), **{name: job.get(name, '') for name in parameter_columns},
+                                 **summary})
+        summary_table.flush()
+        if progress is not None:
+            progress(finished, len(pending), job, summary)
+
+    try:
+        if num_workers <= 1:
+            for finished, job in enumerate(pending, 1):
+                record(job, *run_job(job, cache_dir), finished)
+        else:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                futures = {executor.submit(_run_job_entry, (job, cache_dir)): job for job in pending}
+                for finished, future in enumerate(as_completed(futures), 1):
+                    record(futures[future], *future.result(), finished)
+    finally:
+        summary_table.close()
+        curve_table.close()
+    return len(pending)
+
+
+def _print_progress(finished: int, total: int, job: Dict, summary: Dict):
+    status = summary['error'] or f"BER={summary['ber']:.4g}, C={summary['capacity']:.3f} bps/Hz"
+    print(f"[{finished}/{total}] {job_id(job)} {status} ({summary['seconds']:.2f} s)", flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Paketno pokretanje QPSK MIMO simulacija nad mrežom parametara.")
+    parser.add_argument('grid', help="opis mreže parametara (.json ili .toml)")
+    parser.add_argument('-o', '--output', default='rezultati.csv', help="CSV tabela sažetaka (krive idu u *_krive.csv)")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="broj procesa (zadano: broj jezgara)")
+    parser.add_argument('--cache-dir', default=None, help="direktorij keša rezultata (zadano: ~/.cache/qpsk_mimo)")
+    parser.add_argument('--no-cache', action='store_true', help="ne koristi keš rezultata")
+    parser.add_argument('--dry-run', action='store_true', help="samo ispiši poslove")
+    args = parser.parse_args(argv)
+    try:
+        jobs = expand_grid(load_grid(args.grid))
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Greška: {e}", file=sys.stderr)
+        return 2
+    if args.dry_run:
+        for job in jobs:
+            print(job_id(job), json.dumps(job, default=str))
+        return 0
+    cache_dir = None
+    if not args.no_cache:
+        cache_dir = ResultCache(args.cache_dir).directory
+    start = time.perf_counter()
+    try:
+        count = run_batch(jobs, args.output, args.jobs, cache_dir, _print_progress)
+    except (TypeError, ValueError) as e:
+        print(f"Greška: {e}", file=sys.stderr)
+        return 2
+    print(f"Izračunato {count} od {len(jobs)} poslova za {time.perf_counter() - start:.1f} s -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
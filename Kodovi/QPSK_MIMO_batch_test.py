@@ -0,0 +1,107 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from QPSK_MIMO_batch import expand_grid, load_grid, job_id, job_parameters, run_batch, curves_path, main
+from QPSK_MIMO_engine import SimulationParameters, run_simulation
+
+class TestQPSK_MIMO_batch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, 'rezultati.csv')
+        self.grid = {'base': {'equalizer': 'mmse', 'num_bits': 400},
+                     'grid': {'snr_db': {'start': 0, 'stop': 10, 'num': 3}, 'num_modes': [1, 2],
+                              'channel_model': ['fiber', 'rayleigh']}}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _rows(self, path):
+        with open(path, newline='', encoding='utf-8') as table:
+            return list(csv.DictReader(table))
+
+    ## @brief Testira razvijanje mreže parametara u poslove.
+    ## @details Mreža daje Kartezijev proizvod lista (raspon kao linspace), a nepoznati parametri se odbijaju.
+    def test_razvijanje_mreze(self):
+        """
+        @brief Testira razvijanje mreže parametara u poslove.
+        @details Mreža daje Kartezijev proizvod lista (raspon kao linspace), a nepoznati parametri se odbijaju.
+        """
+        print("\nTest: Razvijanje mreže parametara")
+        jobs = expand_grid(self.grid)
+        self.assertEqual(len(jobs), 12)
+        self.assertEqual(sorted({job['snr_db'] for job in jobs}), [0.0, 5.0, 10.0])
+        self.assertTrue(all(job['equalizer'] == 'mmse' for job in jobs))
+        self.assertEqual(len({job_id(job) for job in jobs}), 12)
+        self.assertEqual(job_id({'a': 1, 'b': 2}), job_id({'b': 2, 'a': 1}))
+        params = job_parameters({'channel_matrix': '[[1, 0.5j], [0.5, 1]]', 'snr_range': [0, 10]})
+        self.assertEqual(params.channel_matrix[0, 1], 0.5j)
+        self.assertEqual(params.snr_range, (0, 10))
+        with self.assertRaises(ValueError):
+            expand_grid({'grid': {'broj_bita': [100]}})
+        with self.assertRaises(ValueError):
+            expand_grid({'grid': {'snr_db': []}})
+        path = os.path.join(self.directory, 'mreza.toml')
+        with open(path, 'w', encoding='utf-8') as grid_file:
+            grid_file.write('[base]\nequalizer = "zf"\n\n[grid]\nnum_modes = [1, 2, 3]\n')
+        self.assertEqual([job['num_modes'] for job in expand_grid(load_grid(path))], [1, 2, 3])
+
+    ## @brief Testira paketno pokretanje na više procesa.
+    ## @details Rezultati moraju biti jednaki rezultatima run_simulation (kao u GUI-ju), a neispravni poslovi daju red sa greškom.
+    def test_paketno_pokretanje(self):
+        """
+        @brief Testira paketno pokretanje na više procesa.
+        @details Rezultati moraju biti jednaki rezultatima run_simulation (kao u GUI-ju), a neispravni poslovi daju red sa greškom.
+        """
+        print("\nTest: Paketno pokretanje na više procesa")
+        bad_types = expand_grid({'grid': {'num_bits': [400, "500"], 'equalizer': ['mmse', 1]}})[1:]
+        jobs = expand_grid(self.grid) + [{'num_bits': 50}] + bad_types
+        self.assertEqual(run_batch(jobs, self.output, num_workers=2), 16)
+        rows = {row['job_id']: row for row in self._rows(self.output)}
+        self.assertEqual(len(rows), 16)
+        for job in bad_types:
+            self.assertIn('Parametar', rows[job_id(job)]['error'])
+            self.assertEqual(rows[job_id(job)]['ber'], 'nan')
+        jobs = jobs[:13]
+        for job in jobs[:-1]:
+            expected = run_simulation(job_parameters(job))
+            self.assertAlmostEqual(float(rows[job_id(job)]['ber']), expected.ber)
+            self.assertAlmostEqual(float(rows[job_id(job)]['capacity']), expected.capacity)
+        self.assertIn('Broj bita', rows[job_id(jobs[-1])]['error'])
+        curves = self._rows(curves_path(self.output))
+        self.assertEqual(len(curves), 12 * SimulationParameters().snr_points)
+
+    ## @brief Testira nastavak prekinutog pokretanja.
+    ## @details Ponovno pokretanje ne računa gotove poslove; prekinut posljednji red i izgubljeni redovi se računaju ponovo.
+    def test_nastavak(self):
+        """
+        @brief Testira nastavak prekinutog pokretanja.
+        @details Ponovno pokretanje ne računa gotove poslove; prekinut posljednji red i izgubljeni redovi se računaju ponovo.
+        """
+        print("\nTest: Nastavak prekinutog pokretanja")
+        jobs = expand_grid(self.grid)
+        grid_path = os.path.join(self.directory, 'mreza.json')
+        with open(grid_path, 'w', encoding='utf-8') as grid_file:
+            json.dump(self.grid, grid_file)
+        self.assertEqual(main([grid_path, '-o', self.output, '-j', '1', '--no-cache']), 0)
+        self.assertEqual(run_batch(jobs, self.output, num_workers=1), 0)
+        original = self._rows(self.output)
+        # Simulacija prekida: izgubljena dva reda i napola upisan treći
+        with open(self.output, encoding='utf-8') as table:
+            lines = table.readlines()
+        with open(self.output, 'w', encoding='utf-8') as table:
+            table.writelines(lines[:-3])
+            table.write(lines[-3][:10])
+        self.assertEqual(run_batch(jobs, self.output, num_workers=1), 3)
+        resumed = self._rows(self.output)
+        self.assertEqual(sorted(row['job_id'] for row in resumed), sorted(row['job_id'] for row in original))
+        self.assertEqual(len(self._rows(curves_path(self.output))), len(jobs) * SimulationParameters().snr_points)
+        np.testing.assert_allclose(sorted(float(row['ber']) for row in resumed),
+                                   sorted(float(row['ber']) for row in original))
+
+if __name__ == '__main__':
+    unittest.main()
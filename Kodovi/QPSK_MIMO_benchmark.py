@@ -0,0 +1,313 @@
+"""Micro- and macro-benchmarks of the simulation stages with regression checks.
+
+Every benchmark case prepares its inputs once and times one stage call.
+timeit's autorange picks the number of loops per measurement, and the best of
+REPEATS measurements is kept. Throughput is items per second: symbols (over
+all spatial streams) for the signal processing stages, SNR points for the
+capacity curves and complete runs for run_simulation, the computation behind
+the GUI's "Simuliraj". The peak memory of one extra call is measured
+separately under tracemalloc, which slows the code it traces.
+
+Results are compared with a baseline JSON file recorded on the same machine.
+A case regresses when its throughput falls, or its peak memory grows, by
+more than the tolerance. Nothing here needs a display:
+
+    python QPSK_MIMO_benchmark.py --save-baseline osnova.json
+    python QPSK_MIMO_benchmark.py --baseline osnova.json --tolerance 0.25
+
+--startup adds the start-up time of the GUI, measured in a fresh interpreter
+(cold module cache) per repeat: 'startup/import' times import QPSK_MIMO and,
+when a display is available, 'startup/first_paint' times creating the window
+until it has been drawn with the figure of the first tab.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+import tracemalloc
+import numpy as np
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from QPSK_MIMO_engine import (SimulationParameters, run_simulation, generate_bits, qpsk_modulate, generate_noise,
+                              demodulate, calculate_capacity, noise_variance)
+from QPSK_MIMO_capacity import capacity_curves, random_channel_ensemble
+from QPSK_MIMO_equalizer import equalize
+
+REPEATS = 5
+DEFAULT_TOLERANCE = 0.2
+BENCHMARK_SEED = 7
+BIT_SIZES = (10**3, 10**5, 10**6)
+STREAM_SIZES = (2, 16, 64)
+SNR_POINT_SIZES = (10, 100)
+SIGNAL_STREAMS = 4             # prostorni tokovi za testove po broju bita
+STREAM_BENCHMARK_BITS = 10**5  # broj bita za testove po broju tokova
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import QPSK_MIMO
+timings = {'import': time.perf_counter() - start}
+try:
+    import tkinter as tk
+    root = tk.Tk()
+except tk.TclError:
+    pass  # nema ekrana: mjeri se samo uvoz
+else:
+    QPSK_MIMO.QPSK_MIMO_GUI(root)
+    root.update()
+    timings['first_paint'] = time.perf_counter() - start
+    root.destroy()
+print(json.dumps(timings))
+"""
+
+
+@dataclass
+class BenchmarkCase:
+    """One stage at one size; setup() prepares the inputs and returns the timed call."""
+    name: str
+    stage: str
+    unit: str
+    items: int
+    setup: Callable[[], Callable[[], object]]
+
+
+@dataclass
+class BenchmarkResult:
+    """Best time per call, throughput and peak traced memory of a case."""
+    name: str
+    stage: str
+    unit: str
+    items: int
+    seconds: float
+    throughput: float
+    peak_bytes: int
+
+
+@dataclass
+class Regression:
+    """A metric of a case that is worse than the baseline beyond the tolerance."""
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """Relative change of the metric against the baseline."""
+        return self.current / self.baseline - 1
+
+
+def _signals(num_bits: int, num_streams: int, rng) -> Tuple[np.ndarray, np.ndarray]:
+    symbols, _ = qpsk_modulate(generate_bits(num_bits, rng))
+    H = random_channel_ensemble(1, num_streams, num_streams, rng=rng)[0]
+    return H @ np.tile(symbols, (num_streams, 1)), H
+
+
+def _modulate_case(num_bits: int) -> Callable[[], object]:
+    bits = generate_bits(num_bits, np.random.RandomState(BENCHMARK_SEED))
+    return lambda: qpsk_modulate(bits)
+
+
+def _noise_case(num_bits: int, num_streams: int) -> Callable[[], object]:
+    rng = np.random.RandomState(BENCHMARK_SEED)
+    signals, _ = _signals(num_bits, num_streams, rng)
+    return lambda: generate_noise(signals, 10.0, rng)
+
+
+def _demodulate_case(num_bits: int, num_streams: int) -> Callable[[], object]:
+    rng = np.random.RandomState(BENCHMARK_SEED)
+    signals, _ = _signals(num_bits, num_streams, rng)
+    received = signals + generate_noise(signals, 10.0, rng)
+    return lambda: demodulate(received)
+
+
+def _equalize_case(num_bits: int, num_streams: int) -> Callable[[], object]:
+    rng = np.random.RandomState(BENCHMARK_SEED)
+    signals, H = _signals(num_bits, num_streams, rng)
+    received = signals + generate_noise(signals, 10.0, rng)
+    noise_var = noise_variance(np.mean(np.abs(signals)**2), 10.0)
+    return lambda: equalize(received, H, noise_var, 'mmse')
+
+
+def _capacity_case(num_streams: int) -> Callable[[], object]:
+    H = random_channel_ensemble(1, num_streams, num_streams, rng=np.random.RandomState(BENCHMARK_SEED))[0]
+    return lambda: calculate_capacity(H, 10.0, num_streams, num_streams, 1)
+
+
+def _capacity_curves_case(snr_points: int) -> Callable[[], object]:
+    H = random_channel_ensemble(1, 8, 8, rng=np.random.RandomState(BENCHMARK_SEED))[0]
+    snr_db_range = np.linspace(0, 20, snr_points)
+    return lambda: capacity_curves(H, snr_db_range)
+
+
+def _simulation_case(num_modes: int, snr_points: int) -> Callable[[], object]:
+    params = SimulationParameters(num_bits=1000, num_modes=num_modes, snr_points=snr_points, equalizer='mmse',
+                                  channel_model='rayleigh')
+    return lambda: run_simulation(params)
+
+
+def benchmark_cases(quick: bool = False) -> List[BenchmarkCase]:
+    """All cases; quick keeps only the smallest size of every stage (for tests and smoke runs)."""
+    bit_sizes = BIT_SIZES[:1] if quick else BIT_SIZES
+    stream_sizes = STREAM_SIZES[:1] if quick else STREAM_SIZES
+    snr_point_sizes = SNR_POINT_SIZES[:1] if quick else SNR_POINT_SIZES
+    stream_bits = bit_sizes[0] if quick else STREAM_BENCHMARK_BITS
+    cases = []
+    for num_bits in bit_sizes:
+        cases.append(BenchmarkCase(f"qpsk_modulate/bits={num_bits}", 'qpsk_modulate', 'simboli/s', num_bits // 2,
+                                   lambda num_bits=num_bits: _modulate_case(num_bits)))
+    for stage, factory in (('generate_noise', _noise_case), ('demodulate', _demodulate_case)):
+        for num_bits in bit_sizes:
+            cases.append(BenchmarkCase(f"{stage}/bits={num_bits},streams={SIGNAL_STREAMS}", stage, 'simboli/s',
+                                       num_bits // 2 * SIGNAL_STREAMS,
+                                       lambda factory=factory, num_bits=num_bits: factory(num_bits, SIGNAL_STREAMS)))
+        for num_streams in stream_sizes[1:]:
+            cases.append(BenchmarkCase(f"{stage}/bits={stream_bits},streams={num_streams}", stage, 'simboli/s',
+                                       stream_bits // 2 * num_streams,
+                                       lambda factory=factory, num_streams=num_streams: factory(stream_bits, num_streams)))
+    for num_streams in stream_sizes:
+        cases.append(BenchmarkCase(f"equalize_mmse/bits={stream_bits},streams={num_streams}", 'equalize_mmse',
+                                   'simboli/s', stream_bits // 2 * num_streams,
+                                   lambda num_streams=num_streams: _equalize_case(stream_bits, num_streams)))
+    for num_streams in stream_sizes:
+        cases.append(BenchmarkCase(f"calculate_capacity/streams={num_streams}", 'calculate_capacity', 'kanali/s', 1,
+                                   lambda num_streams=num_streams: _capacity_case(num_streams)))
+    for snr_points in snr_point_sizes:
+        cases.append(BenchmarkCase(f"capacity_curves/snr_points={snr_points}", 'capacity_curves', 'SNR tačke/s',
+                                   snr_points, lambda snr_points=snr_points: _capacity_curves_case(snr_points)))
+    for num_modes in ((2,) if quick else (2, 8)):
+        for snr_points in snr_point_sizes:
+            cases.append(BenchmarkCase(f"run_simulation/modes={num_modes},snr_points={snr_points}", 'run_simulation',
+                                       'simulacije/s', 1,
+                                       lambda num_modes=num_modes, snr_points=snr_points:
+                                       _simulation_case(num_modes, snr_points)))
+    return cases
+
+
+def run_case(case: BenchmarkCase, repeats: int = REPEATS) -> BenchmarkResult:
+    """Time one case (best of repeats) and measure its peak traced memory."""
+    function = case.setup()
+    timer = timeit.Timer(function)
+    number, first = timer.autorange()
+    times = [first] + timer.repeat(repeat=max(repeats - 1, 0), number=number)
+    seconds = min(times) / number
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start_bytes = tracemalloc.get_traced_memory()[0]
+    function()
+    peak_bytes = tracemalloc.get_traced_memory()[1] - start_bytes
+    if not tracing:
+        tracemalloc.stop()
+    return BenchmarkResult(name=case.name, stage=case.stage, unit=case.unit, items=case.items, seconds=seconds,
+                           throughput=case.items / seconds, peak_bytes=int(peak_bytes))
+
+
+def run_benchmarks(cases: Optional[List[BenchmarkCase]] = None, pattern: Optional[str] = None,
+                   repeats: int = REPEATS, progress=None) -> List[BenchmarkResult]:
+    """Run the cases whose name contains pattern; progress(result) is called after each one."""
+    if cases is None:
+        cases = benchmark_cases()
+    results = []
+    for case in cases:
+        if pattern is not None and pattern not in case.name:
+            continue
+        results.append(run_case(case, repeats))
+        if progress is not None:
+            progress(results[-1])
+    return results
+
+
+def measure_startup(repeats: int = REPEATS) -> List[BenchmarkResult]:
+    """Best start-up times over repeats fresh interpreters ('startup/first_paint' only with a display)."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    best: Dict[str, float] = {}
+    for _ in range(max(repeats, 1)):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=directory, capture_output=True,
+                                text=True, check=True).stdout
+        for name, seconds in json.loads(output.splitlines()[-1]).items():
+            best[name] = min(seconds, best.get(name, seconds))
+    return [BenchmarkResult(name=f'startup/{name}', stage='startup', unit='pokretanja/s', items=1, seconds=seconds,
+                            throughput=1 / seconds, peak_bytes=0) for name, seconds in best.items()]
+
+
+def machine_info() -> Dict[str, str]:
+    return {'platform': platform.platform(), 'processor': platform.processor(), 'python': platform.python_version(),
+            'numpy': np.__version__}
+
+
+def save_baseline(path: str, results: List[BenchmarkResult]):
+    """Store the results (with a description of the machine) as a baseline JSON file."""
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump({'machine': machine_info(), 'results': {result.name: asdict(result) for result in results}},
+                  baseline_file, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Dict]:
+    """Results of a baseline file, keyed by case name."""
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)['results']
+
+
+def compare_with_baseline(results: List[BenchmarkResult], baseline: Dict[str, Dict],
+                          tolerance: float = DEFAULT_TOLERANCE,
+                          memory_tolerance: Optional[float] = None) -> List[Regression]:
+    """Regressions of the results against the baseline; cases missing from the baseline are skipped."""
+    if memory_tolerance is None:
+        memory_tolerance = tolerance
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is None:
+            continue
+        if result.throughput < reference['throughput'] * (1 - tolerance):
+            regressions.append(Regression(result.name, 'throughput', reference['throughput'], result.throughput))
+        if reference['peak_bytes'] > 0 and result.peak_bytes > reference['peak_bytes'] * (1 + memory_tolerance):
+            regressions.append(Regression(result.name, 'peak_bytes', reference['peak_bytes'], result.peak_bytes))
+    return regressions
+
+
+def _print_result(result: BenchmarkResult):
+    print(f"{result.name:<48} {result.throughput:>12.4g} {result.unit:<13} {result.seconds * 1e3:>10.3f} ms "
+          f"{result.peak_bytes / 2**20:>9.2f} MiB", flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mjerenje brzine i memorije faza QPSK MIMO simulacije.")
+    parser.add_argument('--baseline', help="JSON osnova za poređenje; pad performansi vraća izlazni kod 1")
+    parser.add_argument('--save-baseline', help="spremi rezultate kao novu osnovu")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="dozvoljeni relativni pad propusnosti (zadano 0.2)")
+    parser.add_argument('--memory-tolerance', type=float, default=None,
+                        help="dozvoljeni relativni rast vršne memorije (zadano kao --tolerance)")
+    parser.add_argument('--filter', default=None, help="pokreni samo testove čije ime sadrži ovaj tekst")
+    parser.add_argument('--quick', action='store_true', help="samo najmanje veličine")
+    parser.add_argument('--repeats', type=int, default=REPEATS, help="broj ponavljanja mjerenja")
+    parser.add_argument('--startup', action='store_true', help="izmjeri i vrijeme pokretanja GUI-ja")
+    args = parser.parse_args(argv)
+    results = run_benchmarks(benchmark_cases(args.quick), args.filter, args.repeats, _print_result)
+    if args.startup:
+        for result in measure_startup(args.repeats):
+            _print_result(result)
+            results.append(result)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f"Osnova spremljena u {args.save_baseline}")
+    if args.baseline:
+        regressions = compare_with_baseline(results, load_baseline(args.baseline), args.tolerance,
+                                            args.memory_tolerance)
+        for regression in regressions:
+            print(f"REGRESIJA {regression.name} {regression.metric}: {regression.baseline:.4g} -> "
+                  f"{regression.current:.4g} ({regression.change:+.1%})")
+        if regressions:
+            return 1
+        print(f"Nema regresija u odnosu na {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from QPSK_MIMO_benchmark import (benchmark_cases, run_benchmarks, save_baseline, load_baseline, compare_with_baseline,
+                                 measure_startup, BenchmarkResult, main)
+
+class TestQPSK_MIMO_benchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _result(self, name, throughput, peak_bytes):
+        return BenchmarkResult(name=name, stage=name.split('/')[0], unit='simboli/s', items=1000,
+                               seconds=1000 / throughput, throughput=throughput, peak_bytes=peak_bytes)
+
+    ## @brief Testira mjerenje faza simulacije.
+    ## @details Svaka faza ima test za svaku veličinu, a mjerenje daje pozitivnu propusnost i vršnu memoriju.
+    def test_mjerenje(self):
+        """
+        @brief Testira mjerenje faza simulacije.
+        @details Svaka faza ima test za svaku veličinu, a mjerenje daje pozitivnu propusnost i vršnu memoriju.
+        """
+        print("\nTest: Mjerenje faza simulacije")
+        cases = benchmark_cases()
+        stages = {case.stage for case in cases}
+        self.assertEqual(stages, {'qpsk_modulate', 'generate_noise', 'demodulate', 'equalize_mmse',
+                                  'calculate_capacity', 'capacity_curves', 'run_simulation'})
+        self.assertEqual(len({case.name for case in cases}), len(cases))
+        quick = benchmark_cases(quick=True)
+        self.assertEqual({case.stage for case in quick}, stages)
+        results = run_benchmarks(quick, pattern='bits=1000,', repeats=1)
+        self.assertEqual([result.stage for result in results], ['generate_noise', 'demodulate', 'equalize_mmse'])
+        for result in results:
+            print(f"  {result.name}: {result.throughput:.3g} {result.unit}, {result.peak_bytes} B")
+            self.assertGreater(result.throughput, 0)
+            self.assertAlmostEqual(result.throughput * result.seconds, result.items)
+            self.assertGreater(result.peak_bytes, 0)
+
+    ## @brief Testira poređenje sa osnovom.
+    ## @details Pad propusnosti ili rast memorije iznad tolerancije je regresija; manje promjene i novi testovi nisu.
+    def test_poredjenje_sa_osnovom(self):
+        """
+        @brief Testira poređenje sa osnovom.
+        @details Pad propusnosti ili rast memorije iznad tolerancije je regresija; manje promjene i novi testovi nisu.
+        """
+        print("\nTest: Poređenje sa osnovom")
+        path = os.path.join(self.directory, 'osnova.json')
+        save_baseline(path, [self._result('demodulate/a', 1e6, 1000), self._result('demodulate/b', 1e6, 1000)])
+        baseline = load_baseline(path)
+        current = [self._result('demodulate/a', 0.85e6, 1100), self._result('demodulate/b', 0.5e6, 2000),
+                   self._result('demodulate/novi', 1.0, 10**9)]
+        self.assertEqual(compare_with_baseline(current[:1], baseline, tolerance=0.2), [])
+        regressions = compare_with_baseline(current, baseline, tolerance=0.2)
+        self.assertEqual([(regression.name, regression.metric) for regression in regressions],
+                         [('demodulate/b', 'throughput'), ('demodulate/b', 'peak_bytes')])
+        self.assertAlmostEqual(regressions[0].change, -0.5)
+        self.assertEqual(len(compare_with_baseline(current, baseline, tolerance=0.6, memory_tolerance=0.5)), 1)
+
+    ## @brief Testira komandnu liniju benchmarka.
+    ## @details Izlazni kod je 0 bez regresija i 1 kad je osnova nedostižno brža.
+    def test_komandna_linija(self):
+        """
+        @brief Testira komandnu liniju benchmarka.
+        @details Izlazni kod je 0 bez regresija i 1 kad je osnova nedostižno brža.
+        """
+        print("\nTest: Komandna linija benchmarka")
+        path = os.path.join(self.directory, 'osnova.json')
+        arguments = ['--quick', '--filter', 'calculate_capacity', '--repeats', '1']
+        self.assertEqual(main(arguments + ['--save-baseline', path]), 0)
+        self.assertEqual(main(arguments + ['--baseline', path, '--tolerance', '0.9', '--memory-tolerance', '1e6']), 0)
+        baseline = load_baseline(path)
+        save_baseline(path, [self._result(name, values['throughput'] * 100, values['peak_bytes'])
+                             for name, values in baseline.items()])
+        self.assertEqual(main(arguments + ['--baseline', path]), 1)
+
+    ## @brief Testira mjerenje pokretanja GUI-ja.
+    ## @details Uvoz GUI modula u svježem interpreteru ne učitava matplotlib ni scipy.signal i traje ispod sekunde.
+    def test_pokretanje(self):
+        """
+        @brief Testira mjerenje pokretanja GUI-ja.
+        @details Uvoz GUI modula u svježem interpreteru ne učitava matplotlib ni scipy.signal i traje ispod sekunde.
+        """
+        print("\nTest: Mjerenje pokretanja GUI-ja")
+        results = {result.name: result for result in measure_startup(repeats=2)}
+        for result in results.values():
+            print(f"  {result.name}: {result.seconds * 1e3:.0f} ms")
+        self.assertLess(results['startup/import'].seconds, 1.0)
+        self.assertEqual(results['startup/import'].stage, 'startup')
+        loaded = subprocess.run([sys.executable, '-c', "import sys, QPSK_MIMO; "
+                                 "print(' '.join(m for m in ('matplotlib', 'scipy.signal') if m in sys.modules))"],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+                                check=True).stdout
+        self.assertEqual(loaded.strip(), '')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+"""Persistent, content-addressed cache of simulation results.
+
+run_simulation is deterministic for given parameters (the seed is one of
+them), so its result can be stored on disk and returned again without
+recomputation. An entry is keyed by a SHA-256 hash of all parameter values,
+the bytes of the channel matrix and taps, and a code version derived from the
+source of the simulation modules, so changing the code invalidates old entries
+automatically. Entries are compressed .npz files; when the cache grows past
+max_bytes the least recently used entries (by file modification time, which
+is refreshed on every hit) are deleted.
+"""
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+from typing import Optional
+
+import QPSK_MIMO_adaptive
+import QPSK_MIMO_capacity
+import QPSK_MIMO_channel
+import QPSK_MIMO_detector
+import QPSK_MIMO_engine
+import QPSK_MIMO_equalizer
+import QPSK_MIMO_ldpc
+from QPSK_MIMO_engine import SimulationParameters, SimulationResult, ProgressCallback, run_simulation
+from QPSK_MIMO_equalizer import channel_fingerprint
+from QPSK_MIMO_profile import NULL_PROFILER
+
+CACHE_DIR_VARIABLE = 'QPSK_MIMO_CACHE_DIR'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'qpsk_mimo')
+DEFAULT_MAX_BYTES = 256 * 2**20
+CACHE_EXTENSION = '.npz'
+SIMULATION_MODULES = (QPSK_MIMO_engine, QPSK_MIMO_channel, QPSK_MIMO_equalizer, QPSK_MIMO_adaptive,
+                      QPSK_MIMO_capacity, QPSK_MIMO_detector, QPSK_MIMO_ldpc)
+
+_CODE_VERSION: Optional[str] = None
+
+
+def code_version() -> str:
+    """Hash of the source code of every module that run_simulation depends on."""
+    global _CODE_VERSION
+    if _CODE_VERSION is None:
+        digest = hashlib.sha256()
+        for module in SIMULATION_MODULES:
+            with open(module.__file__, 'rb') as source:
+                digest.update(source.read())
+        _CODE_VERSION = digest.hexdigest()[:16]
+    return _CODE_VERSION
+
+
+def parameters_key(params: SimulationParameters, version: Optional[str] = None) -> str:
+    """Content hash of the parameters (including H, taps and seed) and the code version."""
+    values = {}
+    for parameter in dataclasses.fields(params):
+        value = getattr(params, parameter.name)
+        if isinstance(value, np.ndarray):
+            value = channel_fingerprint(value)
+        elif isinstance(value, tuple):
+            value = list(value)
+        values[parameter.name] = value
+    values['code_version'] = code_version() if version is None else version
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultCache:
+    """On-disk LRU cache of SimulationResult objects keyed by parameters_key."""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 version: Optional[str] = None):
+        if directory is None:
+            directory = os.environ.get(CACHE_DIR_VARIABLE, DEFAULT_CACHE_DIR)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, params: SimulationParameters) -> str:
+        return os.path.join(self.directory, parameters_key(params, self.version) + CACHE_EXTENSION)
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(CACHE_EXTENSION):
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+        return sorted(entries)
+
+    def get(self, params: SimulationParameters) -> Optional[SimulationResult]:
+        """Cached result for params, or None on a miss (also for an unreadable entry)."""
+        path = self._path(params)
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                result = _result_from_archive(archive)
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)  # osvježava poziciju u LRU redoslijedu
+        self.hits += 1
+        return result
+
+    def put(self, params: SimulationParameters, result: SimulationResult):
+        """Store result for params, then evict least recently used entries above max_bytes."""
+        path = self._path(params)
+        arrays, kinds = _result_to_arrays(result)
+        # Atomski upis: privremena datoteka pa preimenovanje
+        descriptor, temporary = tempfile.mkstemp(suffix=CACHE_EXTENSION, dir=self.directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as output:
+                np.savez_compressed(output, __kinds__=json.dumps(kinds), **arrays)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits into max_bytes."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def invalidate(self, params: SimulationParameters) -> bool:
+        """Remove the entry for params; returns whether it existed."""
+        try:
+            os.remove(self._path(params))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def clear(self):
+        """Remove every entry and reset the statistics."""
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def __contains__(self, params: SimulationParameters) -> bool:
+        return os.path.exists(self._path(params))
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+
+def _result_to_arrays(result: SimulationResult):
+    arrays, kinds = {}, {}
+    for result_field in dataclasses.fields(result):
+        value = getattr(result, result_field.name)
+        kinds[result_field.name] = 'list' if isinstance(value, list) else 'array' if isinstance(value, np.ndarray) else 'scalar'
+        arrays[result_field.name] = np.asarray(value)
+    return arrays, kinds
+
+
+def _result_from_archive(archive) -> SimulationResult:
+    kinds = json.loads(str(archive['__kinds__']))
+    values = {}
+    for name, kind in kinds.items():
+        value = archive[name]
+        values[name] = value.tolist() if kind == 'list' else value.item() if kind == 'scalar' else value
+    return SimulationResult(**values)
+
+
+def run_simulation_cached(params: SimulationParameters, cache: Optional[ResultCache] = None,
+                          profiler=NULL_PROFILER, progress: Optional[ProgressCallback] = None) -> SimulationResult:
+    """run_simulation, answered from the cache when the same parameters ran before.
+
+    progress is passed to run_simulation; a cached result reports no points.
+    """
+    if cache is None:
+        return run_simulation(params, profiler, progress)
+    with profiler.span('keš: čitanje'):
+        result = cache.get(params)
+    if result is None:
+        result = run_simulation(params, profiler, progress)
+        with profiler.span('keš: upis'):
+            cache.put(params, result)
+    return result
@@ -0,0 +1,90 @@
+import dataclasses
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import numpy as np
+from QPSK_MIMO_cache import ResultCache, run_simulation_cached, parameters_key, code_version
+from QPSK_MIMO_engine import SimulationParameters, run_simulation
+
+class TestQPSK_MIMO_cache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    ## @brief Testira ponovno korištenje keširanog rezultata.
+    ## @details Drugo pokretanje sa istim parametrima mora vratiti identičan rezultat iz keša, bez ponovnog računanja.
+    def test_pogodak_u_kesu(self):
+        """
+        @brief Testira ponovno korištenje keširanog rezultata.
+        @details Drugo pokretanje sa istim parametrima mora vratiti identičan rezultat iz keša, bez ponovnog računanja.
+        """
+        print("\nTest: Pogodak u kešu rezultata")
+        cache = ResultCache(self.directory)
+        params = SimulationParameters(equalizer='mmse', fec='ldpc')
+        start = time.perf_counter()
+        expected = run_simulation_cached(params, cache)
+        computed = time.perf_counter() - start
+        start = time.perf_counter()
+        cached = run_simulation_cached(SimulationParameters(equalizer='mmse', fec='ldpc'), cache)
+        print(f"  Računanje: {computed:.3f} s, keš: {time.perf_counter() - start:.3f} s")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        for result_field in dataclasses.fields(expected):
+            value, cached_value = getattr(expected, result_field.name), getattr(cached, result_field.name)
+            self.assertIs(type(cached_value), type(value), result_field.name)
+            np.testing.assert_array_equal(cached_value, value)
+        # Novi keš nad istim direktorijem (ponovno otvaranje GUI-ja) nalazi isti rezultat
+        self.assertIn(params, ResultCache(self.directory))
+
+    ## @brief Testira ključ keša.
+    ## @details Ključ se mijenja sa svakim parametrom, sa matricom kanala, sjemenom i verzijom koda.
+    def test_kljuc(self):
+        """
+        @brief Testira ključ keša.
+        @details Ključ se mijenja sa svakim parametrom, sa matricom kanala, sjemenom i verzijom koda.
+        """
+        print("\nTest: Ključ keša rezultata")
+        params = SimulationParameters()
+        key = parameters_key(params)
+        self.assertEqual(key, parameters_key(SimulationParameters()))
+        self.assertNotEqual(key, parameters_key(SimulationParameters(seed=1)))
+        self.assertNotEqual(key, parameters_key(SimulationParameters(snr_db=10.5)))
+        self.assertNotEqual(key, parameters_key(SimulationParameters(channel_matrix=np.eye(2) * 0.9)))
+        self.assertNotEqual(key, parameters_key(params, version='stara verzija'))
+        self.assertEqual(len(code_version()), 16)
+        old_version = ResultCache(self.directory, version='stara verzija')
+        run_simulation_cached(params, old_version)
+        self.assertNotIn(params, ResultCache(self.directory))
+
+    ## @brief Testira LRU izbacivanje i poništavanje.
+    ## @details Iznad ograničenja veličine izbacuju se najdavnije korišteni unosi; invalidate i clear brišu unose.
+    def test_izbacivanje(self):
+        """
+        @brief Testira LRU izbacivanje i poništavanje.
+        @details Iznad ograničenja veličine izbacuju se najdavnije korišteni unosi; invalidate i clear brišu unose.
+        """
+        print("\nTest: LRU izbacivanje iz keša")
+        cache = ResultCache(self.directory)
+        params = [SimulationParameters(seed=seed) for seed in range(3)]
+        result = run_simulation(params[0])
+        for index, entry in enumerate(params):
+            cache.put(entry, result)
+            os.utime(os.path.join(self.directory, parameters_key(entry) + '.npz'), (index, index))
+        self.assertEqual(len(cache), 3)
+        self.assertIsNotNone(cache.get(params[0]))  # prvi unos postaje najsvježiji
+        cache.max_bytes = cache.size_bytes * 2 // 3 + 1
+        cache.evict()
+        self.assertEqual([entry in cache for entry in params], [True, False, True])
+        self.assertTrue(cache.invalidate(params[2]))
+        self.assertFalse(cache.invalidate(params[2]))
+        self.assertIsNone(cache.get(params[2]))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""Eigenvalue-based MIMO capacity.
+
+The singular values of H are computed once per channel; the equal-power and
+water-filling capacities for a whole SNR range then follow from vector
+arithmetic on the eigenmode gains. Rectangular channels are handled the same
+way as square ones. Ergodic and outage capacity over random channel
+ensembles use stacked (batch x n x n) linear algebra calls.
+"""
+import numpy as np
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from QPSK_MIMO_channel import haar_unitary
+
+DEFAULT_NUM_REALIZATIONS = 10000
+DEFAULT_OUTAGE_PROBABILITY = 1e-3
+MIN_NUM_REALIZATIONS = 100
+ENSEMBLE_FLOP_BUDGET = 4e8  # približno jedna sekunda SVD-a
+ENSEMBLE_CHUNK_FLOPS = 2e7  # približno 50 ms SVD-a između dva izvještaja o napretku
+
+
+@dataclass
+class CapacityCurves:
+    """Capacity (bps/Hz) of one channel over an SNR range."""
+    snr_db_range: np.ndarray
+    equal_power: np.ndarray
+    water_filling: np.ndarray
+
+
+def eigenmode_gains(H: np.ndarray) -> np.ndarray:
+    """Squared singular values of H (eigenvalues of H H^H), in descending order."""
+    return np.linalg.svd(np.atleast_2d(H), compute_uv=False)**2
+
+
+def equal_power_capacity(gains: np.ndarray, snr_db_range: np.ndarray, num_tx_streams: int) -> np.ndarray:
+    """Capacity with the power split equally over num_tx_streams transmit streams.
+
+    Closed form of log2(det(I + rho/Nt * H H^H)) = sum(log2(1 + rho/Nt * s_i^2)).
+    """
+    snr_linear = 10**(np.asarray(snr_db_range, dtype=float) / 10)
+    return np.sum(np.log2(1 + np.outer(snr_linear / num_tx_streams, gains)), axis=-1)
+
+
+def water_filling_capacity(gains: np.ndarray, snr_db_range: np.ndarray) -> np.ndarray:
+    """Capacity with water-filling power allocation over the eigenmodes (channel known at the transmitter)."""
+    snr_linear = np.atleast_1d(10**(np.asarray(snr_db_range, dtype=float) / 10))
+    gains = np.sort(gains[gains > 0])[::-1]
+    if gains.size == 0:
+        return np.zeros(snr_linear.shape)
+    inverse_gains = 1 / gains
+    active = np.arange(1, gains.size + 1)
+    # Nivo vode za k najjačih modova: mu_k = (rho + sum(1/lambda_i, i<=k)) / k
+    water_levels = (snr_linear[:, np.newaxis] + np.cumsum(inverse_gains)) / active
+    num_active = np.sum(water_levels > inverse_gains, axis=1)
+    water_level = water_levels[np.arange(snr_linear.size), num_active - 1]
+    allocated = np.maximum(water_level[:, np.newaxis] * gains, 1)
+    return np.sum(np.log2(allocated), axis=1)
+
+
+def capacity_curves(H: np.ndarray, snr_db_range: np.ndarray) -> CapacityCurves:
+    """Equal-power and water-filling capacity of H for every SNR point from a single SVD."""
+    gains = eigenmode_gains(H)
+    return CapacityCurves(
+        snr_db_range=np.asarray(snr_db_range),
+        equal_power=equal_power_capacity(gains, snr_db_range, np.atleast_2d(H).shape[1]),
+        water_filling=water_filling_capacity(gains, snr_db_range),
+    )
+
+
+@dataclass
+class EnsembleCapacity:
+    """Capacity statistics over a random channel ensemble at one SNR."""
+    snr_db: float
+    capacities: np.ndarray
+    ergodic: float
+    outage: float
+    outage_probability: float
+
+    def cdf(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (capacity, probability) points of the empirical CDF."""
+        sorted_capacities = np.sort(self.capacities)
+        return sorted_capacities, np.arange(1, sorted_capacities.size + 1) / sorted_capacities.size
+
+
+def ensemble_size(num_rx: int, num_tx: int, max_realizations: int = DEFAULT_NUM_REALIZATIONS,
+                  flop_budget: float = ENSEMBLE_FLOP_BUDGET) -> int:
+    """Number of realizations whose stacked SVD (about min * max^2 flops each) fits the budget.
+
+    Small channels get max_realizations; large (massive MIMO) channels get
+    fewer, but never less than MIN_NUM_REALIZATIONS.
+    """
+    return int(min(max_realizations, max(MIN_NUM_REALIZATIONS, flop_budget // _svd_flops(num_rx, num_tx))))
+
+
+def _svd_flops(num_rx: int, num_tx: int) -> int:
+    return min(num_rx, num_tx) * max(num_rx, num_tx)**2
+
+
+def random_channel_ensemble(num_realizations: int, num_rx: int, num_tx: int, model: str = 'rayleigh',
+                            rng=None) -> np.ndarray:
+    """Draw a (num_realizations x num_rx x num_tx) stack of random channel matrices.
+
+    'rayleigh' gives i.i.d. CN(0, 1) entries; 'unitary' gives Haar-distributed
+    unitary mode coupling (truncated to num_rx x num_tx) as in a lossless
+    strongly coupled fiber.
+    """
+    if rng is None:
+        rng = np.random
+    if model == 'rayleigh':
+        shape = (num_realizations, num_rx, num_tx)
+        return (rng.randn(*shape) + 1j * rng.randn(*shape)) / np.sqrt(2)
+    if model == 'unitary':
+        return haar_unitary(num_realizations, max(num_rx, num_tx), rng)[:, :num_rx, :num_tx]
+    raise ValueError(f"Nepoznat model kanala: {model}")
+
+
+def ensemble_capacities(H_stack: np.ndarray, snr_db_range: np.ndarray, num_tx_streams: Optional[int] = None) -> np.ndarray:
+    """Equal-power capacity of every matrix in the stack, shape (realizations, SNR points).
+
+    The singular values of all matrices come from one stacked SVD call.
+    """
+    if num_tx_streams is None:
+        num_tx_streams = H_stack.shape[-1]
+    gains = np.linalg.svd(H_stack, compute_uv=False)**2
+    snr_linear = 10**(np.atleast_1d(np.asarray(snr_db_range, dtype=float)) / 10)
+    return np.sum(np.log2(1 + gains[:, np.newaxis, :] * (snr_linear / num_tx_streams)[np.newaxis, :, np.newaxis]), axis=-1)
+
+
+def analyze_ensemble(num_rx: int, num_tx: int, snr_db: float, num_realizations: int = DEFAULT_NUM_REALIZATIONS,
+                     model: str = 'rayleigh', outage_probability: float = DEFAULT_OUTAGE_PROBABILITY,
+                     rng=None, H_stack: Optional[np.ndarray] = None,
+                     progress: Optional[Callable[[float], None]] = None) -> EnsembleCapacity:
+    """Ergodic and outage capacity over a random channel ensemble.
+
+    A precomputed H_stack may be passed instead of drawing one from model.
+    The SVDs run in chunks of about ENSEMBLE_CHUNK_FLOPS; progress, if given,
+    is called with the finished fraction after every chunk and may raise to
+    abort the analysis.
+    """
+    if H_stack is None:
+        H_stack = random_channel_ensemble(num_realizations, num_rx, num_tx, model, rng)
+    chunk = max(1, int(ENSEMBLE_CHUNK_FLOPS // _svd_flops(*H_stack.shape[1:])))
+    capacities = np.empty(len(H_stack))
+    for start in range(0, len(H_stack), chunk):
+        capacities[start:start + chunk] = ensemble_capacities(H_stack[start:start + chunk], [snr_db])[:, 0]
+        if progress is not None:
+            progress(min(start + chunk, len(H_stack)) / len(H_stack))
+    return EnsembleCapacity(
+        snr_db=snr_db,
+        capacities=capacities,
+        ergodic=float(np.mean(capacities)),
+        outage=float(np.quantile(capacities, outage_probability)),
+        outage_probability=outage_probability,
+    )
@@ -0,0 +1,103 @@
+import unittest
+import numpy as np
+from numpy.linalg import det
+from scipy.special import exp1
+from QPSK_MIMO_capacity import (eigenmode_gains, equal_power_capacity, water_filling_capacity, capacity_curves,
+                                random_channel_ensemble, ensemble_capacities, analyze_ensemble)
+
+def _det_capacity(H, snr_db):
+    """Reference log2 det(I + rho/Nt H H^H) capacity."""
+    snr_linear = 10**(snr_db / 10)
+    return np.log2(np.real(det(np.eye(H.shape[0]) + (snr_linear / H.shape[1]) * np.dot(H, H.conj().T))))
+
+class TestQPSK_MIMO_capacity(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(11)
+        self.snr_db_range = np.linspace(0, 30, 16)
+        self.channels = [rng.randn(n_rx, n_tx) + 1j * rng.randn(n_rx, n_tx) for n_rx, n_tx in ((4, 4), (3, 5), (5, 3))]
+
+    ## @brief Testira kapacitet sa jednakom raspodjelom snage.
+    ## @details Rezultat iz singularnih vrijednosti mora odgovarati formuli sa determinantom, i za pravougaone matrice.
+    def test_jednaka_snaga_prema_determinanti(self):
+        """
+        @brief Testira kapacitet sa jednakom raspodjelom snage.
+        @details Rezultat iz singularnih vrijednosti mora odgovarati formuli sa determinantom, i za pravougaone matrice.
+        """
+        print("\nTest: Kapacitet sa jednakom snagom prema determinanti")
+        for H in self.channels:
+            capacity = equal_power_capacity(eigenmode_gains(H), self.snr_db_range, H.shape[1])
+            expected = [_det_capacity(H, snr_db) for snr_db in self.snr_db_range]
+            print(f"  H {H.shape}: C(30 dB) = {capacity[-1]:.4f}")
+            np.testing.assert_allclose(capacity, expected, rtol=1e-10)
+
+    ## @brief Testira water-filling kapacitet.
+    ## @details Water-filling nikad nije manji od kapaciteta sa jednakom snagom.
+    def test_water_filling_nije_manji(self):
+        """
+        @brief Testira water-filling kapacitet.
+        @details Water-filling nikad nije manji od kapaciteta sa jednakom snagom.
+        """
+        print("\nTest: Water-filling nije manji od jednake snage")
+        for H in self.channels:
+            curves = capacity_curves(H, self.snr_db_range)
+            print(f"  H {H.shape}: WF(0 dB) = {curves.water_filling[0]:.4f}, EP(0 dB) = {curves.equal_power[0]:.4f}")
+            self.assertTrue(np.all(curves.water_filling >= curves.equal_power - 1e-12))
+
+    ## @brief Testira water-filling za poznate slučajeve.
+    ## @details Za jediničnu matricu raspodjela je ravnomjerna, a za jedan mod sva snaga ide u taj mod.
+    def test_water_filling_poznati_slucajevi(self):
+        """
+        @brief Testira water-filling za poznate slučajeve.
+        @details Za jediničnu matricu raspodjela je ravnomjerna, a za jedan mod sva snaga ide u taj mod.
+        """
+        print("\nTest: Water-filling poznati slučajevi")
+        snr_linear = 10**(self.snr_db_range / 10)
+        identity = water_filling_capacity(eigenmode_gains(np.eye(4)), self.snr_db_range)
+        np.testing.assert_allclose(identity, 4 * np.log2(1 + snr_linear / 4))
+        single_mode = water_filling_capacity(eigenmode_gains(np.diag([2.0, 0.0])), self.snr_db_range)
+        np.testing.assert_allclose(single_mode, np.log2(1 + 4 * snr_linear))
+        # Na niskom SNR sva snaga ide u najjači mod
+        low_snr = water_filling_capacity(np.array([1.0, 0.01]), [-10.0])
+        print(f"  Niski SNR: {low_snr[0]:.5f}")
+        self.assertAlmostEqual(low_snr[0], np.log2(1.1), places=12)
+
+    ## @brief Testira batch proračun kapaciteta za ansambl kanala.
+    ## @details Jedan SVD poziv nad stekom mora dati isto što i proračun matricu po matricu.
+    def test_ansambl_batch_prema_pojedinacnom(self):
+        """
+        @brief Testira batch proračun kapaciteta za ansambl kanala.
+        @details Jedan SVD poziv nad stekom mora dati isto što i proračun matricu po matricu.
+        """
+        print("\nTest: Ansambl batch prema pojedinačnom proračunu")
+        for model in ('rayleigh', 'unitary'):
+            H_stack = random_channel_ensemble(50, 3, 4, model, np.random.RandomState(2))
+            capacities = ensemble_capacities(H_stack, self.snr_db_range)
+            expected = np.array([equal_power_capacity(eigenmode_gains(H), self.snr_db_range, 4) for H in H_stack])
+            print(f"  Model {model}: srednji kapacitet {capacities.mean():.4f}")
+            np.testing.assert_allclose(capacities, expected, rtol=1e-10)
+        unitary = random_channel_ensemble(20, 4, 4, 'unitary', np.random.RandomState(3))
+        np.testing.assert_allclose(np.matmul(unitary, unitary.conj().transpose(0, 2, 1)), np.broadcast_to(np.eye(4), (20, 4, 4)), atol=1e-12)
+
+    ## @brief Testira ergodički i outage kapacitet.
+    ## @details Ergodički kapacitet SISO Rayleigh kanala ima zatvoreni oblik log2(e) e^(1/rho) E1(1/rho).
+    def test_ergodicki_i_outage_kapacitet(self):
+        """
+        @brief Testira ergodički i outage kapacitet.
+        @details Ergodički kapacitet SISO Rayleigh kanala ima zatvoreni oblik log2(e) e^(1/rho) E1(1/rho).
+        """
+        print("\nTest: Ergodički i outage kapacitet")
+        snr_linear = 10.0
+        ensemble = analyze_ensemble(1, 1, 10.0, 200000, rng=np.random.RandomState(4))
+        expected = np.log2(np.e) * np.exp(1 / snr_linear) * exp1(1 / snr_linear)
+        # P(C < c) = 1 - exp(-(2^c - 1)/rho) za SISO Rayleigh kanal
+        expected_outage = np.log2(1 - snr_linear * np.log(1 - 1e-3))
+        print(f"  Ergodički: {ensemble.ergodic:.4f} (analitički {expected:.4f}), outage: {ensemble.outage:.5f} (analitički {expected_outage:.5f})")
+        self.assertAlmostEqual(ensemble.ergodic, expected, delta=0.01)
+        self.assertAlmostEqual(np.mean(ensemble.capacities < expected_outage), 1e-3, delta=3e-4)
+        capacities, probabilities = ensemble.cdf()
+        self.assertTrue(np.all(np.diff(capacities) >= 0))
+        self.assertEqual(probabilities[-1], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,265 @@
+"""Capture and replay of multi-channel complex sample streams.
+
+A capture is a directory with one .npy file per stream and a metadata.json
+sidecar that records the stream layout, the simulation parameters and the
+measured noise variance. Streams are stored time-major (samples x channels): a frame of
+consecutive samples is then one contiguous block of the file. Readers get the
+usual (channels x samples) layout as a transposed view. Files are opened
+through np.memmap, so replaying a capture reads only the frame being
+processed. Raw interleaved recordings (e.g. from lab equipment) can be
+described with describe_raw_capture and replayed the same way.
+"""
+import dataclasses
+import json
+import os
+import numpy as np
+from typing import Dict, Iterator, List, Optional
+
+from QPSK_MIMO_engine import SimulationParameters, SimulationResult, qpsk_modulate, noise_variance
+from QPSK_MIMO_stream import (Frame, StreamResult, ErrorCounter, EVMAccumulator, ConstellationHistogram,
+                              equalize_frames, detect_frames, received_signal_power, DEFAULT_BLOCK_SIZE)
+from QPSK_MIMO_detector import DEFAULT_K
+
+METADATA_FILE = 'metadata.json'
+CAPTURE_FORMAT = 1
+SAMPLE_DTYPE = np.complex128
+BITS_PER_SAMPLE = 2  # QPSK: par bita po simbolu
+PARAMETER_ARRAYS = ('channel_matrix', 'channel_taps')
+
+
+def _parameters_metadata(params: SimulationParameters, directory: str) -> Dict:
+    """Scalar parameters for the sidecar; the channel arrays go to their own .npy files."""
+    values = {}
+    for parameter in dataclasses.fields(params):
+        value = getattr(params, parameter.name)
+        if parameter.name in PARAMETER_ARRAYS:
+            if value is not None:
+                np.save(os.path.join(directory, parameter.name + '.npy'), value)
+            continue
+        values[parameter.name] = list(value) if isinstance(value, tuple) else value
+    return values
+
+
+def _parameters_from_metadata(values: Dict, directory: str) -> SimulationParameters:
+    values = dict(values)
+    if 'snr_range' in values:
+        values['snr_range'] = tuple(values['snr_range'])
+    for name in PARAMETER_ARRAYS:
+        path = os.path.join(directory, name + '.npy')
+        if os.path.exists(path):
+            values[name] = np.load(path)
+    return SimulationParameters(**values)
+
+
+class CaptureWriter:
+    """Write frames of a stream run into a capture directory.
+
+    The total length must be known in advance: every stream file is created
+    at full size with np.lib.format.open_memmap and filled frame by frame.
+    The writer has an update(frame) method, so it can be passed to run_stream
+    as an accumulator; the noise is stored as received_symbols - rx_signals.
+    """
+
+    def __init__(self, directory: str, num_samples: int, num_tx_streams: int, num_rx_streams: int,
+                 params: Optional[SimulationParameters] = None, dtype=SAMPLE_DTYPE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.num_samples = num_samples
+        self.params = params
+        self.position = 0
+        self.noise_power = 0.0
+        shapes = {
+            'tx_bits': ((num_samples, BITS_PER_SAMPLE), np.int8),
+            'tx_signals': ((num_samples, num_tx_streams), dtype),
+            'noise': ((num_samples, num_rx_streams), dtype),
+            'received_symbols': ((num_samples, num_rx_streams), dtype),
+        }
+        self.streams = {name: np.lib.format.open_memmap(os.path.join(directory, name + '.npy'), mode='w+',
+                                                        dtype=stream_dtype, shape=shape)
+                        for name, (shape, stream_dtype) in shapes.items()}
+
+    def write(self, tx_bits: np.ndarray, tx_signals: np.ndarray, noise: np.ndarray, received_symbols: np.ndarray):
+        """Append one block; the signals are (channels x samples), tx_bits holds two bits per sample."""
+        count = received_symbols.shape[-1]
+        if self.position + count > self.num_samples:
+            raise ValueError("Snimak je duži od zadanog broja uzoraka.")
+        block = slice(self.position, self.position + count)
+        self.streams['tx_bits'][block] = np.asarray(tx_bits).reshape(count, BITS_PER_SAMPLE)
+        self.streams['tx_signals'][block] = tx_signals.T
+        self.streams['noise'][block] = noise.T
+        self.streams['received_symbols'][block] = received_symbols.T
+        self.noise_power += float(np.sum(np.abs(noise)**2))
+        self.position += count
+
+    def update(self, frame: Frame):
+        num_tx_streams = self.streams['tx_signals'].shape[1]
+        tx_signals = np.broadcast_to(frame.tx_symbols, (num_tx_streams, frame.tx_symbols.size))
+        self.write(frame.tx_bits, tx_signals, frame.received_symbols - frame.rx_signals, frame.received_symbols)
+
+    def close(self):
+        """Flush the stream files and write the metadata sidecar."""
+        streams = {}
+        for name, stream in self.streams.items():
+            stream.flush()
+            streams[name] = {'file': name + '.npy', 'dtype': stream.dtype.str, 'shape': list(stream.shape)}
+        num_rx_streams = self.streams['noise'].shape[1]
+        metadata = {
+            'format': CAPTURE_FORMAT,
+            'layout': 'samples x channels',
+            'num_samples': self.position,
+            'streams': streams,
+            'measured_noise_variance': self.noise_power / (self.position * num_rx_streams) if self.position else None,
+            'parameters': None if self.params is None else _parameters_metadata(self.params, self.directory),
+        }
+        with open(os.path.join(self.directory, METADATA_FILE), 'w', encoding='utf-8') as sidecar:
+            json.dump(metadata, sidecar, indent=2)
+        self.streams = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.streams:
+            self.close()
+
+
+def save_capture(directory: str, result: SimulationResult, params: Optional[SimulationParameters] = None,
+                 dtype=SAMPLE_DTYPE) -> str:
+    """Write the signals of one run_simulation result as a capture; returns the directory."""
+    with CaptureWriter(directory, result.received_symbols.shape[-1], result.tx_signals.shape[0],
+                       result.received_symbols.shape[0], params, dtype) as writer:
+        writer.write(result.tx_bits, result.tx_signals, result.noise, result.received_symbols)
+    return directory
+
+
+def describe_raw_capture(directory: str, file_name: str, num_channels: int, dtype=np.complex64,
+                         offset: int = 0, params: Optional[SimulationParameters] = None,
+                         noise_var: Optional[float] = None) -> str:
+    """Write a sidecar for an external raw recording of interleaved received samples.
+
+    The file must hold num_channels complex samples per time instant
+    (samples x channels), starting offset bytes into the file.
+    """
+    dtype = np.dtype(dtype)
+    num_samples = (os.path.getsize(os.path.join(directory, file_name)) - offset) // (dtype.itemsize * num_channels)
+    metadata = {
+        'format': CAPTURE_FORMAT,
+        'layout': 'samples x channels',
+        'num_samples': num_samples,
+        'streams': {'received_symbols': {'file': file_name, 'dtype': dtype.str, 'shape': [num_samples, num_channels],
+                                         'offset': offset}},
+        'noise_variance': noise_var,
+        'parameters': None if params is None else _parameters_metadata(params, directory),
+    }
+    with open(os.path.join(directory, METADATA_FILE), 'w', encoding='utf-8') as sidecar:
+        json.dump(metadata, sidecar, indent=2)
+    return directory
+
+
+class Capture:
+    """Read-only, memory-mapped view of a capture directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        metadata_path = os.path.join(directory, METADATA_FILE)
+        if not os.path.exists(metadata_path):
+            raise ValueError(f"Direktorij {directory} ne sadrži opis snimka ({METADATA_FILE}).")
+        with open(metadata_path, encoding='utf-8') as sidecar:
+            self.metadata = json.load(sidecar)
+        if self.metadata.get('format') != CAPTURE_FORMAT:
+            raise ValueError(f"Nepodržana verzija formata snimka: {self.metadata.get('format')}")
+        self.num_samples = self.metadata['num_samples']
+        parameters = self.metadata.get('parameters')
+        self.params = None if parameters is None else _parameters_from_metadata(parameters, directory)
+        self._streams = {name: self._open(description) for name, description in self.metadata['streams'].items()}
+
+    def _open(self, description: Dict) -> np.ndarray:
+        path = os.path.join(self.directory, description['file'])
+        if path.endswith('.npy'):
+            stream = np.load(path, mmap_mode='r')
+        else:
+            stream = np.memmap(path, dtype=np.dtype(description['dtype']), mode='r',
+                               offset=description.get('offset', 0), shape=tuple(description['shape']))
+        return stream[:self.num_samples]
+
+    @property
+    def stream_names(self) -> List[str]:
+        return list(self._streams)
+
+    def stream(self, name: str) -> np.ndarray:
+        """Memory-mapped (channels x samples) view of a stream; nothing is read until it is sliced."""
+        if name not in self._streams:
+            raise KeyError(f"Snimak nema tok '{name}'.")
+        return self._streams[name].T
+
+    @property
+    def noise_var(self) -> float:
+        """Noise variance per channel assumed by the equalizers.
+
+        An explicitly given value comes first, then the one implied by the
+        SNR of the capture parameters (what the simulation itself used) and
+        finally the variance measured from the recorded noise.
+        """
+        if self.metadata.get('noise_variance') is not None:
+            return self.metadata['noise_variance']
+        if self.params is not None:
+            taps = self.params.channel_matrix if self.params.channel_taps is None else self.params.channel_taps
+            return noise_variance(received_signal_power(taps), self.params.snr_db)
+        if self.metadata.get('measured_noise_variance') is not None:
+            return self.metadata['measured_noise_variance']
+        raise ValueError("Snimak ne sadrži varijansu šuma ni parametre simulacije.")
+
+    def frames(self, frame_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[Frame]:
+        """Yield Frames of at most frame_size samples; only the current frame is held in memory."""
+        for index, start in enumerate(range(0, self.num_samples, frame_size)):
+            block = slice(start, min(start + frame_size, self.num_samples))
+            received_symbols = np.array(self._streams['received_symbols'][block].T, dtype=complex)
+            frame = Frame(index=index, tx_bits=None, received_symbols=received_symbols)
+            if 'tx_bits' in self._streams:
+                frame.tx_symbols, frame.tx_bits = qpsk_modulate(np.array(self._streams['tx_bits'][block]).reshape(-1))
+            if 'noise' in self._streams:
+                frame.rx_signals = received_symbols - np.array(self._streams['noise'][block].T, dtype=complex)
+            yield frame
+
+
+def open_capture(directory: str) -> Capture:
+    """Open a capture directory written by CaptureWriter, save_capture or describe_raw_capture."""
+    return Capture(directory)
+
+
+def replay_capture(capture: Capture, equalizer: Optional[str] = None, frame_size: int = DEFAULT_BLOCK_SIZE,
+                   kbest_k: int = DEFAULT_K, accumulators: Optional[List] = None) -> StreamResult:
+    """Equalize, detect and analyse a capture frame by frame, like run_stream.
+
+    equalizer defaults to the one in the capture parameters, so the same
+    received data can be replayed with different detectors. The BER needs
+    the tx_bits stream and the EVM the noise stream; without them they are NaN.
+    """
+    params = capture.params
+    if equalizer is None:
+        equalizer = 'none' if params is None else params.equalizer
+    num_rx_streams = capture.stream('received_symbols').shape[0]
+    frames = capture.frames(frame_size)
+    if equalizer != 'none':
+        if params is None:
+            raise ValueError("Za ekvalizaciju snimak mora sadržavati kanalnu matricu.")
+        frames = equalize_frames(frames, params.channel_matrix, capture.noise_var, equalizer, params.adaptive_taps,
+                                 kbest_k)
+    frames = detect_frames(frames)
+
+    has_bits = 'tx_bits' in capture.stream_names
+    has_noise = 'noise' in capture.stream_names
+    num_detected = num_rx_streams if equalizer == 'none' else params.num_tx_streams
+    errors = ErrorCounter(num_detected)
+    evm = EVMAccumulator(num_rx_streams)
+    histogram = ConstellationHistogram()
+    all_accumulators = ([errors] if has_bits else []) + ([evm] if has_noise else []) + [histogram]
+    all_accumulators += list(accumulators or [])
+    num_frames = 0
+    for frame in frames:
+        for accumulator in all_accumulators:
+            accumulator.update(frame)
+        num_frames += 1
+    return StreamResult(num_frames=num_frames, bit_errors=errors.bit_errors, num_bits=errors.num_bits,
+                        ber=errors.ber, evm=evm.evm if has_noise else np.full(num_rx_streams, np.nan),
+                        histogram=histogram)
@@ -0,0 +1,134 @@
+import unittest
+import numpy as np
+from QPSK_MIMO_channel import (haar_unitary, tree_product, segment_matrices, fiber_channel, fiber_impulse_response,
+                               main_cursor, mimo_convolve, OverlapSaveConvolver)
+from QPSK_MIMO_engine import SimulationParameters, run_simulation
+
+class TestQPSK_MIMO_channel(unittest.TestCase):
+
+    ## @brief Testira redukciju proizvoda segmenata po stablu.
+    ## @details Rezultat mora biti jednak redoslijednom proizvodu M[K-1] ... M[0], i za neparan broj segmenata.
+    def test_proizvod_po_stablu(self):
+        """
+        @brief Testira redukciju proizvoda segmenata po stablu.
+        @details Rezultat mora biti jednak redoslijednom proizvodu M[K-1] ... M[0], i za neparan broj segmenata.
+        """
+        print("\nTest: Proizvod segmenata po stablu")
+        rng = np.random.RandomState(3)
+        for num_segments in (1, 2, 7, 16):
+            matrices = rng.randn(2, num_segments, 3, 3) + 1j * rng.randn(2, num_segments, 3, 3)
+            expected = np.stack([np.eye(3, dtype=complex)] * 2)
+            for k in range(num_segments):
+                expected = matrices[:, k] @ expected
+            np.testing.assert_allclose(tree_product(matrices), expected, rtol=1e-10, atol=1e-10)
+
+    ## @brief Testira unitarnost slučajnih matrica sprezanja.
+    ## @details U^H U mora biti jedinična matrica za svaku matricu u nizu.
+    def test_haar_unitarna(self):
+        """
+        @brief Testira unitarnost slučajnih matrica sprezanja.
+        @details U^H U mora biti jedinična matrica za svaku matricu u nizu.
+        """
+        print("\nTest: Unitarnost matrica sprezanja")
+        U = haar_unitary(50, 4, np.random.RandomState(5))
+        identity = np.broadcast_to(np.eye(4), U.shape)
+        np.testing.assert_allclose(np.conj(np.swapaxes(U, -1, -2)) @ U, identity, atol=1e-12)
+
+    ## @brief Testira kanal vlakna bez gubitaka zavisnih od moda.
+    ## @details Bez MDL-a sve singularne vrijednosti moraju biti jednake ukupnom slabljenju 10^(-aL/20).
+    def test_vlakno_bez_mdl(self):
+        """
+        @brief Testira kanal vlakna bez gubitaka zavisnih od moda.
+        @details Bez MDL-a sve singularne vrijednosti moraju biti jednake ukupnom slabljenju 10^(-aL/20).
+        """
+        print("\nTest: Vlakno bez MDL-a")
+        H = fiber_channel(4, 4, 150.0, 0.2, num_realizations=10, mdl_per_segment=0.0, block_segments=16,
+                          rng=np.random.RandomState(7))
+        self.assertEqual(H.shape, (10, 4, 4))
+        np.testing.assert_allclose(np.linalg.svd(H, compute_uv=False), 10**(-0.2 * 150.0 / 20), rtol=1e-10)
+
+    ## @brief Testira dimenzije i MDL segmenata.
+    ## @details Pravougaoni kanal ima tražene dimenzije, a MDL ne mijenja srednje slabljenje segmenta.
+    def test_dimenzije_i_mdl(self):
+        """
+        @brief Testira dimenzije i MDL segmenata.
+        @details Pravougaoni kanal ima tražene dimenzije, a MDL ne mijenja srednje slabljenje segmenta.
+        """
+        print("\nTest: Dimenzije kanala i MDL segmenata")
+        rng = np.random.RandomState(9)
+        self.assertEqual(fiber_channel(2, 4, 10.0, 0.2, rng=rng).shape, (2, 4))
+        segments = segment_matrices(5, 3, 4, 0.5, rng)
+        singular_values_db = 20 * np.log10(np.linalg.svd(segments, compute_uv=False))
+        np.testing.assert_allclose(singular_values_db.mean(axis=-1), 0, atol=1e-10)
+        self.assertGreater(np.ptp(singular_values_db), 0)
+
+    ## @brief Testira napredak generisanja kanala vlakna.
+    ## @details Napredak se javlja nakon svakog bloka segmenata, raste do 1 i ne mijenja rezultat.
+    def test_napredak_kanala(self):
+        """
+        @brief Testira napredak generisanja kanala vlakna.
+        @details Napredak se javlja nakon svakog bloka segmenata, raste do 1 i ne mijenja rezultat.
+        """
+        print("\nTest: Napredak generisanja kanala vlakna")
+        fractions = []
+        H = fiber_channel(4, 4, 100.0, 0.2, block_segments=16, rng=np.random.RandomState(3),
+                          progress=fractions.append)
+        self.assertEqual(len(fractions), 7)
+        self.assertTrue(np.all(np.diff(fractions) > 0))
+        self.assertAlmostEqual(fractions[-1], 1.0)
+        np.testing.assert_array_equal(H, fiber_channel(4, 4, 100.0, 0.2, block_segments=16,
+                                                       rng=np.random.RandomState(3)))
+
+    ## @brief Testira simulaciju sa kanalom vlakna.
+    ## @details Parametri sa channel_model='fiber' generišu H odgovarajućih dimenzija i simulacija se izvršava.
+    def test_simulacija_sa_vlaknom(self):
+        """
+        @brief Testira simulaciju sa kanalom vlakna.
+        @details Parametri sa channel_model='fiber' generišu H odgovarajućih dimenzija i simulacija se izvršava.
+        """
+        print("\nTest: Simulacija sa kanalom vlakna")
+        params = SimulationParameters(num_tx_antennas=1, num_rx_antennas=2, num_modes=2, channel_model='fiber')
+        params.validate()
+        self.assertEqual(params.channel_matrix.shape, (4, 2))
+        result = run_simulation(params)
+        self.assertTrue(0 <= result.ber <= 1)
+
+    ## @brief Testira overlap-save MIMO konvoluciju.
+    ## @details Rezultat mora odgovarati direktnoj konvoluciji, i kad se signal obrađuje u dijelovima.
+    def test_overlap_save_konvolucija(self):
+        """
+        @brief Testira overlap-save MIMO konvoluciju.
+        @details Rezultat mora odgovarati direktnoj konvoluciji, i kad se signal obrađuje u dijelovima.
+        """
+        print("\nTest: Overlap-save MIMO konvolucija")
+        rng = np.random.RandomState(12)
+        taps = rng.randn(9, 3, 2) + 1j * rng.randn(9, 3, 2)
+        signals = rng.randn(2, 1000) + 1j * rng.randn(2, 1000)
+        expected = np.zeros((3, 1000), dtype=complex)
+        for r in range(3):
+            for t in range(2):
+                expected[r] += np.convolve(signals[t], taps[:, r, t])[:1000]
+        convolver = OverlapSaveConvolver(taps, fft_size=32, pass_samples=64)
+        output = np.concatenate([convolver(signals[:, :333]), convolver(signals[:, 333:334]), convolver(signals[:, 334:])], axis=1)
+        np.testing.assert_allclose(output, expected, atol=1e-10)
+        np.testing.assert_allclose(mimo_convolve(signals, taps, delay=4)[:, :996], expected[:, 4:], atol=1e-10)
+
+    ## @brief Testira impulsni odziv vlakna sa DMD-om.
+    ## @details Bez MDL-a kanal je unitaran na svakoj frekvenciji, pa je ukupna energija tapova 10^(-aL/10) po modu.
+    def test_impulsni_odziv_vlakna(self):
+        """
+        @brief Testira impulsni odziv vlakna sa DMD-om.
+        @details Bez MDL-a kanal je unitaran na svakoj frekvenciji, pa je ukupna energija tapova 10^(-aL/10) po modu.
+        """
+        print("\nTest: Impulsni odziv vlakna sa DMD-om")
+        taps = fiber_impulse_response(4, 4, 100.0, 0.2, 50.0, mdl_per_segment=0.0, rng=np.random.RandomState(2))
+        self.assertGreater(taps.shape[0], 1)
+        energy = np.einsum('kri,krj->ij', taps.conj(), taps)
+        np.testing.assert_allclose(energy, 10**(-0.2 * 100.0 / 10) * np.eye(4), atol=1e-12)
+        self.assertLess(abs(main_cursor(taps) - taps.shape[0] // 2), taps.shape[0] // 4)
+        # Bez DMD-a zbir tapova je ravni kanal iz istog slučajnog stanja
+        flat_taps = fiber_impulse_response(2, 3, 30.0, 0.2, 0.0, num_taps=4, rng=np.random.RandomState(6))
+        np.testing.assert_allclose(flat_taps.sum(axis=0), fiber_channel(2, 3, 30.0, 0.2, rng=np.random.RandomState(6)), atol=1e-12)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+"""Near-ML joint MIMO detection with a K-best (breadth-first sphere) decoder.
+
+After a sorted QR decomposition H P = Q R the detection metric ||y - H x||^2
+splits into per-layer terms, so the transmitted vector is searched as a tree
+from the last layer to the first. At every layer only the K best partial
+vectors survive, so a vector costs 4K metric updates per layer instead of the
+4^n of an exhaustive ML search. All symbol vectors of a frame are searched
+together: the survivors of every vector are kept in one (vectors x K) array.
+"""
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+QPSK_POINTS = np.array([1 + 1j, -1 + 1j, 1 - 1j, -1 - 1j]) / np.sqrt(2)
+DEFAULT_K = 8
+MAX_ML_STREAMS = 8
+ML_CHUNK_ELEMENTS = 2**22
+TRADEOFF_CHUNK_VECTORS = 250  # vektori između dva izvještaja o napretku u kbest_tradeoff
+TRADEOFF_BUDGET = 2e8         # čvorovi x slojevi, približno jedna sekunda detekcije
+MIN_TRADEOFF_VECTORS = 100
+MAX_TRADEOFF_STREAMS = 64     # iznad ovoga se kompleksnost K-best detektora ne mjeri
+
+SortedQR = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def sorted_qr(H: np.ndarray, noise_variance: float = 0.0) -> SortedQR:
+    """Sorted (MMSE) QR decomposition, returning (Q, R, permutation).
+
+    H[:, permutation] = Q @ R, with the weakest column moved to the first
+    layer, which is detected last. With noise_variance > 0 the extended
+    channel [H; sqrt(noise_variance) I] is decomposed (MMSE-SQRD) and only the
+    rows of Q that belong to H are returned.
+    """
+    num_rx, num_tx = H.shape
+    Q = np.vstack([H, np.sqrt(noise_variance) * np.eye(num_tx)]).astype(complex)
+    R = np.zeros((num_tx, num_tx), dtype=complex)
+    permutation = np.arange(num_tx)
+    for i in range(num_tx):
+        weakest = i + int(np.argmin(np.sum(np.abs(Q[:, i:])**2, axis=0)))
+        Q[:, [i, weakest]] = Q[:, [weakest, i]]
+        R[:, [i, weakest]] = R[:, [weakest, i]]
+        permutation[[i, weakest]] = permutation[[weakest, i]]
+        R[i, i] = np.linalg.norm(Q[:, i])
+        Q[:, i] /= R[i, i]
+        R[i, i + 1:] = Q[:, i].conj() @ Q[:, i + 1:]
+        Q[:, i + 1:] -= np.outer(Q[:, i], R[i, i + 1:])
+    return Q[:num_rx], R, permutation
+
+
+def kbest_nodes(num_streams: int, k: int) -> int:
+    """Number of metric evaluations (visited tree nodes) per symbol vector."""
+    return sum(len(QPSK_POINTS) * min(k, len(QPSK_POINTS)**layer) for layer in range(num_streams))
+
+
+def kbest_detect(received_symbols: np.ndarray, qr: SortedQR, k: int = DEFAULT_K) -> np.ndarray:
+    """Jointly detect the (transmit streams x time) QPSK symbols from (receivers x time) samples."""
+    Q, R, permutation = qr
+    num_streams = R.shape[0]
+    z = (Q.conj().T @ np.asarray(received_symbols)).T  # (vektori x slojevi)
+    num_vectors = z.shape[0]
+    metrics = np.zeros((num_vectors, 1))
+    paths = np.zeros((num_vectors, 1, num_streams), dtype=complex)
+    for layer in range(num_streams - 1, -1, -1):
+        residual = z[:, layer, np.newaxis] - paths[:, :, layer + 1:] @ R[layer, layer + 1:]
+        candidates = metrics[:, :, np.newaxis] + np.abs(residual[:, :, np.newaxis] - R[layer, layer] * QPSK_POINTS)**2
+        candidates = candidates.reshape(num_vectors, -1)
+        if candidates.shape[1] > k:
+            survivors = np.argpartition(candidates, k - 1, axis=1)[:, :k]
+        else:
+            survivors = np.broadcast_to(np.arange(candidates.shape[1]), candidates.shape)
+        metrics = np.take_along_axis(candidates, survivors, axis=1)
+        paths = np.take_along_axis(paths, (survivors // len(QPSK_POINTS))[:, :, np.newaxis], axis=1)
+        paths[:, :, layer] = QPSK_POINTS[survivors % len(QPSK_POINTS)]
+    best = paths[np.arange(num_vectors), np.argmin(metrics, axis=1)]
+    detected = np.empty((num_streams, num_vectors), dtype=complex)
+    detected[permutation] = best.T
+    return detected
+
+
+def ml_detect(received_symbols: np.ndarray, H: np.ndarray) -> np.ndarray:
+    """Exhaustive ML detection over all 4^n QPSK vectors (reference for small n only)."""
+    num_streams = H.shape[1]
+    if num_streams > MAX_ML_STREAMS:
+        raise ValueError(f"ML detekcija je ograničena na {MAX_ML_STREAMS} tokova.")
+    indices = np.indices((len(QPSK_POINTS),) * num_streams).reshape(num_streams, -1)
+    candidates = QPSK_POINTS[indices]  # (tokovi x kandidati)
+    noiseless = H @ candidates
+    candidate_energy = np.sum(np.abs(noiseless)**2, axis=0)
+    received_symbols = np.asarray(received_symbols)
+    chunk = max(1, ML_CHUNK_ELEMENTS // candidates.shape[1])
+    detected = np.empty((num_streams, received_symbols.shape[1]), dtype=complex)
+    for start in range(0, received_symbols.shape[1], chunk):
+        y = received_symbols[:, start:start + chunk]
+        # ||y - Hs||^2 bez člana ||y||^2, koji ne zavisi od kandidata
+        distances = candidate_energy - 2 * np.real(y.conj().T @ noiseless)
+        detected[:, start:start + chunk] = candidates[:, np.argmin(distances, axis=1)]
+    return detected
+
+
+@dataclass
+class DetectorPoint:
+    """Measured BER and cost of one detector setting."""
+    k: Optional[int]  # None za iscrpnu ML pretragu
+    ber: float
+    nodes_per_vector: int
+    seconds: float
+    num_vectors: int = 0
+
+
+def tradeoff_size(num_streams: int, k_values: Sequence[int], max_vectors: int, include_ml: bool = True,
+                  budget: float = TRADEOFF_BUDGET) -> int:
+    """Number of vectors for kbest_tradeoff whose detection cost fits the budget (0 above MAX_TRADEOFF_STREAMS).
+
+    A K-best vector costs about kbest_nodes * num_streams operations (every
+    node updates the residual of its path), an ML vector 4^n * n. Small
+    channels get max_vectors; larger ones fewer, but never less than
+    MIN_TRADEOFF_VECTORS.
+    """
+    if num_streams > MAX_TRADEOFF_STREAMS:
+        return 0
+    cost = sum(kbest_nodes(num_streams, k) for k in k_values)
+    if include_ml and num_streams <= MAX_ML_STREAMS:
+        cost += len(QPSK_POINTS)**num_streams
+    return int(min(max_vectors, max(MIN_TRADEOFF_VECTORS, budget // (cost * num_streams))))
+
+
+def kbest_tradeoff(H: np.ndarray, snr_db: float, k_values: Sequence[int] = (1, 2, 4, 8, 16, 32),
+                   num_vectors: int = 10**4, rng=None, include_ml: bool = True,
+                   progress: Optional[Callable[[float], None]] = None) -> List[DetectorPoint]:
+    """Complexity vs BER of the K-best decoder (and of ML for small n) on independent QPSK streams.
+
+    Every detector runs over chunks of TRADEOFF_CHUNK_VECTORS vectors;
+    progress, if given, is called with the finished fraction after every
+    chunk and may raise to abort the sweep.
+    """
+    if rng is None:
+        rng = np.random
+    num_streams = H.shape[1]
+    symbol_indices = rng.randint(0, len(QPSK_POINTS), (num_streams, num_vectors))
+    tx_symbols = QPSK_POINTS[symbol_indices]
+    rx_signals = H @ tx_symbols
+    noise_var = np.mean(np.abs(rx_signals)**2) / 10**(snr_db / 10)
+    noise = np.sqrt(noise_var / 2) * (rng.randn(*rx_signals.shape) + 1j * rng.randn(*rx_signals.shape))
+    received = rx_signals + noise
+
+    def bit_error_rate(detected):
+        errors = np.count_nonzero(np.sign(detected.real) != np.sign(tx_symbols.real))
+        errors += np.count_nonzero(np.sign(detected.imag) != np.sign(tx_symbols.imag))
+        return errors / (2 * tx_symbols.size)
+
+    chunks = [slice(start, start + TRADEOFF_CHUNK_VECTORS) for start in range(0, num_vectors, TRADEOFF_CHUNK_VECTORS)]
+    run_ml = include_ml and num_streams <= MAX_ML_STREAMS
+    num_steps = (len(k_values) + run_ml) * len(chunks)
+    finished_steps = 0
+
+    def detect_in_chunks(detect):
+        """Detected symbols of all vectors and the time spent detecting (without progress reports)."""
+        nonlocal finished_steps
+        detected = np.empty_like(tx_symbols)
+        seconds = 0.0
+        for chunk in chunks:
+            start = time.perf_counter()
+            detected[:, chunk] = detect(received[:, chunk])
+            seconds += time.perf_counter() - start
+            finished_steps += 1
+            if progress is not None:
+                progress(finished_steps / num_steps)
+        return detected, seconds
+
+    points = []
+    qr = sorted_qr(H, noise_var)
+    for k in k_values:
+        detected, seconds = detect_in_chunks(lambda chunk: kbest_detect(chunk, qr, k))
+        points.append(DetectorPoint(k=k, ber=bit_error_rate(detected), nodes_per_vector=kbest_nodes(num_streams, k),
+                                    seconds=seconds, num_vectors=num_vectors))
+    if run_ml:
+        detected, seconds = detect_in_chunks(lambda chunk: ml_detect(chunk, H))
+        points.append(DetectorPoint(k=None, ber=bit_error_rate(detected),
+                                    nodes_per_vector=len(QPSK_POINTS)**num_streams, seconds=seconds,
+                                    num_vectors=num_vectors))
+    return points
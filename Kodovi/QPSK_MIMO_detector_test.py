@@ -0,0 +1,121 @@
+import unittest
+import numpy as np
+from QPSK_MIMO_detector import (sorted_qr, kbest_detect, kbest_nodes, ml_detect, kbest_tradeoff, tradeoff_size,
+                                QPSK_POINTS, MIN_TRADEOFF_VECTORS, MAX_TRADEOFF_STREAMS)
+from QPSK_MIMO_equalizer import equalize, FilterCache
+from QPSK_MIMO_engine import SimulationParameters, run_simulation
+
+class TestQPSK_MIMO_detector(unittest.TestCase):
+
+    def _link(self, num_rx, num_tx, snr_db, num_vectors, seed):
+        rng = np.random.RandomState(seed)
+        H = (rng.randn(num_rx, num_tx) + 1j * rng.randn(num_rx, num_tx)) / np.sqrt(2)
+        tx_symbols = QPSK_POINTS[rng.randint(0, 4, (num_tx, num_vectors))]
+        noise_var = num_tx / 10**(snr_db / 10)
+        noise = np.sqrt(noise_var / 2) * (rng.randn(num_rx, num_vectors) + 1j * rng.randn(num_rx, num_vectors))
+        return H, tx_symbols, H @ tx_symbols + noise, noise_var
+
+    ## @brief Testira sortiranu QR dekompoziciju.
+    ## @details Permutovane kolone H moraju biti jednake Q R, a R gornja trougaona sa pozitivnom dijagonalom.
+    def test_sortirana_qr(self):
+        """
+        @brief Testira sortiranu QR dekompoziciju.
+        @details Permutovane kolone H moraju biti jednake Q R, a R gornja trougaona sa pozitivnom dijagonalom.
+        """
+        print("\nTest: Sortirana QR dekompozicija")
+        H, _, _, _ = self._link(5, 4, 10.0, 1, 1)
+        Q, R, permutation = sorted_qr(H)
+        np.testing.assert_allclose(Q @ R, H[:, permutation], atol=1e-12)
+        np.testing.assert_allclose(np.tril(R, -1), 0, atol=1e-12)
+        self.assertTrue(np.all(np.real(np.diag(R)) > 0))
+        self.assertEqual(sorted(permutation), list(range(4)))
+
+    ## @brief Testira K-best detektor sa dovoljno velikim K.
+    ## @details Kad K pokriva sve kandidate, K-best mora dati isto rješenje kao iscrpna ML pretraga.
+    def test_kbest_jednak_ml(self):
+        """
+        @brief Testira K-best detektor sa dovoljno velikim K.
+        @details Kad K pokriva sve kandidate, K-best mora dati isto rješenje kao iscrpna ML pretraga.
+        """
+        print("\nTest: K-best jednak ML detekciji")
+        for num_rx, num_tx in ((2, 2), (3, 3), (4, 3)):
+            H, _, received, _ = self._link(num_rx, num_tx, 5.0, 2000, num_tx)
+            detected = kbest_detect(received, sorted_qr(H), 4**num_tx)
+            np.testing.assert_array_equal(detected, ml_detect(received, H))
+
+    ## @brief Testira BER K-best detektora u odnosu na MMSE.
+    ## @details Na 4x4 kanalu sa nezavisnim tokovima K-best mora imati manji BER od MMSE ekvalizatora.
+    def test_kbest_bolji_od_mmse(self):
+        """
+        @brief Testira BER K-best detektora u odnosu na MMSE.
+        @details Na 4x4 kanalu sa nezavisnim tokovima K-best mora imati manji BER od MMSE ekvalizatora.
+        """
+        print("\nTest: K-best bolji od MMSE")
+        H, tx_symbols, received, noise_var = self._link(4, 4, 12.0, 20000, 7)
+        cache = FilterCache()
+
+        def ber(estimates):
+            errors = np.count_nonzero(np.sign(estimates.real) != np.sign(tx_symbols.real))
+            return (errors + np.count_nonzero(np.sign(estimates.imag) != np.sign(tx_symbols.imag))) / (2 * tx_symbols.size)
+
+        kbest_ber = ber(equalize(received, H, noise_var, 'kbest', cache, k=8))
+        mmse_ber = ber(equalize(received, H, noise_var, 'mmse', cache))
+        print(f"  BER: K-best {kbest_ber:.5f}, MMSE {mmse_ber:.5f}")
+        self.assertLess(kbest_ber, mmse_ber)
+        equalize(received, H, noise_var, 'kbest', cache, k=2)
+        self.assertEqual(cache.hits, 1)
+
+    ## @brief Testira krivu kompleksnosti i BER-a.
+    ## @details Broj čvorova raste sa K, BER ne raste značajno, a ML tačka je posljednja i najskuplja.
+    def test_kriva_kompleksnosti(self):
+        """
+        @brief Testira krivu kompleksnosti i BER-a.
+        @details Broj čvorova raste sa K, BER ne raste značajno, a ML tačka je posljednja i najskuplja.
+        """
+        print("\nTest: Kriva kompleksnosti K-best detektora")
+        H, _, _, _ = self._link(4, 4, 10.0, 1, 3)
+        points = kbest_tradeoff(H, 14.0, (1, 4, 16), 5000, np.random.RandomState(4))
+        self.assertEqual([point.k for point in points], [1, 4, 16, None])
+        nodes = [point.nodes_per_vector for point in points[:-1]]
+        self.assertEqual(nodes, sorted(nodes))
+        self.assertEqual(nodes[0], kbest_nodes(4, 1))
+        self.assertEqual(points[-1].nodes_per_vector, 4**4)
+        self.assertLessEqual(points[1].ber, points[0].ber)
+        self.assertLessEqual(points[2].ber, points[-1].ber * 1.5 + 1e-3)
+        self.assertTrue(all(point.num_vectors == 5000 for point in points))
+
+    ## @brief Testira veličinu mjerenja kompleksnosti.
+    ## @details Mali kanali dobijaju puni broj vektora, veći manje (ali ne ispod minimuma), a iznad granice tokova mjerenje se preskače.
+    def test_velicina_mjerenja_kompleksnosti(self):
+        """
+        @brief Testira veličinu mjerenja kompleksnosti.
+        @details Mali kanali dobijaju puni broj vektora, veći manje (ali ne ispod minimuma), a iznad granice tokova mjerenje se preskače.
+        """
+        print("\nTest: Veličina mjerenja kompleksnosti K-best detektora")
+        k_values = (1, 2, 4, 8, 16, 32, 64)
+        sizes = {num_streams: tradeoff_size(num_streams, k_values, 2000) for num_streams in (2, 8, 32, 64, 128, 256)}
+        print(f"  Vektori po broju tokova: {sizes}")
+        self.assertEqual(sizes[2], 2000)
+        self.assertLess(sizes[8], tradeoff_size(8, k_values, 2000, include_ml=False))
+        self.assertLess(sizes[32], 2000)
+        self.assertEqual(sizes[MAX_TRADEOFF_STREAMS], MIN_TRADEOFF_VECTORS)
+        self.assertEqual((sizes[128], sizes[256]), (0, 0))
+
+    ## @brief Testira K-best detektor u simulaciji.
+    ## @details Simulacija sa ekvalizatorom 'kbest' mora se izvršiti, a K manji od 1 mora biti odbijen.
+    def test_simulacija_sa_kbest(self):
+        """
+        @brief Testira K-best detektor u simulaciji.
+        @details Simulacija sa ekvalizatorom 'kbest' mora se izvršiti, a K manji od 1 mora biti odbijen.
+        """
+        print("\nTest: Simulacija sa K-best detektorom")
+        params = SimulationParameters(snr_db=15, equalizer='kbest', kbest_k=4)
+        params.validate()
+        result = run_simulation(params)
+        self.assertTrue(0 <= result.ber <= 1)
+        self.assertEqual(result.equalized_symbols.shape, (params.num_tx_streams, params.num_bits // 2))
+        with self.assertRaises(ValueError):
+            SimulationParameters(equalizer='kbest', kbest_k=0).validate()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,645 @@
+"""Headless QPSK MIMO simulation engine.
+
+The complete simulation chain (bit generation, QPSK modulation, MIMO channel,
+AWGN, demodulation, BER and capacity) lives here without any Tk or matplotlib
+dependency, so the same code is used by the GUI, the tests and batch jobs.
+"""
+import ast
+import os
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Callable, Tuple, List, Dict, Optional, Union
+
+from QPSK_MIMO_capacity import eigenmode_gains, equal_power_capacity, capacity_curves, random_channel_ensemble
+from QPSK_MIMO_equalizer import equalize, qpsk_hard_decision, EQUALIZERS
+from QPSK_MIMO_detector import DEFAULT_K
+from QPSK_MIMO_adaptive import adaptive_equalize, adaptive_num_taps, ADAPTIVE_EQUALIZERS
+from QPSK_MIMO_channel import fiber_channel, fiber_impulse_response, main_cursor, mimo_convolve, DEFAULT_SYMBOL_RATE
+from QPSK_MIMO_ldpc import LDPCCode, default_ldpc_code, decode_layered_min_sum, FEC_CODES, DEFAULT_MAX_ITERATIONS
+from QPSK_MIMO_profile import NULL_PROFILER
+
+SNR_RANGE = (0, 20)
+SNR_POINTS = 10
+RANDOM_SEED = 42
+CHANNEL_MODELS = ('manual', 'fiber', 'rayleigh')
+MAX_ANTENNAS = 128
+MAX_MODES = 32
+MAX_STREAMS = 256
+MIN_NOISE_VARIANCE = 1e-6  # donja granica procjene šuma za LLR (tvrdi izlaz K-best detektora)
+SWEEP_PROGRESS_START = 0.1  # udio napretka prije SNR sweepa (jedna tačka sweepa traje kao cijeli prolaz)
+
+BitSequence = Union[np.ndarray, List[int]]
+
+
+@dataclass
+class SimulationParameters:
+    """Input parameters of a single QPSK MIMO simulation run."""
+    num_bits: int = 500
+    snr_db: float = 10.0
+    num_tx_antennas: int = 2
+    num_rx_antennas: int = 2
+    num_modes: int = 2
+    channel_matrix: Optional[np.ndarray] = None
+    fiber_length: float = 100.0
+    attenuation: float = 0.2
+    snr_range: Tuple[float, float] = SNR_RANGE
+    snr_points: int = SNR_POINTS
+    seed: int = RANDOM_SEED
+    equalizer: str = 'none'
+    channel_model: str = 'manual'
+    dmd: float = 0.0
+    symbol_rate: float = DEFAULT_SYMBOL_RATE
+    channel_taps: Optional[np.ndarray] = None
+    equalizer_taps: Optional[int] = None
+    kbest_k: int = DEFAULT_K
+    fec: str = 'none'
+    ldpc_iterations: int = DEFAULT_MAX_ITERATIONS
+
+    def __post_init__(self):
+        if self.channel_taps is None and self.channel_matrix is None and self.channel_model == 'fiber' and self.dmd > 0:
+            self.channel_taps = fiber_impulse_response(self.num_rx_streams, self.num_tx_streams, self.fiber_length,
+                                                       self.attenuation, self.dmd, self.symbol_rate,
+                                                       rng=np.random.RandomState(self.seed))
+        if self.channel_taps is not None:
+            self.channel_taps = np.asarray(self.channel_taps)
+            if self.channel_matrix is None:
+                # Frekvencijski odziv na nultoj frekvenciji služi kao ravni kanal (kapacitet, ekvalizator)
+                self.channel_matrix = self.channel_taps.sum(axis=0)
+        if self.channel_matrix is None and self.channel_model == 'fiber':
+            self.channel_matrix = fiber_channel(self.num_rx_streams, self.num_tx_streams, self.fiber_length,
+                                                self.attenuation, rng=np.random.RandomState(self.seed))
+        elif self.channel_matrix is None and self.channel_model == 'rayleigh':
+            self.channel_matrix = random_channel_ensemble(1, self.num_rx_streams, self.num_tx_streams,
+                                                          rng=np.random.RandomState(self.seed))[0]
+        elif self.channel_matrix is None:
+            self.channel_matrix = default_channel_matrix(self.num_tx_antennas, self.num_rx_antennas, self.num_modes)
+        else:
+            self.channel_matrix = np.asarray(self.channel_matrix)
+
+    @property
+    def num_tx_streams(self) -> int:
+        """Number of transmit spatial channels (antennas x modes)."""
+        return self.num_tx_antennas * self.num_modes
+
+    @property
+    def num_rx_streams(self) -> int:
+        """Number of receive spatial channels (antennas x modes)."""
+        return self.num_rx_antennas * self.num_modes
+
+    @property
+    def num_detected_streams(self) -> int:
+        """Number of streams passed to the demodulator (transmit streams after equalization)."""
+        return self.num_rx_streams if self.equalizer == 'none' else self.num_tx_streams
+
+    @property
+    def channel_delay(self) -> int:
+        """Main cursor of the multi-tap channel (0 for a flat channel)."""
+        return 0 if self.channel_taps is None else main_cursor(self.channel_taps)
+
+    @property
+    def adaptive_taps(self) -> int:
+        """Length of the adaptive equalizer (twice the channel memory unless set explicitly)."""
+        if self.equalizer_taps is not None:
+            return self.equalizer_taps
+        return adaptive_num_taps(1 if self.channel_taps is None else self.channel_taps.shape[0])
+
+    @property
+    def snr_db_range(self) -> np.ndarray:
+        """SNR points (dB) used for the SNR vs BER and SNR vs capacity curves."""
+        return np.linspace(self.snr_range[0], self.snr_range[1], self.snr_points)
+
+    def validate(self):
+        """Check parameter ranges, raising ValueError with a user-facing message."""
+        if not 100 <= self.num_bits <= 1000:
+            raise ValueError("Broj bita mora biti između 100 i 1000.")
+        if not 0 <= self.snr_db <= 30:
+            raise ValueError("SNR mora biti između 0 i 30 dB.")
+        if not 1 <= self.fiber_length <= 1000:
+            raise ValueError("Dužina vlakna mora biti između 1 i 1000 km.")
+        if not 0.1 <= self.attenuation <= 1:
+            raise ValueError("Koeficijent slabljenja mora biti između 0.1 i 1 dB/km.")
+        if not 1 <= self.num_modes <= MAX_MODES:
+            raise ValueError(f"Broj modova mora biti između 1 i {MAX_MODES}.")
+        if not 1 <= self.num_tx_antennas <= MAX_ANTENNAS:
+            raise ValueError(f"Broj predajnih antena mora biti između 1 i {MAX_ANTENNAS}.")
+        if not 1 <= self.num_rx_antennas <= MAX_ANTENNAS:
+            raise ValueError(f"Broj prijemnih antena mora biti između 1 i {MAX_ANTENNAS}.")
+        if max(self.num_tx_streams, self.num_rx_streams) > MAX_STREAMS:
+            raise ValueError(f"Broj prostornih kanala (antene x modovi) mora biti najviše {MAX_STREAMS}.")
+        H = self.channel_matrix
+        if H.ndim != 2 or H.shape[0] != self.num_rx_streams or H.shape[1] != self.num_tx_streams:
+            raise ValueError("Dimenzije kanalne matrice ne odgovaraju broju antena i modova.")
+        if self.channel_taps is not None and (self.channel_taps.ndim != 3 or self.channel_taps.shape[1:] != H.shape):
+            raise ValueError("Dimenzije impulsnog odziva kanala ne odgovaraju kanalnoj matrici.")
+        if self.dmd < 0:
+            raise ValueError("DMD ne može biti negativan.")
+        if self.channel_model not in CHANNEL_MODELS:
+            raise ValueError(f"Nepoznat model kanala: {self.channel_model}")
+        if self.equalizer not in EQUALIZERS + ADAPTIVE_EQUALIZERS:
+            raise ValueError(f"Nepoznat ekvalizator: {self.equalizer}")
+        if self.kbest_k < 1:
+            raise ValueError("Parametar K za K-best detektor mora biti pozitivan.")
+        if self.fec not in FEC_CODES:
+            raise ValueError(f"Nepoznat FEC kod: {self.fec}")
+        if self.ldpc_iterations < 1:
+            raise ValueError("Broj LDPC iteracija mora biti pozitivan.")
+
+
+@dataclass
+class SimulationResult:
+    """Signals and metrics produced by run_simulation."""
+    bits: np.ndarray
+    qpsk_symbols: np.ndarray
+    tx_bits: np.ndarray
+    tx_signals: np.ndarray
+    rx_signals: np.ndarray
+    noise: np.ndarray
+    received_symbols: np.ndarray
+    equalized_symbols: np.ndarray
+    demodulated_bits: np.ndarray
+    ber: float
+    capacity: float
+    snr_db_range: np.ndarray = field(default_factory=lambda: np.array([]))
+    ber_values: List[float] = field(default_factory=list)
+    capacity_values: List[float] = field(default_factory=list)
+    water_filling_capacity_values: List[float] = field(default_factory=list)
+    stream_ber: np.ndarray = field(default_factory=lambda: np.array([]))
+    equalizer_mse: np.ndarray = field(default_factory=lambda: np.array([]))
+    post_fec_ber: float = np.nan
+    post_fec_ber_values: List[float] = field(default_factory=list)
+
+
+@dataclass
+class SweepPoint:
+    """One finished point of the SNR sweep, reported to the progress callback of run_simulation."""
+    index: int
+    snr_db: float
+    ber: float
+    capacity: float
+    water_filling_capacity: float
+    post_fec_ber: float = np.nan
+
+
+ProgressCallback = Callable[[float, str, Optional[SweepPoint]], None]
+
+
+def default_channel_matrix(num_tx_antennas: int, num_rx_antennas: int, num_modes: int) -> np.ndarray:
+    """Return the identity-padded default channel matrix for the given dimensions."""
+    new_matrix_size = (num_rx_antennas * num_modes, num_tx_antennas * num_modes)
+    default_matrix = np.eye(min(new_matrix_size))
+
+    if new_matrix_size[0] > new_matrix_size[1]:
+        padding = np.zeros((new_matrix_size[0] - new_matrix_size[1], new_matrix_size[1]))
+        default_matrix = np.vstack((default_matrix, padding))
+    elif new_matrix_size[1] > new_matrix_size[0]:
+        padding = np.zeros((new_matrix_size[0], new_matrix_size[1] - new_matrix_size[0]))
+        default_matrix = np.hstack((default_matrix, padding))
+    return default_matrix
+
+
+def parse_channel_matrix(text: str) -> np.ndarray:
+    """Parse a channel matrix written as a (nested list) literal, e.g. "[[1, 0.5j], [0.5, 1]]".
+
+    Only literals are accepted (no expressions are evaluated).
+    """
+    try:
+        H = np.array(ast.literal_eval(text.strip()))
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        raise ValueError("Neispravan format kanalne matrice.")
+    if H.ndim != 2 or H.dtype.kind not in 'biufc':
+        raise ValueError("Neispravan format kanalne matrice.")
+    return H
+
+
+def load_channel_matrix(path: str) -> np.ndarray:
+    """Load a channel matrix from a .npy/.npz file or a comma-separated .csv/.txt file.
+
+    A .npz archive must contain the matrix under the key 'H'. Text files may
+    hold complex entries written as 1+2j.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == '.npy':
+            H = np.load(path, allow_pickle=False)
+        elif extension == '.npz':
+            with np.load(path, allow_pickle=False) as archive:
+                H = archive['H']
+        else:
+            H = np.loadtxt(path, dtype=complex, delimiter=',', ndmin=2)
+            if not np.any(H.imag):
+                H = H.real
+    except (OSError, KeyError, ValueError):
+        raise ValueError(f"Kanalna matrica se ne može učitati iz datoteke: {path}")
+    if H.ndim != 2 or H.dtype.kind not in 'biufc':
+        raise ValueError("Neispravan format kanalne matrice.")
+    return H
+
+
+def generate_bits(num_bits: int, rng=None) -> np.ndarray:
+    """Generate random bits."""
+    if rng is None:
+        rng = np.random
+    return rng.randint(0, 2, num_bits)
+
+
+def get_qpsk_mapping() -> Dict[Tuple[int, int], complex]:
+    """Return the QPSK mapping dictionary."""
+    return {
+        (0, 0): complex(1/np.sqrt(2), 1/np.sqrt(2)),  # 00 -> 1+j
+        (0, 1): complex(-1/np.sqrt(2), 1/np.sqrt(2)), # 01 -> -1+j
+        (1, 0): complex(1/np.sqrt(2), -1/np.sqrt(2)), # 10 -> 1-j
+        (1, 1): complex(-1/np.sqrt(2), -1/np.sqrt(2))  # 11 -> -1-j
+    }
+
+
+# Simboli indeksirani sa 2*b0 + b1, isti redoslijed kao u get_qpsk_mapping
+QPSK_CONSTELLATION = np.array(list(get_qpsk_mapping().values()))
+
+
+def qpsk_modulate(bits: BitSequence) -> Tuple[np.ndarray, np.ndarray]:
+    """QPSK modulate the bits (a trailing odd bit is dropped)."""
+    bits = np.asarray(bits)
+    tx_bits = bits[:len(bits) - len(bits) % 2]
+    bit_pairs = tx_bits.reshape(-1, 2)
+    if np.any((bit_pairs != 0) & (bit_pairs != 1)):
+        raise ValueError("Invalid bit combination")
+    symbol_indices = 2 * bit_pairs[:, 0].astype(np.intp) + bit_pairs[:, 1]
+    return QPSK_CONSTELLATION[symbol_indices], tx_bits
+
+
+def generate_noise(signals: np.ndarray, snr_db: float, rng=None, signal_power: Optional[float] = None) -> np.ndarray:
+    """Generate AWGN noise.
+
+    The signal power is measured from signals unless it is given explicitly,
+    which keeps the noise level constant across frames of a longer stream.
+    """
+    if rng is None:
+        rng = np.random
+    snr_linear = 10**(snr_db / 10)
+    if signal_power is None:
+        signal_power = np.mean(np.abs(signals)**2)
+    noise_power = signal_power / snr_linear
+    noise_std = np.sqrt(noise_power / 2)
+    noise = noise_std * (rng.randn(*signals.shape) + 1j * rng.randn(*signals.shape))
+    return noise
+
+
+def noise_variance(signal_power: float, snr_db: float) -> float:
+    """Noise power added by generate_noise for the given signal power and SNR."""
+    return signal_power / 10**(snr_db / 10)
+
+
+def generate_biased_noise(signals: np.ndarray, snr_db: float, direction: np.ndarray, mean_shift: np.ndarray,
+                          variance_scale: float = 1.0, rng=None,
+                          signal_power: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """AWGN biased along one direction per time instant, for importance sampling.
+
+    direction has the shape of signals, with unit norm in every column under
+    the real inner product Re(sum(conj(d) * n)). Along it the noise,
+    normalized to the per-component noise std, is drawn as
+    N(mean_shift, variance_scale^2) instead of N(0, 1); orthogonal to it the
+    noise stays unbiased. Returns (noise, log_weights), where log_weights are
+    the log likelihood ratios log(p / q) of every time instant. The random
+    numbers are drawn as in generate_noise, so without bias both give the
+    same noise.
+    """
+    if rng is None:
+        rng = np.random
+    if signal_power is None:
+        signal_power = np.mean(np.abs(signals)**2)
+    noise_std = np.sqrt(noise_variance(signal_power, snr_db) / 2)
+    gaussian = rng.randn(*signals.shape) + 1j * rng.randn(*signals.shape)
+    unbiased = np.real(np.sum(np.conj(direction) * gaussian, axis=0))
+    biased = mean_shift + variance_scale * unbiased
+    gaussian += direction * (biased - unbiased)
+    log_weights = np.log(variance_scale) - biased**2 / 2 + unbiased**2 / 2
+    return noise_std * gaussian, log_weights
+
+
+def generate_noise_batch(signals: np.ndarray, snr_db_range: np.ndarray, rng=None,
+                         signal_power: Optional[float] = None, common_noise: bool = False) -> np.ndarray:
+    """Generate AWGN for every SNR point at once, with shape (points,) + signals.shape.
+
+    The signal power is computed once, and the random numbers are drawn in the
+    same order as calling generate_noise once per point, so both give
+    identical noise. With common_noise a single unit-variance draw is scaled
+    for every point instead (common random numbers), which makes the cost
+    independent of the number of points.
+    """
+    if rng is None:
+        rng = np.random
+    if signal_power is None:
+        signal_power = np.mean(np.abs(signals)**2)
+    noise_std = np.array([np.sqrt(signal_power / 10**(snr_db / 10) / 2) for snr_db in snr_db_range])
+    noise_std = noise_std.reshape((-1,) + (1,) * signals.ndim)
+    if common_noise:
+        return noise_std * (rng.randn(*signals.shape) + 1j * rng.randn(*signals.shape))
+    gaussian = rng.randn(len(noise_std), 2, *signals.shape)
+    return noise_std * (gaussian[:, 0] + 1j * gaussian[:, 1])
+
+
+def demodulate(received_symbols: np.ndarray, qpsk_mapping: Optional[Dict[Tuple[int, int], complex]] = None) -> np.ndarray:
+    """Demodulate the received symbols (minimum-distance hard decision).
+
+    Bits are returned symbol by symbol in time-major order, i.e. all receive
+    branches of the first time instant, then of the second, and so on. Leading
+    axes in front of the (receivers, time) matrix are kept, so a stack of
+    received matrices is demodulated in one call.
+    """
+    received_symbols = np.asarray(received_symbols)
+    batch_shape = received_symbols.shape[:-2]
+    received_stream = np.swapaxes(received_symbols, -1, -2).reshape(batch_shape + (-1,))
+    if qpsk_mapping is None or list(qpsk_mapping.items()) == list(get_qpsk_mapping().items()):
+        # Za Gray QPSK je odluka po minimalnoj udaljenosti isto što i odluka po predznaku
+        decisions = np.empty(received_stream.shape + (2,), dtype=np.uint8)
+        decisions[..., 0] = received_stream.imag < 0
+        decisions[..., 1] = received_stream.real < 0
+        return decisions.reshape(batch_shape + (-1,))
+    bit_labels = np.array(list(qpsk_mapping.keys()))
+    ref_symbols = np.array(list(qpsk_mapping.values()))
+    distances = np.abs(received_stream[..., np.newaxis] - ref_symbols)**2
+    return bit_labels[np.argmin(distances, axis=-1)].reshape(batch_shape + (-1,))
+
+
+def demodulate_llr(received_symbols: np.ndarray, noise_var: Union[float, np.ndarray],
+                   qpsk_mapping: Optional[Dict[Tuple[int, int], complex]] = None) -> np.ndarray:
+    """Max-log LLRs log(P(b=0) / P(b=1)) of every bit, in the same time-major order as demodulate.
+
+    noise_var is the complex noise variance, either one value or one value per
+    receive branch. For each bit the LLR is the difference between the
+    smallest scaled distance to a symbol carrying a 1 and to a symbol carrying
+    a 0.
+    """
+    if qpsk_mapping is None:
+        qpsk_mapping = get_qpsk_mapping()
+    bit_labels = np.array(list(qpsk_mapping.keys()), dtype=bool)
+    ref_symbols = np.array(list(qpsk_mapping.values()))
+    received_symbols = np.asarray(received_symbols)
+    batch_shape = received_symbols.shape[:-2]
+    noise_var = np.asarray(noise_var, dtype=float)
+    if noise_var.ndim > 0:
+        noise_var = noise_var[..., np.newaxis]
+    distances = np.abs(received_symbols[..., np.newaxis] - ref_symbols)**2 / noise_var[..., np.newaxis]
+    llr = np.stack([np.min(np.where(bit_labels[:, bit], distances, np.inf), axis=-1)
+                    - np.min(np.where(bit_labels[:, bit], np.inf, distances), axis=-1)
+                    for bit in range(bit_labels.shape[1])], axis=-1)
+    return np.swapaxes(llr, -2, -3).reshape(batch_shape + (-1,))
+
+
+def estimate_noise_variance(symbols: np.ndarray) -> np.ndarray:
+    """Decision-directed noise variance of every (equalized) stream."""
+    error = symbols - qpsk_hard_decision(symbols)
+    return np.maximum(np.mean(np.abs(error)**2, axis=-1), MIN_NOISE_VARIANCE)
+
+
+def fec_encode(bits: np.ndarray, code: LDPCCode, rng=None) -> np.ndarray:
+    """Encode bits into whole LDPC codewords; the last codeword is filled with random bits."""
+    num_codewords = max(1, -(-len(bits) // code.k))
+    info_bits = np.concatenate([bits, generate_bits(num_codewords * code.k - len(bits), rng)])
+    return code.encode(info_bits.reshape(num_codewords, code.k)).reshape(-1)
+
+
+def fec_decode(equalized_symbols: np.ndarray, code: LDPCCode, max_iterations: int = DEFAULT_MAX_ITERATIONS) -> np.ndarray:
+    """Decode every detected stream separately, returning its (streams x info bits) estimate."""
+    num_streams = equalized_symbols.shape[0]
+    llr = demodulate_llr(equalized_symbols, estimate_noise_variance(equalized_symbols))
+    stream_llr = llr.reshape(-1, num_streams, 2).transpose(1, 0, 2).reshape(-1, code.n)
+    decoded = decode_layered_min_sum(code, stream_llr, max_iterations).codewords
+    return decoded[:, code.info_positions].reshape(num_streams, -1)
+
+
+def post_fec_ber(bits: np.ndarray, equalized_symbols: np.ndarray, code: LDPCCode,
+                 max_iterations: int = DEFAULT_MAX_ITERATIONS) -> float:
+    """BER of the decoded info bits over all detected streams."""
+    if len(bits) == 0:
+        return np.nan
+    decoded = fec_decode(equalized_symbols, code, max_iterations)
+    return float(np.mean(decoded[:, :len(bits)] != np.asarray(bits)))
+
+
+def equalize_received(received_symbols: np.ndarray, H: np.ndarray, noise_var: float, kind: str,
+                      desired: Optional[np.ndarray] = None, num_taps: Optional[int] = None,
+                      kbest_k: int = DEFAULT_K) -> np.ndarray:
+    """Equalize with a fixed (cached) filter or, for 'lms'/'cma', the block adaptive equalizer.
+
+    desired are the transmitted symbols, used by the adaptive equalizers only;
+    kbest_k is the number of survivors of the K-best detector.
+    """
+    if kind in ADAPTIVE_EQUALIZERS:
+        return adaptive_equalize(received_symbols, H, noise_var, kind, desired, num_taps).symbols
+    return equalize(received_symbols, H, noise_var, kind, k=kbest_k)
+
+
+def calculate_ber(tx_bits: BitSequence, rx_bits: BitSequence) -> float:
+    """Calculate the Bit Error Rate."""
+    if len(tx_bits) == 0 or len(rx_bits) == 0:
+        return np.nan
+    min_length = min(len(tx_bits), len(rx_bits))
+    return np.mean(np.asarray(tx_bits[:min_length]) != np.asarray(rx_bits[:min_length]))
+
+
+def count_bit_errors(tx_bits: np.ndarray, demodulated_bits: np.ndarray, num_rx_streams: int) -> Tuple[int, int]:
+    """Count bit errors of every receive branch against the transmitted bits.
+
+    Returns (bit_errors, compared_bits). demodulated_bits are expected in the
+    time-major order produced by demodulate.
+    """
+    num_symbols = len(tx_bits) // 2
+    tx_pairs = np.asarray(tx_bits[:2 * num_symbols]).reshape(num_symbols, 1, 2)
+    rx_pairs = np.asarray(demodulated_bits).reshape(num_symbols, num_rx_streams, 2)
+    return int(np.count_nonzero(rx_pairs != tx_pairs)), rx_pairs.size
+
+
+def stream_ber(tx_bits: np.ndarray, demodulated_bits: np.ndarray, num_streams: int) -> np.ndarray:
+    """BER of every detected stream, in the time-major order produced by demodulate."""
+    num_symbols = len(tx_bits) // 2
+    if num_symbols == 0:
+        return np.full(num_streams, np.nan)
+    tx_pairs = np.asarray(tx_bits[:2 * num_symbols]).reshape(num_symbols, 1, 2)
+    rx_pairs = np.asarray(demodulated_bits).reshape(num_symbols, num_streams, 2)
+    return np.mean(rx_pairs != tx_pairs, axis=(0, 2))
+
+
+def equalized_noise_batch(rx_signals: np.ndarray, tx_bits: BitSequence, snr_db_range: np.ndarray, rng=None,
+                          common_noise: bool = False, H: Optional[np.ndarray] = None, equalizer: str = 'none',
+                          equalizer_taps: Optional[int] = None, kbest_k: int = DEFAULT_K) -> np.ndarray:
+    """Noisy (and, with an equalizer, equalized) signals for every SNR point, shape (points, streams, symbols).
+
+    See generate_noise_batch for common_noise. Every point is equalized with
+    the cached filter for its noise variance.
+    """
+    signal_power = np.mean(np.abs(rx_signals)**2)
+    received_stack = rx_signals + generate_noise_batch(rx_signals, snr_db_range, rng, signal_power, common_noise)
+    if equalizer != 'none':
+        desired = qpsk_modulate(tx_bits)[0] if equalizer in ADAPTIVE_EQUALIZERS else None
+        received_stack = np.stack([equalize_received(received, H, noise_variance(signal_power, snr_db), equalizer,
+                                                     desired, equalizer_taps, kbest_k)
+                                   for received, snr_db in zip(received_stack, snr_db_range)])
+    return received_stack
+
+
+def batch_ber(symbol_stack: np.ndarray, tx_bits: BitSequence) -> np.ndarray:
+    """Hard-decision BER of every (streams x symbols) matrix in the stack."""
+    demodulated_stack = demodulate(symbol_stack)
+    num_symbols = len(tx_bits) // 2
+    tx_pairs = np.asarray(tx_bits[:2 * num_symbols]).reshape(1, num_symbols, 1, 2)
+    rx_pairs = demodulated_stack.reshape(len(symbol_stack), num_symbols, -1, 2)
+    return np.mean(rx_pairs != tx_pairs, axis=(1, 2, 3))
+
+
+def batched_ber_curve(rx_signals: np.ndarray, tx_bits: BitSequence, snr_db_range: np.ndarray, rng=None,
+                      common_noise: bool = False, H: Optional[np.ndarray] = None, equalizer: str = 'none',
+                      equalizer_taps: Optional[int] = None, kbest_k: int = DEFAULT_K) -> np.ndarray:
+    """BER for every SNR point, evaluated over an (points x channels x symbols) noise tensor.
+
+    Equivalent to calling generate_noise, demodulate and count_bit_errors once
+    per point, but noise generation, detection and error counting each run as a
+    single vectorized call over the whole stack. See generate_noise_batch for
+    common_noise. With an equalizer, every point is equalized with the cached
+    filter for its noise variance before detection.
+    """
+    if len(tx_bits) == 0 or len(snr_db_range) == 0 or rx_signals.size == 0:
+        return np.full(len(snr_db_range), np.nan)
+    return batch_ber(equalized_noise_batch(rx_signals, tx_bits, snr_db_range, rng, common_noise, H, equalizer,
+                                           equalizer_taps, kbest_k), tx_bits)
+
+
+def apply_channel(params: SimulationParameters, tx_signals: np.ndarray) -> np.ndarray:
+    """Noise-free received signals: H @ x, or the aligned multi-tap convolution when channel_taps is set."""
+    if params.channel_taps is None:
+        return np.dot(params.channel_matrix, tx_signals)
+    return mimo_convolve(tx_signals, params.channel_taps, params.channel_delay)
+
+
+def calculate_capacity(H: np.ndarray, snr_db: float, num_tx_antennas: int, num_rx_antennas: int, num_modes: int) -> float:
+    """Calculate the equal-power channel capacity (square or rectangular H)."""
+    if num_rx_antennas * num_modes == 0 or num_tx_antennas * num_modes == 0:
+        return np.nan
+    return float(equal_power_capacity(eigenmode_gains(H), [snr_db], num_tx_antennas * num_modes)[0])
+
+
+def run_simulation(params: SimulationParameters, profiler=NULL_PROFILER,
+                   progress: Optional[ProgressCallback] = None) -> SimulationResult:
+    """Run the full QPSK MIMO simulation chain for the given parameters.
+
+    Every stage runs inside a span of profiler (see QPSK_MIMO_profile).
+    progress, if given, is called as progress(fraction, stage, point) at the
+    start of every stage and after every SNR point, with point a SweepPoint
+    once the point is finished. The sweep then runs point by point instead of
+    as one batch; the noise is drawn in the same order, so the result is
+    identical. An exception raised by progress aborts the run (cancellation).
+    """
+    def report(fraction: float, stage: str, point: Optional[SweepPoint] = None):
+        if progress is not None:
+            progress(fraction, stage, point)
+
+    rng = np.random.RandomState(params.seed)
+    H = params.channel_matrix
+
+    report(0.0, 'generisanje bita')
+    with profiler.span('generisanje bita'):
+        bits = generate_bits(params.num_bits, rng)
+
+    # Kanalno kodiranje (BER prije FEC-a se računa na kodiranim bitima)
+    code = default_ldpc_code() if params.fec == 'ldpc' else None
+    coded_bits = bits
+    if code is not None:
+        with profiler.span('FEC kodiranje'):
+            coded_bits = fec_encode(bits, code, rng)
+
+    # QPSK Modulacija
+    with profiler.span('QPSK modulacija'):
+        qpsk_symbols, tx_bits = qpsk_modulate(coded_bits)
+
+    # MIMO dio
+    tx_signals = np.tile(qpsk_symbols, (params.num_tx_streams, 1))
+
+    # Prijem signala
+    report(0.2 * SWEEP_PROGRESS_START, 'kanal')
+    with profiler.span('kanal'):
+        rx_signals = apply_channel(params, tx_signals)
+
+    # Dodavanje šuma (AWGN)
+    with profiler.span('šum'):
+        noise = generate_noise(rx_signals, params.snr_db, rng)
+        received_symbols = rx_signals + noise
+
+    # Ekvalizacija i demodulacija
+    report(0.4 * SWEEP_PROGRESS_START, 'ekvalizacija')
+    noise_var = noise_variance(np.mean(np.abs(rx_signals)**2), params.snr_db)
+    equalizer_mse = np.array([])
+    with profiler.span('ekvalizacija'):
+        if params.equalizer in ADAPTIVE_EQUALIZERS:
+            adaptive = adaptive_equalize(received_symbols, H, noise_var, params.equalizer, qpsk_symbols,
+                                         params.adaptive_taps)
+            equalized_symbols, equalizer_mse = adaptive.symbols, adaptive.mse
+        else:
+            equalized_symbols = equalize(received_symbols, H, noise_var, params.equalizer, k=params.kbest_k)
+    with profiler.span('demodulacija'):
+        demodulated_bits = demodulate(equalized_symbols)
+
+    report(0.8 * SWEEP_PROGRESS_START, 'BER i kapacitet')
+    with profiler.span('BER i kapacitet'):
+        bit_errors, compared_bits = count_bit_errors(tx_bits, demodulated_bits, params.num_detected_streams)
+        ber = bit_errors / compared_bits if compared_bits else np.nan
+        capacity = calculate_capacity(H, params.snr_db, params.num_tx_antennas, params.num_rx_antennas,
+                                      params.num_modes)
+
+    # SNR vs BER i SNR vs Kapacitet (kapacitet je jeftin, pa se računa prvi da bi tačke bile potpune)
+    snr_db_range = params.snr_db_range
+    with profiler.span('SNR sweep (kapacitet)'):
+        capacities = capacity_curves(H, snr_db_range)
+
+    post_fec_ber_value = np.nan
+    ber_values = []
+    post_fec_ber_values = []
+    report(SWEEP_PROGRESS_START, 'SNR sweep (BER)')
+    with profiler.span('SNR sweep (BER)'):
+        if code is not None:
+            post_fec_ber_value = post_fec_ber(bits, equalized_symbols, code, params.ldpc_iterations)
+        # Bez povratnog poziva sve tačke idu jednim vektorizovanim pozivom, inače tačka po tačka
+        if progress is None:
+            point_groups = [np.arange(len(snr_db_range))]
+        else:
+            point_groups = np.arange(len(snr_db_range))[:, np.newaxis]
+        for indices in point_groups:
+            if code is None:
+                ber_values += list(batched_ber_curve(rx_signals, tx_bits, snr_db_range[indices], rng, H=H,
+                                                     equalizer=params.equalizer, equalizer_taps=params.adaptive_taps,
+                                                     kbest_k=params.kbest_k))
+            else:
+                symbol_stack = equalized_noise_batch(rx_signals, tx_bits, snr_db_range[indices], rng, H=H,
+                                                     equalizer=params.equalizer, equalizer_taps=params.adaptive_taps,
+                                                     kbest_k=params.kbest_k)
+                ber_values += list(batch_ber(symbol_stack, tx_bits))
+                post_fec_ber_values += [post_fec_ber(bits, symbols, code, params.ldpc_iterations)
+                                        for symbols in symbol_stack]
+            for index in indices:
+                done = (index + 1) / len(snr_db_range)
+                report(SWEEP_PROGRESS_START + (1 - SWEEP_PROGRESS_START) * done, 'SNR sweep (BER)',
+                       SweepPoint(index=int(index), snr_db=float(snr_db_range[index]), ber=float(ber_values[index]),
+                                  capacity=float(capacities.equal_power[index]),
+                                  water_filling_capacity=float(capacities.water_filling[index]),
+                                  post_fec_ber=post_fec_ber_values[index] if code is not None else np.nan))
+
+    return SimulationResult(
+        bits=bits,
+        qpsk_symbols=qpsk_symbols,
+        tx_bits=np.asarray(tx_bits),
+        tx_signals=tx_signals,
+        rx_signals=rx_signals,
+        noise=noise,
+        received_symbols=received_symbols,
+        equalized_symbols=equalized_symbols,
+        demodulated_bits=np.asarray(demodulated_bits),
+        ber=ber,
+        capacity=capacity,
+        snr_db_range=snr_db_range,
+        ber_values=ber_values,
+        capacity_values=list(capacities.equal_power),
+        water_filling_capacity_values=list(capacities.water_filling),
+        stream_ber=stream_ber(tx_bits, demodulated_bits, params.num_detected_streams),
+        equalizer_mse=equalizer_mse,
+        post_fec_ber=post_fec_ber_value,
+        post_fec_ber_values=post_fec_ber_values,
+    )
@@ -0,0 +1,251 @@
+import unittest
+import os
+import sys
+import numpy as np
+from QPSK_MIMO_engine import (SimulationParameters, SimulationResult, run_simulation, default_channel_matrix,
+                              qpsk_modulate, demodulate, calculate_capacity, get_qpsk_mapping, generate_noise,
+                              count_bit_errors, batched_ber_curve, parse_channel_matrix, load_channel_matrix, stream_ber,
+                              generate_biased_noise)
+import tempfile
+
+def _reference_demodulate(received_symbols, qpsk_mapping):
+    """Symbol-by-symbol minimum-distance demodulator used as a reference."""
+    inverse_mapping = {value: key for key, value in qpsk_mapping.items()}
+    demodulated_bits = []
+    for rx_signal in received_symbols.T:
+        for symbol in rx_signal:
+            distances = [np.abs(symbol - ref_symbol)**2 for ref_symbol in qpsk_mapping.values()]
+            closest_symbol = list(qpsk_mapping.values())[int(np.argmin(distances))]
+            demodulated_bits.extend(inverse_mapping[closest_symbol])
+    return demodulated_bits
+
+class TestQPSK_MIMO_engine(unittest.TestCase):
+
+    ## @brief Testira da se engine može koristiti bez Tk i matplotlib biblioteka.
+    ## @details Provjerava da uvoz engine modula ne povlači GUI zavisnosti.
+    def test_engine_bez_gui_zavisnosti(self):
+        """
+        @brief Testira da se engine može koristiti bez Tk i matplotlib biblioteka.
+        @details Provjerava da uvoz engine modula ne povlači GUI zavisnosti.
+        """
+        print("\nTest: Engine bez GUI zavisnosti")
+        import subprocess
+        code = "import sys, QPSK_MIMO_engine; print('tkinter' in sys.modules or 'matplotlib' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        print(f"  Izlaz: {output.stdout.strip()}")
+        self.assertEqual(output.stdout.strip(), "False")
+
+    ## @brief Testira ponovljivost simulacije za isti seed.
+    ## @details Dva pokretanja sa istim parametrima moraju dati identične rezultate.
+    def test_ponovljivost_simulacije(self):
+        """
+        @brief Testira ponovljivost simulacije za isti seed.
+        @details Dva pokretanja sa istim parametrima moraju dati identične rezultate.
+        """
+        print("\nTest: Ponovljivost simulacije")
+        params = SimulationParameters(num_bits=400, snr_db=5)
+        first = run_simulation(params)
+        second = run_simulation(params)
+        print(f"  BER: {first.ber}, {second.ber}")
+        self.assertIsInstance(first, SimulationResult)
+        np.testing.assert_array_equal(first.received_symbols, second.received_symbols)
+        self.assertEqual(first.ber_values, second.ber_values)
+
+    ## @brief Testira dimenzije signala u rezultatu simulacije.
+    ## @details Broj redova mora odgovarati broju predajnih/prijemnih elemenata.
+    def test_dimenzije_rezultata(self):
+        """
+        @brief Testira dimenzije signala u rezultatu simulacije.
+        @details Broj redova mora odgovarati broju predajnih/prijemnih elemenata.
+        """
+        print("\nTest: Dimenzije rezultata")
+        params = SimulationParameters(num_bits=101, num_tx_antennas=3, num_rx_antennas=1, num_modes=2)
+        result = run_simulation(params)
+        print(f"  tx_signals: {result.tx_signals.shape}, received_symbols: {result.received_symbols.shape}")
+        self.assertEqual(result.tx_signals.shape, (6, 50))
+        self.assertEqual(result.received_symbols.shape, (2, 50))
+        self.assertEqual(len(result.tx_bits), 100)
+        self.assertEqual(len(result.ber_values), params.snr_points)
+
+    ## @brief Testira modulaciju i demodulaciju bez šuma.
+    ## @details Demodulirani biti moraju biti identični poslanim.
+    def test_modulacija_demodulacija_bez_suma(self):
+        """
+        @brief Testira modulaciju i demodulaciju bez šuma.
+        @details Demodulirani biti moraju biti identični poslanim.
+        """
+        print("\nTest: Modulacija i demodulacija bez šuma")
+        bits = np.array([0, 0, 0, 1, 1, 0, 1, 1])
+        symbols, tx_bits = qpsk_modulate(bits)
+        demodulated_bits = demodulate(symbols[np.newaxis, :])
+        print(f"  Simboli: {symbols}")
+        print(f"  Demodulirani biti: {list(demodulated_bits)}")
+        np.testing.assert_array_equal(demodulated_bits, tx_bits)
+
+    ## @brief Testira vektorizovanu modulaciju na neparnom broju bita.
+    ## @details Zadnji bit bez para se odbacuje, a nevažeće vrijednosti bita izazivaju ValueError.
+    def test_modulacija_neparan_broj_bita(self):
+        """
+        @brief Testira vektorizovanu modulaciju na neparnom broju bita.
+        @details Zadnji bit bez para se odbacuje, a nevažeće vrijednosti bita izazivaju ValueError.
+        """
+        print("\nTest: Modulacija neparnog broja bita")
+        symbols, tx_bits = qpsk_modulate([1, 1, 0, 1, 1])
+        mapping = get_qpsk_mapping()
+        print(f"  Simboli: {symbols}")
+        np.testing.assert_array_equal(symbols, [mapping[(1, 1)], mapping[(0, 1)]])
+        np.testing.assert_array_equal(tx_bits, [1, 1, 0, 1])
+        with self.assertRaises(ValueError):
+            qpsk_modulate([0, 2])
+
+    ## @brief Testira da je vektorizovana demodulacija identična referentnoj petlji.
+    ## @details Uključuje simbole tačno na granicama odlučivanja i izmijenjeni redoslijed mapiranja.
+    def test_demodulacija_identicna_referenci(self):
+        """
+        @brief Testira da je vektorizovana demodulacija identična referentnoj petlji.
+        @details Uključuje simbole tačno na granicama odlučivanja i izmijenjeni redoslijed mapiranja.
+        """
+        print("\nTest: Demodulacija identična referentnoj petlji")
+        rng = np.random.RandomState(7)
+        received_symbols = rng.randn(3, 200) + 1j * rng.randn(3, 200)
+        received_symbols[0, :20] = 0
+        received_symbols[1, :20] = 1j * rng.randn(20)
+        received_symbols[2, :20] = rng.randn(20)
+        mapping = get_qpsk_mapping()
+        reversed_mapping = dict(reversed(list(mapping.items())))
+        for qpsk_mapping in (mapping, reversed_mapping):
+            expected = _reference_demodulate(received_symbols, qpsk_mapping)
+            np.testing.assert_array_equal(demodulate(received_symbols, qpsk_mapping), expected)
+
+    ## @brief Testira batch proračun BER krive.
+    ## @details Batch proračun mora dati iste vrijednosti kao petlja po SNR tačkama sa istim seedom.
+    def test_batch_ber_kriva(self):
+        """
+        @brief Testira batch proračun BER krive.
+        @details Batch proračun mora dati iste vrijednosti kao petlja po SNR tačkama sa istim seedom.
+        """
+        print("\nTest: Batch BER kriva")
+        symbols, tx_bits = qpsk_modulate(np.random.RandomState(0).randint(0, 2, 1000))
+        rx_signals = np.dot(np.array([[1, 0.3], [0.2, 0.8]]), np.tile(symbols, (2, 1)))
+        snr_db_range = np.linspace(0, 12, 25)
+        rng = np.random.RandomState(5)
+        expected = [np.divide(*count_bit_errors(tx_bits, demodulate(rx_signals + generate_noise(rx_signals, snr_db, rng)), 2))
+                    for snr_db in snr_db_range]
+        ber_values = batched_ber_curve(rx_signals, tx_bits, snr_db_range, np.random.RandomState(5))
+        print(f"  BER (prve 3 tačke): {ber_values[:3]}")
+        np.testing.assert_array_equal(ber_values, expected)
+
+    ## @brief Testira BER krivu sa zajedničkim šumom.
+    ## @details Isti šum skaliran po tačkama daje monotono opadajući BER za jedan prijemni tok.
+    def test_batch_ber_kriva_zajednicki_sum(self):
+        """
+        @brief Testira BER krivu sa zajedničkim šumom.
+        @details Isti šum skaliran po tačkama daje monotono opadajući BER za jedan prijemni tok.
+        """
+        print("\nTest: Batch BER kriva sa zajedničkim šumom")
+        symbols, tx_bits = qpsk_modulate(np.random.RandomState(0).randint(0, 2, 20000))
+        ber_values = batched_ber_curve(symbols[np.newaxis, :], tx_bits, np.linspace(0, 10, 50),
+                                       np.random.RandomState(1), common_noise=True)
+        print(f"  BER (prva i zadnja tačka): {ber_values[0]}, {ber_values[-1]}")
+        self.assertTrue(np.all(np.diff(ber_values) <= 0))
+
+    ## @brief Testira pristrasni šum za importance sampling.
+    ## @details Bez pristrasnosti šum je isti kao generate_noise; sa pomakom se mijenja samo komponenta u zadanom smjeru, a srednja težina je 1.
+    def test_pristrasni_sum(self):
+        """
+        @brief Testira pristrasni šum za importance sampling.
+        @details Bez pristrasnosti šum je isti kao generate_noise; sa pomakom se mijenja samo komponenta u zadanom smjeru, a srednja težina je 1.
+        """
+        print("\nTest: Pristrasni šum za importance sampling")
+        signals = np.ones((2, 200000), dtype=complex)
+        direction = np.zeros_like(signals)
+        direction[0] = (1 + 1j) / 2
+        direction[1] = 1j / np.sqrt(2)
+        noise, log_weights = generate_biased_noise(signals, 10.0, direction, np.zeros(signals.shape[1]), 1.0,
+                                                   np.random.RandomState(3))
+        np.testing.assert_allclose(noise, generate_noise(signals, 10.0, np.random.RandomState(3)))
+        np.testing.assert_allclose(log_weights, 0.0)
+        noise, log_weights = generate_biased_noise(signals, 10.0, direction, np.full(signals.shape[1], 2.0), 1.5,
+                                                   np.random.RandomState(3))
+        projection = np.real(np.sum(np.conj(direction) * noise, axis=0)) / np.sqrt(0.1 / 2)
+        print(f"  Projekcija: sredina {projection.mean():.3f}, std {projection.std():.3f}; "
+              f"srednja težina {np.exp(log_weights).mean():.3f}")
+        self.assertAlmostEqual(projection.mean(), 2.0, delta=0.02)
+        self.assertAlmostEqual(projection.std(), 1.5, delta=0.02)
+        self.assertAlmostEqual(np.exp(log_weights).mean(), 1.0, delta=0.05)
+        orthogonal = np.real(np.sum(np.conj(1j * direction) * noise, axis=0)) / np.sqrt(0.1 / 2)
+        self.assertAlmostEqual(orthogonal.std(), 1.0, delta=0.02)
+
+    ## @brief Testira validaciju parametara.
+    ## @details Neispravne dimenzije kanalne matrice moraju izazvati ValueError.
+    def test_validacija_parametara(self):
+        """
+        @brief Testira validaciju parametara.
+        @details Neispravne dimenzije kanalne matrice moraju izazvati ValueError.
+        """
+        print("\nTest: Validacija parametara")
+        params = SimulationParameters(num_modes=1, channel_matrix=np.eye(3))
+        with self.assertRaises(ValueError):
+            params.validate()
+        with self.assertRaises(ValueError):
+            SimulationParameters(num_bits=50).validate()
+        SimulationParameters().validate()
+
+    ## @brief Testira kapacitet jedinične kanalne matrice.
+    ## @details Za H = I kapacitet je N * log2(1 + SNR/N).
+    def test_kapacitet_jedinicne_matrice(self):
+        """
+        @brief Testira kapacitet jedinične kanalne matrice.
+        @details Za H = I kapacitet je N * log2(1 + SNR/N).
+        """
+        print("\nTest: Kapacitet jedinične matrice")
+        H = default_channel_matrix(2, 2, 1)
+        capacity = calculate_capacity(H, 10, 2, 2, 1)
+        expected = 2 * np.log2(1 + 10 / 2)
+        print(f"  Izračunati kapacitet: {capacity}")
+        self.assertAlmostEqual(capacity, expected, places=6)
+
+    ## @brief Testira strukturirani unos kanalne matrice.
+    ## @details Literal se parsira bez izvršavanja izraza, a matrica se učitava iz .npy, .npz i .csv datoteka.
+    def test_unos_kanalne_matrice(self):
+        """
+        @brief Testira strukturirani unos kanalne matrice.
+        @details Literal se parsira bez izvršavanja izraza, a matrica se učitava iz .npy, .npz i .csv datoteka.
+        """
+        print("\nTest: Strukturirani unos kanalne matrice")
+        np.testing.assert_array_equal(parse_channel_matrix("[[1, 0.5j], [0.5, 1]]"), [[1, 0.5j], [0.5, 1]])
+        for text in ('__import__("os").getcwd()', '[1, 2]', "[['a']]", '[[1, 2], [3]]'):
+            with self.assertRaises(ValueError):
+                parse_channel_matrix(text)
+        H = np.arange(6).reshape(2, 3) + 1j * np.ones((2, 3))
+        with tempfile.TemporaryDirectory() as directory:
+            np.save(os.path.join(directory, 'H.npy'), H)
+            np.savez(os.path.join(directory, 'H.npz'), H=H)
+            np.savetxt(os.path.join(directory, 'H.csv'), H.real, delimiter=',')
+            np.testing.assert_array_equal(load_channel_matrix(os.path.join(directory, 'H.npy')), H)
+            np.testing.assert_array_equal(load_channel_matrix(os.path.join(directory, 'H.npz')), H)
+            np.testing.assert_array_equal(load_channel_matrix(os.path.join(directory, 'H.csv')), H.real)
+            with self.assertRaises(ValueError):
+                load_channel_matrix(os.path.join(directory, 'nema.csv'))
+
+    ## @brief Testira massive MIMO dimenzije.
+    ## @details Simulacija 128x128 kanala sa MMSE-SIC mora proći validaciju i dati BER po svakom toku.
+    def test_massive_mimo(self):
+        """
+        @brief Testira massive MIMO dimenzije.
+        @details Simulacija 128x128 kanala sa MMSE-SIC mora proći validaciju i dati BER po svakom toku.
+        """
+        print("\nTest: Massive MIMO 128x128")
+        params = SimulationParameters(num_tx_antennas=64, num_rx_antennas=64, num_modes=2, channel_model='rayleigh',
+                                      snr_db=20, equalizer='mmse-sic')
+        params.validate()
+        result = run_simulation(params)
+        self.assertEqual(result.stream_ber.shape, (128,))
+        self.assertAlmostEqual(float(np.mean(result.stream_ber)), result.ber)
+        with self.assertRaises(ValueError):
+            SimulationParameters(num_tx_antennas=129).validate()
+        tx_bits = np.array([0, 1, 1, 0])
+        np.testing.assert_array_equal(stream_ber(tx_bits, np.array([0, 1, 1, 1, 1, 0, 1, 0]), 2), [0.0, 0.25])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import numpy as np
+from QPSK_MIMO_engine import SimulationParameters, run_simulation, qpsk_modulate, demodulate, count_bit_errors
+from QPSK_MIMO_equalizer import FilterCache, equalize, mmse_filter, zf_filter, mmse_sic_filter, channel_fingerprint
+
+class TestQPSK_MIMO_equalizer(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(21)
+        self.H = (rng.randn(4, 4) + 1j * rng.randn(4, 4)) / np.sqrt(2)
+        bits = rng.randint(0, 2, 4 * 2 * 2000)
+        symbols, self.tx_bits = qpsk_modulate(bits)
+        # Nezavisni simboli po predajnom toku (vrijeme x tok -> tok x vrijeme)
+        self.tx_symbols = symbols.reshape(2000, 4).T
+        self.noise = (rng.randn(4, 2000) + 1j * rng.randn(4, 2000)) / np.sqrt(2)
+
+    def _ber(self, estimates):
+        demodulated = demodulate(estimates)
+        errors, compared = count_bit_errors(self.tx_bits, demodulated, 1)
+        return errors / compared
+
+    ## @brief Testira ZF i MMSE bez šuma.
+    ## @details Bez šuma ZF tačno vraća poslane simbole, a MMSE teži ZF kada varijansa šuma teži nuli.
+    def test_zf_i_mmse_bez_suma(self):
+        """
+        @brief Testira ZF i MMSE bez šuma.
+        @details Bez šuma ZF tačno vraća poslane simbole, a MMSE teži ZF kada varijansa šuma teži nuli.
+        """
+        print("\nTest: ZF i MMSE bez šuma")
+        cache = FilterCache()
+        received = self.H @ self.tx_symbols
+        np.testing.assert_allclose(equalize(received, self.H, 0.0, 'zf', cache), self.tx_symbols, atol=1e-10)
+        np.testing.assert_allclose(mmse_filter(self.H, 1e-12), zf_filter(self.H), atol=1e-8)
+        sic = equalize(received, self.H, 1e-12, 'mmse-sic', cache)
+        print(f"  Maksimalna greška MMSE-SIC: {np.max(np.abs(sic - self.tx_symbols)):.2e}")
+        np.testing.assert_allclose(sic, self.tx_symbols, atol=1e-6)
+
+    ## @brief Testira poređenje ekvalizatora sa šumom.
+    ## @details MMSE nije lošiji od ZF, a MMSE-SIC nije lošiji od MMSE na spregnutom kanalu.
+    def test_poredjenje_ekvalizatora(self):
+        """
+        @brief Testira poređenje ekvalizatora sa šumom.
+        @details MMSE nije lošiji od ZF, a MMSE-SIC nije lošiji od MMSE na spregnutom kanalu.
+        """
+        print("\nTest: Poređenje ekvalizatora")
+        noise_variance = 0.05
+        received = self.H @ self.tx_symbols + np.sqrt(noise_variance) * self.noise
+        ber = {kind: self._ber(equalize(received, self.H, noise_variance, kind, FilterCache()))
+               for kind in ('zf', 'mmse', 'mmse-sic')}
+        print(f"  BER: {ber}")
+        self.assertLessEqual(ber['mmse'], ber['zf'])
+        self.assertLessEqual(ber['mmse-sic'], ber['mmse'])
+
+    ## @brief Testira LRU keš filtera.
+    ## @details Ponovljeni poziv za isti kanal koristi keš, a najstariji unos se izbacuje kada je keš pun.
+    def test_lru_kes_filtera(self):
+        """
+        @brief Testira LRU keš filtera.
+        @details Ponovljeni poziv za isti kanal koristi keš, a najstariji unos se izbacuje kada je keš pun.
+        """
+        print("\nTest: LRU keš filtera")
+        cache = FilterCache(maxsize=2)
+        first = cache.get(self.H, 0.1, 'mmse')
+        self.assertIs(cache.get(self.H.copy(), 0.1, 'mmse'), first)
+        cache.get(self.H, 0.2, 'mmse')
+        cache.get(2 * self.H, 0.1, 'mmse')
+        print(f"  Pogoci: {cache.hits}, promašaji: {cache.misses}, veličina: {len(cache)}")
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 3, 2))
+        cache.get(self.H, 0.1, 'mmse')
+        self.assertEqual(cache.misses, 4)
+        self.assertNotEqual(channel_fingerprint(self.H), channel_fingerprint(self.H.T))
+
+    ## @brief Testira ekvalizator u simulaciji.
+    ## @details Ekvalizirani signal ima jedan red po predajnom toku, a nepoznat ekvalizator je greška.
+    def test_ekvalizator_u_simulaciji(self):
+        """
+        @brief Testira ekvalizator u simulaciji.
+        @details Ekvalizirani signal ima jedan red po predajnom toku, a nepoznat ekvalizator je greška.
+        """
+        print("\nTest: Ekvalizator u simulaciji")
+        params = SimulationParameters(num_tx_antennas=3, num_rx_antennas=2, num_modes=1, equalizer='mmse',
+                                      channel_matrix=[[1, 0.4, 0.1], [0.3, 1, 0.5]])
+        params.validate()
+        result = run_simulation(params)
+        print(f"  BER: {result.ber}, oblik: {result.equalized_symbols.shape}")
+        self.assertEqual(result.equalized_symbols.shape, (3, 250))
+        with self.assertRaises(ValueError):
+            SimulationParameters(equalizer='ml').validate()
+
+    ## @brief Testira MMSE-SIC filtere sa ažuriranjem inverzne matrice.
+    ## @details Redoslijed detekcije i filteri moraju biti isti kao uz ponovnu inverziju u svakom koraku.
+    def test_mmse_sic_azuriranje_inverza(self):
+        """
+        @brief Testira MMSE-SIC filtere sa ažuriranjem inverzne matrice.
+        @details Redoslijed detekcije i filteri moraju biti isti kao uz ponovnu inverziju u svakom koraku.
+        """
+        print("\nTest: MMSE-SIC sa ažuriranjem inverza")
+        rng = np.random.RandomState(8)
+        H = (rng.randn(24, 20) + 1j * rng.randn(24, 20)) / np.sqrt(2)
+        remaining = list(range(20))
+        for stream, filter_row, channel_column in mmse_sic_filter(H, 0.1):
+            H_remaining = H[:, remaining]
+            error_covariance = np.linalg.inv(H_remaining.conj().T @ H_remaining + 0.1 * np.eye(len(remaining)))
+            best = int(np.argmin(np.real(np.diag(error_covariance))))
+            self.assertEqual(stream, remaining.pop(best))
+            np.testing.assert_allclose(filter_row, (error_covariance @ H_remaining.conj().T)[best], atol=1e-10)
+            np.testing.assert_array_equal(channel_column, H[:, stream])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+"""LDPC forward error correction with a vectorized layered min-sum decoder.
+
+The code is a regular quasi-cyclic array code: the parity-check matrix is a
+column_weight x row_weight grid of cyclically shifted p x p identities, block
+(i, c) shifted by i * c. Every block row is a layer in which each code bit
+takes part in exactly one check, so one layer of the layered (turbo-decoding
+message passing) schedule is a single gather / min-sum / scatter over an
+array of shape (codewords, p, row_weight). Many codewords are decoded in
+parallel and each one leaves the batch as soon as its syndrome is zero.
+
+The default (6, 32)-regular code with p = 67 has the degree profile of the
+10GBASE-T (IEEE 802.3an) code: n = 2144, k = 1747, rate 0.81.
+"""
+import numpy as np
+from dataclasses import dataclass
+from typing import Optional
+
+FEC_CODES = ('none', 'ldpc')
+DEFAULT_BLOCK_SIZE = 67
+DEFAULT_COLUMN_WEIGHT = 6
+DEFAULT_ROW_WEIGHT = 32
+DEFAULT_MAX_ITERATIONS = 20
+MIN_SUM_NORMALIZATION = 0.75
+LLR_CLIP = 30.0
+
+
+def gf2_row_reduce(H: np.ndarray):
+    """Reduced row echelon form of a binary matrix, returning (rows, pivot columns)."""
+    H = np.array(H, dtype=bool)
+    pivots = []
+    row = 0
+    for column in range(H.shape[1]):
+        if row == H.shape[0]:
+            break
+        candidates = np.flatnonzero(H[row:, column])
+        if candidates.size == 0:
+            continue
+        pivot = row + candidates[0]
+        H[[row, pivot]] = H[[pivot, row]]
+        # Eliminacija stupca u svim ostalim redovima odjednom (XOR)
+        others = H[:, column].copy()
+        others[row] = False
+        H[others] ^= H[row]
+        pivots.append(column)
+        row += 1
+    return H[:row], np.array(pivots, dtype=np.intp)
+
+
+class LDPCCode:
+    """Binary LDPC code given by its layers of check-node column indices.
+
+    check_columns has shape (layers, checks per layer, row weight); within a
+    layer every column index appears at most once. Encoding is systematic on
+    info_positions, with the parity bits on the pivot columns of the
+    row-reduced parity-check matrix.
+    """
+
+    def __init__(self, check_columns: np.ndarray, n: int):
+        self.check_columns = np.asarray(check_columns, dtype=np.intp)
+        self.n = n
+        H = np.zeros((self.check_columns.shape[0] * self.check_columns.shape[1], n), dtype=bool)
+        rows = np.repeat(np.arange(H.shape[0]), self.check_columns.shape[2])
+        H[rows, self.check_columns.reshape(-1)] = True
+        reduced, self.parity_positions = gf2_row_reduce(H)
+        self.info_positions = np.setdiff1d(np.arange(n), self.parity_positions)
+        self.parity_matrix = reduced[:, self.info_positions].astype(np.int32)
+        self.k = self.info_positions.size
+
+    @property
+    def rate(self) -> float:
+        return self.k / self.n
+
+    @property
+    def parity_check_matrix(self) -> np.ndarray:
+        """Dense (checks x n) parity-check matrix."""
+        H = np.zeros((self.check_columns.shape[0] * self.check_columns.shape[1], self.n), dtype=np.uint8)
+        rows = np.repeat(np.arange(H.shape[0]), self.check_columns.shape[2])
+        H[rows, self.check_columns.reshape(-1)] = 1
+        return H
+
+    def encode(self, info_bits: np.ndarray) -> np.ndarray:
+        """Encode a (codewords x k) array of info bits into (codewords x n) codewords."""
+        info_bits = np.atleast_2d(info_bits)
+        codewords = np.empty((info_bits.shape[0], self.n), dtype=np.int8)
+        codewords[:, self.info_positions] = info_bits
+        codewords[:, self.parity_positions] = (info_bits.astype(np.int32) @ self.parity_matrix.T) % 2
+        return codewords
+
+    def syndrome_ok(self, hard_bits: np.ndarray) -> np.ndarray:
+        """True for every row of hard_bits (codewords x n) that satisfies all checks."""
+        ok = np.ones(hard_bits.shape[0], dtype=bool)
+        for columns in self.check_columns:
+            ok &= ~np.any(np.logical_xor.reduce(hard_bits[:, columns], axis=-1), axis=-1)
+        return ok
+
+
+def array_ldpc_code(block_size: int = DEFAULT_BLOCK_SIZE, column_weight: int = DEFAULT_COLUMN_WEIGHT,
+                    row_weight: int = DEFAULT_ROW_WEIGHT) -> LDPCCode:
+    """Quasi-cyclic array LDPC code with prime block_size (girth at least 6)."""
+    if column_weight > block_size or row_weight > block_size:
+        raise ValueError("Težine LDPC koda ne mogu biti veće od veličine bloka.")
+    checks = np.arange(block_size)
+    block_columns = np.arange(row_weight)
+    check_columns = np.stack([
+        block_columns * block_size + (checks[:, np.newaxis] + layer * block_columns) % block_size
+        for layer in range(column_weight)
+    ])
+    return LDPCCode(check_columns, block_size * row_weight)
+
+
+_DEFAULT_CODE: Optional[LDPCCode] = None
+
+
+def default_ldpc_code() -> LDPCCode:
+    """Default (6, 32)-regular array code, built once."""
+    global _DEFAULT_CODE
+    if _DEFAULT_CODE is None:
+        _DEFAULT_CODE = array_ldpc_code()
+    return _DEFAULT_CODE
+
+
+@dataclass
+class DecodeResult:
+    """Hard decoded codewords with the iteration count and convergence of each codeword."""
+    codewords: np.ndarray
+    iterations: np.ndarray
+    converged: np.ndarray
+
+
+def decode_layered_min_sum(code: LDPCCode, llr: np.ndarray, max_iterations: int = DEFAULT_MAX_ITERATIONS,
+                           normalization: float = MIN_SUM_NORMALIZATION) -> DecodeResult:
+    """Decode (codewords x n) channel LLRs (log P(0)/P(1)) with normalized layered min-sum.
+
+    Codewords whose syndrome is satisfied after an iteration are frozen and
+    dropped from the working arrays, so the cost follows the number of
+    codewords that still need iterations.
+    """
+    llr = np.clip(np.atleast_2d(llr), -LLR_CLIP, LLR_CLIP).astype(np.float32)
+    num_codewords = llr.shape[0]
+    num_layers, num_checks, row_weight = code.check_columns.shape
+    codewords = (llr < 0).astype(np.int8)
+    iterations = np.zeros(num_codewords, dtype=int)
+    converged = code.syndrome_ok(codewords)
+
+    # Kodne riječi su posljednja osa, pa je svako skupljanje po bitu kopija susjednih elemenata
+    active = np.flatnonzero(~converged)
+    posterior = np.ascontiguousarray(llr[active].T)
+    check_messages = np.zeros((num_layers, num_checks, row_weight, active.size), dtype=np.float32)
+    for iteration in range(1, max_iterations + 1):
+        if active.size == 0:
+            break
+        for layer, columns in enumerate(code.check_columns):
+            variable_messages = posterior[columns] - check_messages[layer]
+            magnitudes = np.abs(variable_messages)
+            smallest = magnitudes.min(axis=1, keepdims=True)
+            is_smallest = magnitudes == smallest
+            # Svaka grana dobija minimum ostalih grana: drugi minimum za granu sa minimumom, inače prvi
+            second = np.where(is_smallest, np.float32(np.inf), magnitudes).min(axis=1, keepdims=True)
+            ties = np.add.reduce(is_smallest, axis=1, dtype=np.uint8, keepdims=True) > 1
+            second = np.where(ties, smallest, second)
+            # Predznak ostalih grana = predznak cijele provjere puta predznak same grane
+            parity = np.add.reduce(variable_messages < 0, axis=1, dtype=np.uint8, keepdims=True) & 1
+            check_sign = (1 - 2 * parity.astype(np.float32)) * np.float32(normalization)
+            messages = np.copysign(np.where(is_smallest, second, smallest), variable_messages) * check_sign
+            check_messages[layer] = messages
+            posterior[columns] = variable_messages + messages
+        hard = (posterior.T < 0).astype(np.int8)
+        done = code.syndrome_ok(hard)
+        codewords[active] = hard
+        iterations[active] = iteration
+        converged[active[done]] = True
+        if np.any(done):
+            keep = ~done
+            active, posterior, check_messages = active[keep], posterior[:, keep], check_messages[..., keep]
+    return DecodeResult(codewords=codewords, iterations=iterations, converged=converged)
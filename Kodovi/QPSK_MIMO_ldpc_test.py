@@ -0,0 +1,107 @@
+import time
+import unittest
+import numpy as np
+from QPSK_MIMO_ldpc import array_ldpc_code, default_ldpc_code, decode_layered_min_sum, gf2_row_reduce
+from QPSK_MIMO_engine import (SimulationParameters, run_simulation, demodulate, demodulate_llr, qpsk_modulate,
+                              generate_bits)
+from QPSK_MIMO_monte_carlo import run_monte_carlo
+
+class TestQPSK_MIMO_ldpc(unittest.TestCase):
+
+    def _noisy_llr(self, code, ebn0_db, num_codewords, seed):
+        rng = np.random.RandomState(seed)
+        info_bits = rng.randint(0, 2, (num_codewords, code.k))
+        codewords = code.encode(info_bits)
+        noise_var = 1 / (2 * code.rate * 10**(ebn0_db / 10))
+        received = 1 - 2.0 * codewords + np.sqrt(noise_var) * rng.randn(*codewords.shape)
+        return info_bits, codewords, 2 * received / noise_var
+
+    ## @brief Testira konstrukciju i koder LDPC koda.
+    ## @details Svaka kodna riječ mora zadovoljiti H c = 0, a info biti moraju biti sistematski prepisani.
+    def test_koder(self):
+        """
+        @brief Testira konstrukciju i koder LDPC koda.
+        @details Svaka kodna riječ mora zadovoljiti H c = 0, a info biti moraju biti sistematski prepisani.
+        """
+        print("\nTest: LDPC koder")
+        code = default_ldpc_code()
+        self.assertEqual((code.n, code.k), (2144, 1747))
+        H = code.parity_check_matrix
+        np.testing.assert_array_equal(H.sum(axis=0), 6)
+        np.testing.assert_array_equal(H.sum(axis=1), 32)
+        info_bits = np.random.RandomState(1).randint(0, 2, (5, code.k))
+        codewords = code.encode(info_bits)
+        np.testing.assert_array_equal((codewords.astype(int) @ H.T) % 2, 0)
+        np.testing.assert_array_equal(codewords[:, code.info_positions], info_bits)
+        self.assertTrue(np.all(code.syndrome_ok(codewords)))
+        reduced, pivots = gf2_row_reduce(np.array([[1, 1, 0], [0, 1, 1], [1, 0, 1]]))
+        self.assertEqual(list(pivots), [0, 1])
+
+    ## @brief Testira slojeviti min-sum dekoder.
+    ## @details Iznad praga svi blokovi se dekodiraju bez greške, a dekodiranje se prekida čim je sindrom nula.
+    def test_dekoder(self):
+        """
+        @brief Testira slojeviti min-sum dekoder.
+        @details Iznad praga svi blokovi se dekodiraju bez greške, a dekodiranje se prekida čim je sindrom nula.
+        """
+        print("\nTest: Slojeviti min-sum dekoder")
+        code = default_ldpc_code()
+        info_bits, codewords, llr = self._noisy_llr(code, 4.5, 100, 2)
+        self.assertGreater(np.mean((llr < 0) != codewords), 0.01)
+        start = time.perf_counter()
+        result = decode_layered_min_sum(code, llr)
+        throughput = info_bits.size / (time.perf_counter() - start) / 1e6
+        print(f"  Prosječno iteracija: {result.iterations.mean():.2f}, propusnost: {throughput:.1f} Mbit/s")
+        self.assertTrue(np.all(result.converged))
+        np.testing.assert_array_equal(result.codewords[:, code.info_positions], info_bits)
+        self.assertLess(result.iterations.max(), 20)
+        # Ispravne kodne riječi ne prolaze nijednu iteraciju
+        clean = decode_layered_min_sum(code, 10.0 * (1 - 2.0 * codewords[:3]))
+        np.testing.assert_array_equal(clean.iterations, 0)
+        # Manji kod iste konstrukcije
+        small = array_ldpc_code(7, 3, 7)
+        self.assertEqual(small.n, 49)
+        self.assertTrue(np.all(small.syndrome_ok(small.encode(np.ones((2, small.k), dtype=int)))))
+
+    ## @brief Testira meki (max-log LLR) demaper.
+    ## @details Za Gray QPSK LLR mora biti 2 sqrt(2) Im(y) / s^2 za prvi i 2 sqrt(2) Re(y) / s^2 za drugi bit.
+    def test_llr_demaper(self):
+        """
+        @brief Testira meki (max-log LLR) demaper.
+        @details Za Gray QPSK LLR mora biti 2 sqrt(2) Im(y) / s^2 za prvi i 2 sqrt(2) Re(y) / s^2 za drugi bit.
+        """
+        print("\nTest: Max-log LLR demaper")
+        rng = np.random.RandomState(3)
+        symbols = rng.randn(3, 50) + 1j * rng.randn(3, 50)
+        noise_var = np.array([0.5, 1.0, 2.0])
+        llr = demodulate_llr(symbols, noise_var).reshape(50, 3, 2)
+        expected = 2 * np.sqrt(2) * np.stack([symbols.imag, symbols.real], axis=-1) / noise_var[:, np.newaxis, np.newaxis]
+        np.testing.assert_allclose(llr, expected.transpose(1, 0, 2), atol=1e-12)
+        np.testing.assert_array_equal(demodulate_llr(symbols, 1.0) < 0, demodulate(symbols).astype(bool))
+        qpsk_symbols, bits = qpsk_modulate(generate_bits(100, rng))
+        np.testing.assert_array_equal((demodulate_llr(qpsk_symbols[np.newaxis], 0.1) < 0).astype(int), bits)
+
+    ## @brief Testira BER prije i nakon FEC-a u simulaciji.
+    ## @details Sa LDPC kodom simulacija daje BER nakon dekodiranja, koji je manji od BER-a prije FEC-a.
+    def test_simulacija_sa_fec(self):
+        """
+        @brief Testira BER prije i nakon FEC-a u simulaciji.
+        @details Sa LDPC kodom simulacija daje BER nakon dekodiranja, koji je manji od BER-a prije FEC-a.
+        """
+        print("\nTest: Simulacija sa LDPC kodom")
+        params = SimulationParameters(snr_db=7.0, equalizer='mmse', fec='ldpc')
+        params.validate()
+        result = run_simulation(params)
+        self.assertEqual(len(result.tx_bits), default_ldpc_code().n)
+        self.assertGreater(result.ber, 0)
+        self.assertEqual(result.post_fec_ber, 0)
+        self.assertEqual(len(result.post_fec_ber_values), params.snr_points)
+        self.assertTrue(np.isnan(run_simulation(SimulationParameters()).post_fec_ber))
+        coded = run_monte_carlo(params, max_bits=20000, target_errors=10**6)
+        uncoded = run_monte_carlo(SimulationParameters(snr_db=7.0, equalizer='mmse'), max_bits=20000, target_errors=10**6)
+        self.assertLess(coded.ber, uncoded.ber)
+        with self.assertRaises(ValueError):
+            SimulationParameters(fec='turbo').validate()
+
+if __name__ == '__main__':
+    unittest.main()
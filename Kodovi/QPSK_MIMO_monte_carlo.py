@@ -0,0 +1,287 @@
+"""Monte Carlo BER estimation around the QPSK MIMO simulation chain.
+
+Frames are pushed through modulation, channel, noise and demodulation until
+either a target number of bit errors or a bit budget is reached, and the BER
+is reported together with a binomial confidence interval. With LDPC coding
+enabled the errors are counted on the decoded info bits (post-FEC BER).
+
+Below about 1e-7 plain Monte Carlo needs too many bits, and
+run_importance_sampling is used instead. Every symbol has one target bit,
+cycling through all bit positions of all detected streams. Its noise is drawn
+with the mean shifted toward the decision boundary (and/or a scaled variance)
+along the noise direction that the bit's decision depends on. Errors are
+reweighted by the likelihood ratio, which keeps the estimate unbiased, and
+the sample variance of the weighted errors gives its variance. The direction
+comes from the ZF or MMSE filter row of the stream, so the estimator needs a
+memoryless chain: no adaptive equalizer, no multi-tap channel, no FEC.
+"""
+import numpy as np
+from scipy import stats
+from dataclasses import dataclass
+from typing import Tuple, List, Optional
+
+from QPSK_MIMO_engine import (SimulationParameters, generate_bits, qpsk_modulate, generate_noise, demodulate,
+                              count_bit_errors, noise_variance, apply_channel, equalize_received, fec_encode,
+                              fec_decode, generate_biased_noise)
+from QPSK_MIMO_equalizer import zf_filter, mmse_filter
+from QPSK_MIMO_adaptive import ADAPTIVE_EQUALIZERS
+from QPSK_MIMO_ldpc import default_ldpc_code
+
+DEFAULT_TARGET_ERRORS = 100
+DEFAULT_MAX_BITS = 10**7
+DEFAULT_FRAME_BITS = 10**4
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MEAN_SHIFT = 1.0               # pomak šuma kao udio udaljenosti do granice odluke (1 = na granicu)
+DEFAULT_VARIANCE_SCALE = 1.0
+DEFAULT_TARGET_RELATIVE_ERROR = 0.05   # relativna standardna greška procjene kod koje se IS zaustavlja
+DEFAULT_IS_MAX_BITS = 10**6
+MIN_IS_ERRORS = 100                    # najmanji broj grešaka pod pristrasnim šumom prije zaustavljanja
+
+
+@dataclass
+class MonteCarloResult:
+    """BER estimate of one SNR point with its confidence interval."""
+    snr_db: float
+    bit_errors: int
+    num_bits: int
+    num_frames: int
+    ber: float
+    ci_low: float
+    ci_high: float
+    confidence: float
+    method: str
+
+
+def wilson_interval(bit_errors: int, num_bits: int, confidence: float = DEFAULT_CONFIDENCE) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion."""
+    if num_bits == 0:
+        return 0.0, 1.0
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    p = bit_errors / num_bits
+    denominator = 1 + z**2 / num_bits
+    center = (p + z**2 / (2 * num_bits)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / num_bits + z**2 / (4 * num_bits**2)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def clopper_pearson_interval(bit_errors: int, num_bits: int, confidence: float = DEFAULT_CONFIDENCE) -> Tuple[float, float]:
+    """Exact (Clopper-Pearson) interval for a binomial proportion."""
+    if num_bits == 0:
+        return 0.0, 1.0
+    alpha = 1 - confidence
+    low = stats.beta.ppf(alpha / 2, bit_errors, num_bits - bit_errors + 1) if bit_errors > 0 else 0.0
+    high = stats.beta.ppf(1 - alpha / 2, bit_errors + 1, num_bits - bit_errors) if bit_errors < num_bits else 1.0
+    return float(low), float(high)
+
+
+@dataclass
+class ImportanceSamplingResult:
+    """Importance-sampling BER estimate of one SNR point with its variance.
+
+    num_bits are the weighted target bits (one per symbol), biased_errors the
+    errors counted under the biased noise before reweighting.
+    """
+    snr_db: float
+    biased_errors: int
+    num_bits: int
+    num_frames: int
+    ber: float
+    variance: float
+    ci_low: float
+    ci_high: float
+    confidence: float
+    mean_shift: float
+    variance_scale: float
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate relative to the estimate."""
+        return float(np.sqrt(self.variance) / self.ber) if self.ber > 0 else np.inf
+
+
+CONFIDENCE_INTERVALS = {
+    'wilson': wilson_interval,
+    'clopper-pearson': clopper_pearson_interval,
+}
+
+
+def simulate_frame(params: SimulationParameters, snr_db: float, frame_bits: int, rng) -> Tuple[int, int]:
+    """Run one frame through the simulation chain and return (bit_errors, compared_bits).
+
+    With params.fec == 'ldpc', frame_bits info bits are encoded and the errors
+    are counted after decoding.
+    """
+    bits = generate_bits(frame_bits, rng)
+    code = default_ldpc_code() if params.fec == 'ldpc' else None
+    qpsk_symbols, tx_bits = qpsk_modulate(bits if code is None else fec_encode(bits, code, rng))
+    tx_signals = np.tile(qpsk_symbols, (params.num_tx_streams, 1))
+    rx_signals = apply_channel(params, tx_signals)
+    signal_power = np.mean(np.abs(rx_signals)**2)
+    received_symbols = rx_signals + generate_noise(rx_signals, snr_db, rng, signal_power)
+    equalized_symbols = equalize_received(received_symbols, params.channel_matrix, noise_variance(signal_power, snr_db),
+                                          params.equalizer, qpsk_symbols, params.adaptive_taps, params.kbest_k)
+    if code is not None:
+        decoded = fec_decode(equalized_symbols, code, params.ldpc_iterations)[:, :len(bits)]
+        return int(np.count_nonzero(decoded != bits)), decoded.size
+    demodulated_bits = demodulate(equalized_symbols)
+    return count_bit_errors(tx_bits, demodulated_bits, params.num_detected_streams)
+
+
+def run_monte_carlo(params: SimulationParameters, snr_db: Optional[float] = None,
+                    target_errors: int = DEFAULT_TARGET_ERRORS, max_bits: int = DEFAULT_MAX_BITS,
+                    frame_bits: int = DEFAULT_FRAME_BITS, confidence: float = DEFAULT_CONFIDENCE,
+                    method: str = 'wilson', rng=None) -> MonteCarloResult:
+    """Estimate the BER at one SNR point.
+
+    Frames of frame_bits transmitted bits are simulated until target_errors bit
+    errors are counted or max_bits transmitted bits are spent.
+    """
+    if method not in CONFIDENCE_INTERVALS:
+        raise ValueError(f"Nepoznata metoda intervala povjerenja: {method}")
+    if frame_bits < 2 or max_bits < 2:
+        raise ValueError("Okvir i budžet bita moraju sadržavati barem jedan QPSK simbol.")
+    if snr_db is None:
+        snr_db = params.snr_db
+    if rng is None:
+        rng = np.random.RandomState(params.seed)
+
+    bit_errors = 0
+    num_bits = 0
+    transmitted_bits = 0
+    num_frames = 0
+    while bit_errors < target_errors and transmitted_bits + 2 <= max_bits:
+        current_frame_bits = min(frame_bits, max_bits - transmitted_bits)
+        frame_errors, frame_compared = simulate_frame(params, snr_db, current_frame_bits, rng)
+        bit_errors += frame_errors
+        num_bits += frame_compared
+        transmitted_bits += current_frame_bits
+        num_frames += 1
+
+    ber = bit_errors / num_bits if num_bits else np.nan
+    ci_low, ci_high = CONFIDENCE_INTERVALS[method](bit_errors, num_bits, confidence)
+    return MonteCarloResult(snr_db=snr_db, bit_errors=bit_errors, num_bits=num_bits, num_frames=num_frames,
+                            ber=ber, ci_low=ci_low, ci_high=ci_high, confidence=confidence, method=method)
+
+
+def monte_carlo_ber_curve(params: SimulationParameters, snr_db_range: Optional[np.ndarray] = None,
+                          **kwargs) -> List[MonteCarloResult]:
+    """Run run_monte_carlo for every SNR point, sharing one random stream."""
+    if snr_db_range is None:
+        snr_db_range = params.snr_db_range
+    rng = kwargs.pop('rng', None)
+    if rng is None:
+        rng = np.random.RandomState(params.seed)
+    return [run_monte_carlo(params, snr_db_val, rng=rng, **kwargs) for snr_db_val in snr_db_range]
+
+
+def decision_directions(params: SimulationParameters, rx_signals: np.ndarray,
+                        noise_var: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Target bit of every symbol and the noise direction its decision depends on.
+
+    Returns (streams, bits, direction, distance): the detected stream and bit
+    (0 = imaginary, 1 = real part) of the target, the unit noise direction
+    with shape (receivers, symbols) and the noise-free decision statistic
+    along it, i.e. how far the noise has to go to reach the boundary.
+    """
+    num_symbols = rx_signals.shape[1]
+    positions = np.arange(num_symbols) % (2 * params.num_detected_streams)
+    streams, bits = positions // 2, positions % 2
+    if params.equalizer == 'none':
+        rows = np.eye(rx_signals.shape[0], dtype=complex)[streams]
+    elif params.equalizer == 'zf':
+        rows = zf_filter(params.channel_matrix)[streams]
+    else:
+        # MMSE red je i za SIC/K-best dobar smjer; smjer utiče samo na varijansu, ne na nepristrasnost
+        rows = mmse_filter(params.channel_matrix, noise_var)[streams]
+    # Im(w n) = Re(-j w n): bit 0 odlučuje imaginarni dio
+    rows = rows * np.where(bits == 0, -1j, 1.0)[:, np.newaxis]
+    norms = np.linalg.norm(rows, axis=1)
+    distance = np.real(np.sum(rows * rx_signals.T, axis=1)) / norms
+    return streams, bits, (rows.conj() / norms[:, np.newaxis]).T, distance
+
+
+def importance_sampling_frame(params: SimulationParameters, snr_db: float, frame_bits: int, mean_shift: float,
+                              variance_scale: float, rng) -> Tuple[np.ndarray, int]:
+    """Run one frame with biased noise; returns (weighted target errors, biased error count)."""
+    qpsk_symbols, tx_bits = qpsk_modulate(generate_bits(frame_bits, rng))
+    tx_signals = np.tile(qpsk_symbols, (params.num_tx_streams, 1))
+    rx_signals = apply_channel(params, tx_signals)
+    signal_power = np.mean(np.abs(rx_signals)**2)
+    noise_var = noise_variance(signal_power, snr_db)
+    streams, bits, direction, distance = decision_directions(params, rx_signals, noise_var)
+    shift = -mean_shift * distance / np.sqrt(noise_var / 2)
+    noise, log_weights = generate_biased_noise(rx_signals, snr_db, direction, shift, variance_scale, rng,
+                                               signal_power)
+    equalized_symbols = equalize_received(rx_signals + noise, params.channel_matrix, noise_var, params.equalizer,
+                                          kbest_k=params.kbest_k)
+    num_symbols = len(qpsk_symbols)
+    rx_pairs = demodulate(equalized_symbols).reshape(num_symbols, params.num_detected_streams, 2)
+    symbols = np.arange(num_symbols)
+    errors = rx_pairs[symbols, streams, bits] != tx_bits.reshape(num_symbols, 2)[symbols, bits]
+    return np.where(errors, np.exp(log_weights), 0.0), int(np.count_nonzero(errors))
+
+
+def run_importance_sampling(params: SimulationParameters, snr_db: Optional[float] = None,
+                            mean_shift: float = DEFAULT_MEAN_SHIFT, variance_scale: float = DEFAULT_VARIANCE_SCALE,
+                            target_relative_error: float = DEFAULT_TARGET_RELATIVE_ERROR,
+                            max_bits: int = DEFAULT_IS_MAX_BITS, frame_bits: int = DEFAULT_FRAME_BITS,
+                            confidence: float = DEFAULT_CONFIDENCE, rng=None) -> ImportanceSamplingResult:
+    """Estimate the BER at one SNR point by importance sampling.
+
+    Frames of frame_bits transmitted bits are simulated until the relative
+    standard error falls to target_relative_error (with at least
+    MIN_IS_ERRORS biased errors) or max_bits transmitted bits are spent. The
+    interval is the normal approximation around the estimate.
+    """
+    if params.equalizer in ADAPTIVE_EQUALIZERS or params.channel_taps is not None or params.fec != 'none':
+        raise ValueError("Importance sampling podržava samo kanal bez memorije, neadaptivne ekvalizatore i rad bez FEC-a.")
+    if variance_scale <= 0:
+        raise ValueError("Faktor varijanse mora biti pozitivan.")
+    if frame_bits < 2 or max_bits < 2:
+        raise ValueError("Okvir i budžet bita moraju sadržavati barem jedan QPSK simbol.")
+    if snr_db is None:
+        snr_db = params.snr_db
+    if rng is None:
+        rng = np.random.RandomState(params.seed)
+
+    total = 0.0
+    total_squares = 0.0
+    num_bits = 0
+    biased_errors = 0
+    transmitted_bits = 0
+    num_frames = 0
+    relative_error = np.inf
+    while (transmitted_bits + 2 <= max_bits
+           and (biased_errors < MIN_IS_ERRORS or relative_error > target_relative_error)):
+        current_frame_bits = min(frame_bits, max_bits - transmitted_bits)
+        weighted_errors, frame_errors = importance_sampling_frame(params, snr_db, current_frame_bits, mean_shift,
+                                                                  variance_scale, rng)
+        total += weighted_errors.sum()
+        total_squares += np.sum(weighted_errors**2)
+        num_bits += len(weighted_errors)
+        biased_errors += frame_errors
+        transmitted_bits += current_frame_bits
+        num_frames += 1
+        if total > 0 and num_bits > 1:
+            ber = total / num_bits
+            variance = max(total_squares - num_bits * ber**2, 0.0) / (num_bits - 1) / num_bits
+            relative_error = np.sqrt(variance) / ber
+
+    ber = total / num_bits if num_bits else np.nan
+    variance = max(total_squares - num_bits * ber**2, 0.0) / (num_bits - 1) / num_bits if num_bits > 1 else np.nan
+    half_width = stats.norm.ppf(0.5 + confidence / 2) * np.sqrt(variance)
+    return ImportanceSamplingResult(snr_db=snr_db, biased_errors=biased_errors, num_bits=num_bits,
+                                    num_frames=num_frames, ber=ber, variance=variance,
+                                    ci_low=max(0.0, ber - half_width), ci_high=ber + half_width,
+                                    confidence=confidence, mean_shift=mean_shift, variance_scale=variance_scale)
+
+
+def importance_sampling_ber_curve(params: SimulationParameters, snr_db_range: Optional[np.ndarray] = None,
+                                  **kwargs) -> List[ImportanceSamplingResult]:
+    """Run run_importance_sampling for every SNR point, sharing one random stream."""
+    if snr_db_range is None:
+        snr_db_range = params.snr_db_range
+    rng = kwargs.pop('rng', None)
+    if rng is None:
+        rng = np.random.RandomState(params.seed)
+    return [run_importance_sampling(params, snr_db_val, rng=rng, **kwargs) for snr_db_val in snr_db_range]
@@ -0,0 +1,141 @@
+import time
+import unittest
+import numpy as np
+from scipy.special import erfc
+from QPSK_MIMO_engine import SimulationParameters
+from QPSK_MIMO_monte_carlo import (count_bit_errors, wilson_interval, clopper_pearson_interval, run_monte_carlo,
+                                   monte_carlo_ber_curve, run_importance_sampling, importance_sampling_ber_curve)
+
+class TestQPSK_MIMO_monte_carlo(unittest.TestCase):
+
+    def setUp(self):
+        self.params = SimulationParameters(num_tx_antennas=1, num_rx_antennas=1, num_modes=1)
+
+    ## @brief Testira brojanje grešaka po prijemnim granama.
+    ## @details Svaka prijemna grana se poredi sa poslanim bitima istog simbola.
+    def test_brojanje_gresaka_po_granama(self):
+        """
+        @brief Testira brojanje grešaka po prijemnim granama.
+        @details Svaka prijemna grana se poredi sa poslanim bitima istog simbola.
+        """
+        print("\nTest: Brojanje grešaka po granama")
+        tx_bits = np.array([0, 1, 1, 1])
+        demodulated_bits = np.array([0, 1, 0, 0, 1, 1, 1, 0])
+        errors, compared = count_bit_errors(tx_bits, demodulated_bits, 2)
+        print(f"  Greške: {errors}, upoređeni biti: {compared}")
+        self.assertEqual((errors, compared), (2, 8))
+
+    ## @brief Testira intervale povjerenja za BER.
+    ## @details Provjerava poznate granice Clopper-Pearson intervala i da Wilson interval sadrži procjenu.
+    def test_intervali_povjerenja(self):
+        """
+        @brief Testira intervale povjerenja za BER.
+        @details Provjerava poznate granice Clopper-Pearson intervala i da Wilson interval sadrži procjenu.
+        """
+        print("\nTest: Intervali povjerenja")
+        low, high = clopper_pearson_interval(0, 1000, 0.95)
+        print(f"  Clopper-Pearson (0/1000): [{low}, {high}]")
+        self.assertEqual(low, 0.0)
+        self.assertAlmostEqual(high, 1 - 0.025**(1 / 1000), places=9)
+        low, high = wilson_interval(50, 1000, 0.95)
+        print(f"  Wilson (50/1000): [{low}, {high}]")
+        self.assertLess(low, 0.05)
+        self.assertGreater(high, 0.05)
+        cp_low, cp_high = clopper_pearson_interval(50, 1000, 0.95)
+        self.assertLess(cp_low, low)
+        self.assertGreater(cp_high, high)
+
+    ## @brief Testira zaustavljanje po broju grešaka.
+    ## @details Na niskom SNR simulacija se zaustavlja čim se skupi ciljani broj grešaka.
+    def test_zaustavljanje_po_greskama(self):
+        """
+        @brief Testira zaustavljanje po broju grešaka.
+        @details Na niskom SNR simulacija se zaustavlja čim se skupi ciljani broj grešaka.
+        """
+        print("\nTest: Zaustavljanje po broju grešaka")
+        result = run_monte_carlo(self.params, snr_db=0, target_errors=200, max_bits=10**6, frame_bits=1000)
+        print(f"  Greške: {result.bit_errors}, biti: {result.num_bits}, okviri: {result.num_frames}")
+        self.assertGreaterEqual(result.bit_errors, 200)
+        self.assertLess(result.num_bits, 10**6)
+
+    ## @brief Testira zaustavljanje po budžetu bita.
+    ## @details Na visokom SNR simulacija troši tačno zadani budžet bita.
+    def test_zaustavljanje_po_budzetu(self):
+        """
+        @brief Testira zaustavljanje po budžetu bita.
+        @details Na visokom SNR simulacija troši tačno zadani budžet bita.
+        """
+        print("\nTest: Zaustavljanje po budžetu bita")
+        result = run_monte_carlo(self.params, snr_db=30, target_errors=10, max_bits=25000, frame_bits=10000,
+                                 method='clopper-pearson')
+        print(f"  Greške: {result.bit_errors}, biti: {result.num_bits}, interval: [{result.ci_low}, {result.ci_high}]")
+        self.assertEqual(result.num_bits, 25000)
+        self.assertEqual(result.num_frames, 3)
+        self.assertEqual(result.ber, 0)
+        self.assertGreater(result.ci_high, 0)
+
+    ## @brief Testira Monte Carlo BER protiv analitičke QPSK AWGN krive.
+    ## @details Analitička vrijednost mora biti unutar izračunatog intervala povjerenja.
+    def test_ber_prema_analitickoj_krivi(self):
+        """
+        @brief Testira Monte Carlo BER protiv analitičke QPSK AWGN krive.
+        @details Analitička vrijednost mora biti unutar izračunatog intervala povjerenja.
+        """
+        print("\nTest: BER prema analitičkoj krivi")
+        results = monte_carlo_ber_curve(self.params, np.array([2.0, 6.0]), target_errors=2000, confidence=0.999)
+        for result in results:
+            expected = 0.5 * erfc(np.sqrt(10**(result.snr_db / 10) / 2))
+            print(f"  SNR {result.snr_db} dB: BER {result.ber:.5f}, analitički {expected:.5f}")
+            self.assertLessEqual(result.ci_low, expected)
+            self.assertGreaterEqual(result.ci_high, expected)
+
+    ## @brief Testira importance sampling protiv analitičke QPSK AWGN krive do BER 1e-12.
+    ## @details Procjena mora biti unutar intervala povjerenja oko analitičke vrijednosti, sa malom relativnom greškom i za nekoliko sekundi.
+    def test_importance_sampling_analiticka_kriva(self):
+        """
+        @brief Testira importance sampling protiv analitičke QPSK AWGN krive do BER 1e-12.
+        @details Procjena mora biti unutar intervala povjerenja oko analitičke vrijednosti, sa malom relativnom greškom i za nekoliko sekundi.
+        """
+        print("\nTest: Importance sampling prema analitičkoj krivi")
+        start = time.perf_counter()
+        results = importance_sampling_ber_curve(self.params, np.array([6.0, 13.5, 17.0]), confidence=0.999)
+        elapsed = time.perf_counter() - start
+        for result in results:
+            expected = 0.5 * erfc(np.sqrt(10**(result.snr_db / 10) / 2))
+            print(f"  SNR {result.snr_db} dB: BER {result.ber:.4g} ± {np.sqrt(result.variance):.2g}, "
+                  f"analitički {expected:.4g}, biti {result.num_bits}")
+            self.assertLessEqual(result.ci_low, expected)
+            self.assertGreaterEqual(result.ci_high, expected)
+            self.assertLessEqual(result.relative_error, 0.05)
+        self.assertLess(results[-1].ber, 1e-11)
+        print(f"  Vrijeme: {elapsed:.2f} s")
+        self.assertLess(elapsed, 5.0)
+        scaled = run_importance_sampling(self.params, snr_db=8.0, mean_shift=0.0, variance_scale=2.0,
+                                         target_relative_error=0.02, confidence=0.999)
+        expected = 0.5 * erfc(np.sqrt(10**0.8 / 2))
+        print(f"  Skalirana varijansa, SNR 8 dB: BER {scaled.ber:.4g}, analitički {expected:.4g}")
+        self.assertLessEqual(scaled.ci_low, expected)
+        self.assertGreaterEqual(scaled.ci_high, expected)
+
+    ## @brief Testira importance sampling za MIMO sa ekvalizatorima.
+    ## @details Intervali povjerenja importance samplinga i običnog Monte Carla se preklapaju; lanci sa memorijom nisu podržani.
+    def test_importance_sampling_mimo(self):
+        """
+        @brief Testira importance sampling za MIMO sa ekvalizatorima.
+        @details Intervali povjerenja importance samplinga i običnog Monte Carla se preklapaju; lanci sa memorijom nisu podržani.
+        """
+        print("\nTest: Importance sampling za MIMO")
+        for equalizer in ('zf', 'mmse', 'kbest'):
+            params = SimulationParameters(num_modes=1, channel_model='rayleigh', equalizer=equalizer)
+            sampled = run_importance_sampling(params, snr_db=10.0, confidence=0.999)
+            plain = run_monte_carlo(params, snr_db=10.0, target_errors=2000, max_bits=10**6, confidence=0.999)
+            print(f"  {equalizer}: IS {sampled.ber:.4g} [{sampled.ci_low:.4g}, {sampled.ci_high:.4g}], "
+                  f"MC {plain.ber:.4g} [{plain.ci_low:.4g}, {plain.ci_high:.4g}]")
+            self.assertLessEqual(sampled.ci_low, plain.ci_high)
+            self.assertGreaterEqual(sampled.ci_high, plain.ci_low)
+        for params in (SimulationParameters(equalizer='lms'), SimulationParameters(equalizer='mmse', fec='ldpc')):
+            with self.assertRaises(ValueError):
+                run_importance_sampling(params)
+
+if __name__ == '__main__':
+    unittest.main()
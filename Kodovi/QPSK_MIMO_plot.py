@@ -0,0 +1,234 @@
+"""Plot helpers for large sample sets: artist reuse and density rendering.
+
+AxesArtists keeps the artists of one Axes between redraws. While the layout
+(plot kind, number of streams, ...) stays the same only their data is
+replaced, so a redraw costs one canvas draw instead of rebuilding the axes.
+Constellations with more than CONSTELLATION_DENSITY_POINTS samples and eye
+diagrams with more than EYE_LINE_TRACES traces are drawn as a binned Density
+image, whose drawing cost does not depend on the number of samples; the
+binning itself is plain numpy and can run off the Tk thread. matplotlib is
+imported by the draw functions only, so importing this module stays cheap.
+"""
+import numpy as np
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Hashable, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
+DENSITY_BINS = 200
+DENSITY_CMAP = 'Blues'
+CONSTELLATION_DENSITY_POINTS = 10000  # iznad ovoga konstelacija se crta kao gustoća
+EYE_LINE_TRACES = 1000                # iznad ovoga eye dijagram se crta kao gustoća
+EYE_SUBSAMPLES = 16                   # interpolirane tačke po intervalu između simbola (gustoća)
+MAX_EYE_DENSITY_SAMPLES = 4 * 10**6   # iznad ovoga gustoća eye dijagrama koristi ravnomjeran podskup tragova
+LIMIT_SAMPLES = 10**5                 # uzorci za procjenu granica osa
+LIMIT_PERCENTILE = 99.5
+MIN_CONSTELLATION_LIMIT = 1.5
+
+
+@dataclass
+class Density:
+    """Sample counts binned on a regular grid, counts[y, x] over extent (x0, x1, y0, y1)."""
+    counts: np.ndarray
+    extent: Tuple[float, float, float, float]
+    num_samples: int
+
+
+class AxesArtists:
+    """Artists of one Axes that are kept between redraws while the layout stays the same."""
+
+    def __init__(self, ax: 'Axes'):
+        self.ax = ax
+        self.layout = None
+        self.artists: Dict[str, object] = {}
+
+    def reuse(self, layout: Hashable) -> bool:
+        """True if the artists of layout are still on the axes; otherwise the axes are cleared for a rebuild."""
+        if layout == self.layout and self.artists and all(artist.axes is self.ax for artist in self.artists.values()):
+            return True
+        self.ax.clear()
+        self.layout = layout
+        self.artists = {}
+        return False
+
+    def __getitem__(self, key: str):
+        return self.artists[key]
+
+    def __setitem__(self, key: str, artist):
+        self.artists[key] = artist
+
+    def rescale(self):
+        """Fit the view to the current data of the lines and patches."""
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+
+def sample_limit(values: np.ndarray, minimum: float = 0.0) -> float:
+    """Symmetric axis limit covering LIMIT_PERCENTILE of |values|, estimated from a strided subset."""
+    values = np.asarray(values).ravel()
+    if values.size == 0:
+        return minimum
+    subset = values[::max(1, values.size // LIMIT_SAMPLES)]
+    if np.iscomplexobj(subset):
+        subset = np.concatenate([subset.real, subset.imag])
+    return max(minimum, float(np.percentile(np.abs(subset), LIMIT_PERCENTILE)))
+
+
+def histogram_2d(x: np.ndarray, y: np.ndarray, extent: Tuple[float, float, float, float],
+                 bins: Tuple[int, int] = (DENSITY_BINS, DENSITY_BINS)) -> np.ndarray:
+    """Counts[y, x] of the points inside extent on a bins = (x bins, y bins) grid.
+
+    Counts as np.histogram2d (except that points on the upper edges are
+    dropped), but with a single bincount over flat bin indices, several times
+    faster for millions of points.
+    """
+    x0, x1, y0, y1 = extent
+    ix = np.floor((np.asarray(x) - x0) * (bins[0] / (x1 - x0))).astype(np.intp)
+    iy = np.floor((np.asarray(y) - y0) * (bins[1] / (y1 - y0))).astype(np.intp)
+    inside = (ix >= 0) & (ix < bins[0]) & (iy >= 0) & (iy < bins[1])
+    flat = iy[inside] * bins[0] + ix[inside]
+    return np.bincount(flat, minlength=bins[0] * bins[1]).reshape(bins[1], bins[0])
+
+
+def constellation_density(samples: np.ndarray, bins: int = DENSITY_BINS) -> Density:
+    """Density of complex samples over a square extent that covers LIMIT_PERCENTILE of them."""
+    samples = np.asarray(samples).ravel()
+    limit = sample_limit(samples, MIN_CONSTELLATION_LIMIT)
+    extent = (-limit, limit, -limit, limit)
+    return Density(histogram_2d(samples.real, samples.imag, extent, (bins, bins)), extent, samples.size)
+
+
+def eye_traces(received_symbols: np.ndarray, trace_length: int) -> np.ndarray:
+    """Real parts of the flattened signal cut into consecutive traces, shape (traces, trace_length)."""
+    stream = np.real(np.asarray(received_symbols).ravel())
+    num_traces = len(stream) // trace_length if trace_length > 0 else 0
+    return stream[:num_traces * trace_length].reshape(num_traces, trace_length)
+
+
+def eye_density(traces: np.ndarray, bins: int = DENSITY_BINS, subsamples: int = EYE_SUBSAMPLES) -> Density:
+    """Density of the linearly interpolated traces (at most MAX_EYE_DENSITY_SAMPLES interpolated points)."""
+    num_traces, trace_length = traces.shape
+    stride = max(1, -(-num_traces * (trace_length - 1) * subsamples // MAX_EYE_DENSITY_SAMPLES))
+    traces = traces[::stride]
+    limit = sample_limit(traces) or 1.0
+    extent = (0.0, float(trace_length - 1), -limit, limit)
+    columns = max(1, (trace_length - 1) * subsamples)
+    counts = np.zeros((bins, columns), dtype=np.intp)
+    if trace_length < 2:
+        return Density(counts, extent, traces.size)
+    # Jedna kolona slike po interpoliranoj tački; vrijednosti se binuju po kolonama
+    fractions = (np.arange(columns) % subsamples + 0.5) / subsamples
+    left = np.arange(columns) // subsamples
+    row_scale = bins / (2 * limit)
+    for column, (start, fraction) in enumerate(zip(left, fractions)):
+        values = traces[:, start] + (traces[:, start + 1] - traces[:, start]) * fraction
+        rows = np.floor((values + limit) * row_scale).astype(np.intp)
+        counts[:, column] = np.bincount(rows[(rows >= 0) & (rows < bins)], minlength=bins)
+    return Density(counts, extent, traces.size)
+
+
+def draw_density(view: AxesArtists, density: Density, key: str = 'density'):
+    """Show a Density as an image (empty bins transparent), reusing the image of view when it exists."""
+    counts = np.ma.masked_equal(density.counts, 0)
+    if key in view.artists:
+        image = view[key]
+        image.set_data(counts)
+        image.set_extent(density.extent)
+    else:
+        image = view.ax.imshow(counts, extent=density.extent, origin='lower', aspect='auto', cmap=DENSITY_CMAP,
+                               interpolation='nearest')
+        view[key] = image
+    image.set_clim(1, max(1, int(density.counts.max())))
+    view.ax.set_xlim(density.extent[:2])
+    view.ax.set_ylim(density.extent[2:])
+
+
+def prepare_constellation(received_symbols: np.ndarray, num_streams: int,
+                          max_legend_streams: int) -> Optional[Density]:
+    """Density for draw_constellation when it will draw one, otherwise None (markers are drawn)."""
+    samples = received_symbols[:num_streams]
+    if num_streams > max_legend_streams or samples.size > CONSTELLATION_DENSITY_POINTS:
+        return constellation_density(samples)
+    return None
+
+
+def prepare_eye_diagram(traces: np.ndarray) -> Optional[Density]:
+    """Density for draw_eye_diagram when it will draw one, otherwise None (a LineCollection is drawn)."""
+    return eye_density(traces) if len(traces) > EYE_LINE_TRACES else None
+
+
+def draw_constellation(view: AxesArtists, received_symbols: np.ndarray, num_streams: int,
+                       ideal_points: Sequence[complex], max_legend_streams: int,
+                       density: Optional[Density] = None) -> bool:
+    """Received symbols of every receiver as markers, or one density when there are many points or streams.
+
+    density is the result of prepare_constellation when it was computed ahead
+    (e.g. off the Tk thread). Returns True when the artists were (re)created.
+    """
+    from matplotlib.lines import Line2D
+
+    samples = received_symbols[:num_streams]
+    if density is None:
+        density = prepare_constellation(received_symbols, num_streams, max_legend_streams)
+    ax = view.ax
+    reused = view.reuse(('constellation', density is not None, num_streams))
+    if not reused:
+        if density is None:
+            for i in range(num_streams):
+                view[f'stream{i}'], = ax.plot([], [], '.', label=f'Primljeni simboli (Prijemnik {i+1})')
+        view['ideal'], = ax.plot([p.real for p in ideal_points], [p.imag for p in ideal_points], 'r*', markersize=12,
+                                 markeredgecolor='black', label='Idealni simboli')
+        if density is not None:
+            ax.legend()
+        else:
+            # Legenda sa većim markerima od onih na grafu
+            handles = [Line2D([0], [0], linestyle="none", marker='.', markersize=10,
+                              markerfacecolor=view[f'stream{i}'].get_color()) for i in range(num_streams)]
+            labels = [f'Primljeni simboli (Prijemnik {i+1})' for i in range(num_streams)]
+            ax.legend([view['ideal']] + handles, ['Idealni simboli'] + labels)
+        ax.set_xlabel('In-phase komponenta')
+        ax.set_ylabel('Quadrature komponenta')
+        ax.grid(True)
+    if density is not None:
+        draw_density(view, density)
+        ax.set_title(f'Konstelacijski dijagram (gustoća, {num_streams} prijemnika)')
+        ax.set_aspect('equal', adjustable='box')
+    else:
+        for i in range(num_streams):
+            view[f'stream{i}'].set_data(samples[i].real, samples[i].imag)
+        ax.set_title('Konstelacijski dijagram (QPSK MIMO)')
+        view.rescale()
+        ax.set_aspect('equal', adjustable='datalim')
+    return not reused
+
+
+def draw_eye_diagram(view: AxesArtists, traces: np.ndarray, density: Optional[Density] = None) -> bool:
+    """Eye diagram as one LineCollection, or as a density image above EYE_LINE_TRACES traces.
+
+    density as in draw_constellation (from prepare_eye_diagram). Returns True
+    when the artists were (re)created.
+    """
+    from matplotlib.collections import LineCollection
+
+    if density is None:
+        density = prepare_eye_diagram(traces)
+    ax = view.ax
+    reused = view.reuse(('eye', density is not None))
+    if not reused:
+        if density is None:
+            view['traces'] = ax.add_collection(LineCollection([], colors='b', alpha=0.5))
+        ax.set_xlabel('Vrijeme (simboli)')
+        ax.set_ylabel('Amplituda')
+        ax.set_title('Eye Dijagram primljenog signala')
+        ax.grid(True)
+    if density is not None:
+        draw_density(view, density)
+    else:
+        time_axis = np.broadcast_to(np.arange(traces.shape[1], dtype=float), traces.shape)
+        view['traces'].set_segments(np.stack([time_axis, traces], axis=-1))
+        if traces.size:
+            limit = np.abs(traces).max() * 1.05 or 1.0
+            ax.set_xlim(0, max(1, traces.shape[1] - 1))
+            ax.set_ylim(-limit, limit)
+    return not reused
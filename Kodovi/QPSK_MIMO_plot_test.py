@@ -0,0 +1,114 @@
+import time
+import unittest
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+from QPSK_MIMO_plot import (AxesArtists, histogram_2d, constellation_density, eye_traces, eye_density,
+                            prepare_constellation, prepare_eye_diagram, draw_constellation, draw_eye_diagram,
+                            CONSTELLATION_DENSITY_POINTS, EYE_LINE_TRACES)
+from QPSK_MIMO_engine import QPSK_CONSTELLATION
+
+class TestQPSK_MIMO_plot(unittest.TestCase):
+
+    def setUp(self):
+        self.figure = Figure()
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.view = AxesArtists(self.figure.add_subplot())
+
+    def _received(self, num_streams, num_symbols, seed=0):
+        rng = np.random.RandomState(seed)
+        symbols = QPSK_CONSTELLATION[rng.randint(0, 4, (num_streams, num_symbols))]
+        return symbols + 0.2 * (rng.randn(num_streams, num_symbols) + 1j * rng.randn(num_streams, num_symbols))
+
+    ## @brief Testira binovanje gustoće.
+    ## @details histogram_2d daje iste brojeve kao np.histogram2d, a gustoća eye dijagrama broji sve interpolirane tačke.
+    def test_gustoca(self):
+        """
+        @brief Testira binovanje gustoće.
+        @details histogram_2d daje iste brojeve kao np.histogram2d, a gustoća eye dijagrama broji sve interpolirane tačke.
+        """
+        print("\nTest: Binovanje gustoće")
+        rng = np.random.RandomState(1)
+        x, y = rng.randn(10000), rng.randn(10000)
+        expected, _, _ = np.histogram2d(y, x, bins=(30, 40), range=[[-2, 2], [-3, 3]])
+        np.testing.assert_array_equal(histogram_2d(x, y, (-3, 3, -2, 2), (40, 30)), expected)
+        received = self._received(2, 1000)
+        density = constellation_density(received)
+        self.assertEqual(density.num_samples, received.size)
+        self.assertGreater(density.counts.sum(), 0.99 * received.size)
+        traces = eye_traces(received, 8)
+        self.assertEqual(traces.shape, (250, 8))
+        np.testing.assert_array_equal(traces[1], received.real.ravel()[8:16])
+        eye = eye_density(traces, bins=50, subsamples=4)
+        self.assertEqual(eye.counts.shape, (50, 7 * 4))
+        self.assertEqual(eye.extent[:2], (0.0, 7.0))
+        self.assertGreater(eye.counts.sum(), 0.98 * 250 * 7 * 4)
+
+    ## @brief Testira ponovnu upotrebu artista.
+    ## @details Ponovljeno crtanje mijenja samo podatke postojećih artista; promjena izgleda ili brisanje osa ih ponovo kreira.
+    def test_ponovna_upotreba_artista(self):
+        """
+        @brief Testira ponovnu upotrebu artista.
+        @details Ponovljeno crtanje mijenja samo podatke postojećih artista; promjena izgleda ili brisanje osa ih ponovo kreira.
+        """
+        print("\nTest: Ponovna upotreba artista")
+        ax = self.view.ax
+        self.assertTrue(draw_constellation(self.view, self._received(4, 200), 4, QPSK_CONSTELLATION, 8))
+        lines = list(ax.lines)
+        self.assertEqual(len(lines), 5)
+        received = self._received(4, 300, seed=1)
+        self.assertFalse(draw_constellation(self.view, received, 4, QPSK_CONSTELLATION, 8))
+        self.assertEqual(ax.lines[:], lines)
+        np.testing.assert_array_equal(lines[0].get_xdata(), received[0].real)
+        ax.clear()
+        self.assertTrue(draw_constellation(self.view, received, 4, QPSK_CONSTELLATION, 8))
+        large = self._received(4, CONSTELLATION_DENSITY_POINTS // 4 + 1)
+        self.assertTrue(draw_constellation(self.view, large, 4, QPSK_CONSTELLATION, 8))
+        self.assertEqual(len(ax.images), 1)
+        self.assertFalse(draw_constellation(self.view, large, 4, QPSK_CONSTELLATION, 8,
+                                            prepare_constellation(large, 4, 8)))
+        self.assertEqual(len(ax.images), 1)
+
+        eye_view = AxesArtists(self.figure.add_subplot(212))
+        traces = eye_traces(received, 8)
+        self.assertTrue(draw_eye_diagram(eye_view, traces))
+        self.assertFalse(draw_eye_diagram(eye_view, traces[:10]))
+        collections = [artist for artist in eye_view.ax.collections if isinstance(artist, LineCollection)]
+        self.assertEqual(len(collections), 1)
+        self.assertEqual(len(collections[0].get_segments()), 10)
+        many = np.zeros((EYE_LINE_TRACES + 1, 8))
+        self.assertIsNone(prepare_eye_diagram(traces))
+        self.assertTrue(draw_eye_diagram(eye_view, many))
+        self.assertIsInstance(eye_view['density'], AxesImage)
+        self.canvas.draw()
+
+    ## @brief Testira vrijeme ponovnog crtanja za 10^7 uzoraka.
+    ## @details Sa unaprijed izračunatom gustoćom ponovno crtanje konstelacije i eye dijagrama ne zavisi od broja uzoraka.
+    def test_vrijeme_crtanja(self):
+        """
+        @brief Testira vrijeme ponovnog crtanja za 10^7 uzoraka.
+        @details Sa unaprijed izračunatom gustoćom ponovno crtanje konstelacije i eye dijagrama ne zavisi od broja uzoraka.
+        """
+        print("\nTest: Vrijeme ponovnog crtanja za 10^7 uzoraka")
+        received = self._received(4, 10**7 // 4)
+        start = time.perf_counter()
+        constellation = prepare_constellation(received, 4, 8)
+        eye = prepare_eye_diagram(eye_traces(received, 8))
+        print(f"  binovanje: {time.perf_counter() - start:.2f} s")
+        self.assertEqual(constellation.num_samples, 10**7)
+        eye_view = AxesArtists(self.figure.add_subplot(212))
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            draw_constellation(self.view, received, 4, QPSK_CONSTELLATION, 8, constellation)
+            draw_eye_diagram(eye_view, eye_traces(received, 8), eye)
+            self.canvas.draw()
+            timings.append(time.perf_counter() - start)
+        print("  ponovno crtanje: " + ", ".join(f"{timing * 1e3:.0f} ms" for timing in timings))
+        # Cilj je 100 ms; granica testa je šira zbog opterećenih mašina
+        self.assertLess(min(timings[1:]), 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
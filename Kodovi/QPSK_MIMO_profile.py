@@ -0,0 +1,142 @@
+"""Lightweight span instrumentation of the simulation and plotting stages.
+
+A Profiler records a Span for every `with profiler.span(name):` block: wall
+time, CPU time of the process and, when trace_memory is enabled, the net and
+peak bytes allocated inside the block (tracemalloc). Spans nest; the peak of
+an outer span includes the peaks of its children. The spans can be exported
+as plain JSON or in the Chrome trace event format (chrome://tracing,
+Perfetto). NULL_PROFILER has the same interface and records nothing, so
+instrumented code costs almost nothing when profiling is off.
+"""
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+
+@dataclass
+class Span:
+    """One timed block; start is relative to the profiler start, in seconds."""
+    name: str
+    category: str
+    depth: int
+    start: float
+    wall: float
+    cpu: float
+    allocated_bytes: Optional[int] = None
+    peak_bytes: Optional[int] = None
+
+
+class Profiler:
+    """Collects nested spans; use as a context manager to start and stop memory tracing."""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.spans: List[Span] = []
+        self.origin = time.perf_counter()
+        self._depth = 0
+        self._peaks: List[int] = []  # najveći vrh memorije po otvorenom spanu
+        self._started_tracing = False
+
+    def start(self):
+        self.origin = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @contextmanager
+    def span(self, name: str, category: str = 'simulacija'):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # Vrh roditelja do sada se čuva prije resetovanja za ovaj span
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            start_bytes = current
+            self._peaks.append(current)
+        depth = self._depth
+        self._depth += 1
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            self._depth -= 1
+            allocated = peak_bytes = None
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(self._peaks.pop(), peak)
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                allocated, peak_bytes = current - start_bytes, peak - start_bytes
+            self.spans.append(Span(name=name, category=category, depth=depth, start=wall_start - self.origin,
+                                   wall=wall, cpu=cpu, allocated_bytes=allocated, peak_bytes=peak_bytes))
+
+    def ordered_spans(self) -> List[Span]:
+        """Spans in start order (parents before their children)."""
+        return sorted(self.spans, key=lambda span: (span.start, span.depth))
+
+    @property
+    def total_wall(self) -> float:
+        return sum(span.wall for span in self.spans if span.depth == 0)
+
+    def to_dict(self) -> Dict:
+        return {'trace_memory': self.trace_memory, 'spans': [asdict(span) for span in self.ordered_spans()]}
+
+    def chrome_trace(self) -> Dict:
+        """Spans as complete ("X") events of the Chrome trace event format, in microseconds."""
+        events = []
+        for span in self.ordered_spans():
+            args = {'cpu_ms': span.cpu * 1e3}
+            if span.allocated_bytes is not None:
+                args.update(allocated_bytes=span.allocated_bytes, peak_bytes=span.peak_bytes)
+            events.append({'name': span.name, 'cat': span.category, 'ph': 'X', 'ts': span.start * 1e6,
+                           'dur': span.wall * 1e6, 'pid': os.getpid(), 'tid': 0, 'args': args})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(self.to_dict(), output, indent=2)
+
+    def save_chrome_trace(self, path: str):
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(self.chrome_trace(), output)
+
+    def summary_lines(self) -> List[str]:
+        """One indented line per span: wall and CPU time, and the peak memory when traced."""
+        lines = []
+        for span in self.ordered_spans():
+            line = f"{'  ' * span.depth}{span.name}: {span.wall * 1e3:.1f} ms (CPU {span.cpu * 1e3:.1f} ms"
+            if span.peak_bytes is not None:
+                line += f", vrh {span.peak_bytes / 2**20:.2f} MiB"
+            lines.append(line + ")")
+        return lines
+
+
+class NullProfiler:
+    """Profiler stand-in that records nothing."""
+    spans: List[Span] = []
+
+    def span(self, name: str, category: str = 'simulacija'):
+        return nullcontext()
+
+
+NULL_PROFILER = NullProfiler()
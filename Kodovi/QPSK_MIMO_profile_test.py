@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import unittest
+import numpy as np
+from QPSK_MIMO_profile import Profiler, NULL_PROFILER
+from QPSK_MIMO_engine import SimulationParameters, run_simulation
+
+class TestQPSK_MIMO_profile(unittest.TestCase):
+
+    ## @brief Testira ugniježđene spanove sa vremenom i memorijom.
+    ## @details Span mjeri zidno i CPU vrijeme, a vrh memorije roditelja uključuje vrh djeteta.
+    def test_spanovi(self):
+        """
+        @brief Testira ugniježđene spanove sa vremenom i memorijom.
+        @details Span mjeri zidno i CPU vrijeme, a vrh memorije roditelja uključuje vrh djeteta.
+        """
+        print("\nTest: Ugniježđeni spanovi")
+        with Profiler(trace_memory=True) as profiler:
+            self.assertTrue(tracemalloc.is_tracing())
+            with profiler.span('roditelj'):
+                with profiler.span('dijete', 'crtanje'):
+                    block = np.ones(2**20)  # 8 MiB
+                    del block
+                with profiler.span('spavanje'):
+                    time.sleep(0.05)
+                kept = np.ones(2**17)  # 1 MiB ostaje alocirano
+        self.assertFalse(tracemalloc.is_tracing())
+        spans = {span.name: span for span in profiler.spans}
+        print("\n".join("  " + line for line in profiler.summary_lines()))
+        self.assertEqual([span.name for span in profiler.ordered_spans()], ['roditelj', 'dijete', 'spavanje'])
+        self.assertEqual((spans['roditelj'].depth, spans['dijete'].depth), (0, 1))
+        self.assertEqual(spans['dijete'].category, 'crtanje')
+        self.assertGreaterEqual(spans['spavanje'].wall, 0.05)
+        self.assertLess(spans['spavanje'].cpu, 0.04)
+        self.assertGreaterEqual(spans['dijete'].peak_bytes, 8 * 2**20)
+        self.assertLess(spans['dijete'].allocated_bytes, 2**16)
+        self.assertGreaterEqual(spans['roditelj'].peak_bytes, spans['dijete'].peak_bytes)
+        self.assertGreaterEqual(spans['roditelj'].allocated_bytes, kept.nbytes)
+        self.assertAlmostEqual(profiler.total_wall, spans['roditelj'].wall)
+        self.assertEqual(NULL_PROFILER.spans, [])
+
+    ## @brief Testira izvoz profila.
+    ## @details JSON sadrži sve spanove, a Chrome trace kompletne ("X") događaje u mikrosekundama.
+    def test_izvoz(self):
+        """
+        @brief Testira izvoz profila.
+        @details JSON sadrži sve spanove, a Chrome trace kompletne ("X") događaje u mikrosekundama.
+        """
+        print("\nTest: Izvoz profila")
+        directory = tempfile.mkdtemp()
+        try:
+            with Profiler() as profiler:
+                run_simulation(SimulationParameters(equalizer='mmse', fec='ldpc'), profiler)
+            names = [span.name for span in profiler.ordered_spans()]
+            self.assertIn('FEC kodiranje', names)
+            self.assertIn('SNR sweep (BER)', names)
+            profiler.save_json(os.path.join(directory, 'profil.json'))
+            profiler.save_chrome_trace(os.path.join(directory, 'profil.trace.json'))
+            with open(os.path.join(directory, 'profil.json'), encoding='utf-8') as exported:
+                self.assertEqual([span['name'] for span in json.load(exported)['spans']], names)
+            with open(os.path.join(directory, 'profil.trace.json'), encoding='utf-8') as exported:
+                events = json.load(exported)['traceEvents']
+            self.assertEqual(len(events), len(names))
+            self.assertTrue(all(event['ph'] == 'X' for event in events))
+            span = profiler.ordered_spans()[0]
+            self.assertAlmostEqual(events[0]['dur'], span.wall * 1e6)
+            self.assertNotIn('peak_bytes', events[0]['args'])
+        finally:
+            shutil.rmtree(directory)
+
+    ## @brief Testira da profiliranje ne mijenja rezultat.
+    ## @details Simulacija sa profilerom i bez njega daje iste rezultate.
+    def test_bez_utjecaja_na_rezultat(self):
+        """
+        @brief Testira da profiliranje ne mijenja rezultat.
+        @details Simulacija sa profilerom i bez njega daje iste rezultate.
+        """
+        print("\nTest: Profiliranje ne mijenja rezultat")
+        params = SimulationParameters(equalizer='zf', channel_model='rayleigh')
+        with Profiler(trace_memory=True) as profiler:
+            profiled = run_simulation(params, profiler)
+        plain = run_simulation(params, NULL_PROFILER)
+        self.assertEqual(profiled.ber, plain.ber)
+        np.testing.assert_array_equal(profiled.ber_values, plain.ber_values)
+        self.assertNotIn('FEC kodiranje', [span.name for span in profiler.spans])
+
+if __name__ == '__main__':
+    unittest.main()
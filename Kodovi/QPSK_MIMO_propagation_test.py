@@ -0,0 +1,84 @@
+import unittest
+import numpy as np
+from QPSK_MIMO_propagation import (SplitStepPropagator, launch_waveform, receive_symbols, propagate_fiber,
+                                   raised_cosine_spectrum)
+from QPSK_MIMO_engine import qpsk_modulate, generate_bits
+
+class TestQPSK_MIMO_propagation(unittest.TestCase):
+
+    def _symbols(self, num_modes=1, num_symbols=1024, seed=0):
+        symbols, _ = qpsk_modulate(generate_bits(2 * num_modes * num_symbols, np.random.RandomState(seed)))
+        return symbols.reshape(num_modes, num_symbols)
+
+    ## @brief Testira oblikovanje impulsa i prilagođeni filter.
+    ## @details Bez vlakna prilagođeni RRC filter mora vratiti poslane simbole, a snaga mora biti zadana snaga lansiranja.
+    def test_oblikovanje_impulsa(self):
+        """
+        @brief Testira oblikovanje impulsa i prilagođeni filter.
+        @details Bez vlakna prilagođeni RRC filter mora vratiti poslane simbole, a snaga mora biti zadana snaga lansiranja.
+        """
+        print("\nTest: Oblikovanje impulsa")
+        symbols = self._symbols(2)
+        waveform = launch_waveform(symbols, launch_power_dbm=3.0)
+        self.assertAlmostEqual(10 * np.log10(np.mean(np.abs(waveform)**2) / 1e-3), 3.0)
+        received = receive_symbols(waveform)
+        np.testing.assert_allclose(received / np.sqrt(np.mean(np.abs(received)**2)), symbols, atol=1e-10)
+        spectrum = raised_cosine_spectrum(64, 2, 0.25)
+        # Nyquistov uslov: zbir pomjerenih spektara je konstantan
+        np.testing.assert_allclose(spectrum + np.roll(spectrum, 32), 1.0, atol=1e-12)
+
+    ## @brief Testira linearnu propagaciju.
+    ## @details Bez nelinearnosti izlaz mora biti jednak analitičkom djelovanju slabljenja i hromatske disperzije.
+    def test_linearna_propagacija(self):
+        """
+        @brief Testira linearnu propagaciju.
+        @details Bez nelinearnosti izlaz mora biti jednak analitičkom djelovanju slabljenja i hromatske disperzije.
+        """
+        print("\nTest: Linearna propagacija (slabljenje i disperzija)")
+        waveform = launch_waveform(self._symbols())
+        result = propagate_fiber(waveform, 37.5, 0.2, gamma=0.0)
+        omega = 2 * np.pi * np.fft.fftfreq(waveform.shape[-1], 1e3 / 64.0)
+        expected = np.fft.ifft(np.fft.fft(waveform) * np.exp(37.5 * (-0.2 * np.log(10) / 20 + 0.5j * -21.7 * omega**2)))
+        np.testing.assert_allclose(result.signals, expected, atol=1e-12)
+        self.assertEqual(result.num_steps, 38)
+        self.assertAlmostEqual(result.power_dbm[0] - result.power_dbm[-1], 0.2 * 37.5)
+
+    ## @brief Testira samofaznu modulaciju (Kerr nelinearnost).
+    ## @details Bez disperzije i slabljenja amplituda se ne mijenja, a faza raste za gamma |A|^2 L (jedan mod, kappa = 1).
+    def test_samofazna_modulacija(self):
+        """
+        @brief Testira samofaznu modulaciju (Kerr nelinearnost).
+        @details Bez disperzije i slabljenja amplituda se ne mijenja, a faza raste za gamma |A|^2 L (jedan mod, kappa = 1).
+        """
+        print("\nTest: Samofazna modulacija")
+        waveform = launch_waveform(self._symbols(), launch_power_dbm=10.0)
+        result = propagate_fiber(waveform, 20.0, 0.0, beta2=0.0, gamma=1.3)
+        np.testing.assert_allclose(np.abs(result.signals), np.abs(waveform), atol=1e-12)
+        expected_phase = 1.3 * np.abs(waveform)**2 * 20.0
+        np.testing.assert_allclose(np.angle(result.signals * np.conj(waveform) * np.exp(-1j * expected_phase)), 0, atol=1e-9)
+
+    ## @brief Testira prilagodljiv korak i snagu sa sprezanjem modova.
+    ## @details Veća snaga traži više koraka, a bez MDL-a sprezanje ne mijenja ukupnu snagu nakon slabljenja.
+    def test_prilagodljiv_korak(self):
+        """
+        @brief Testira prilagodljiv korak i snagu sa sprezanjem modova.
+        @details Veća snaga traži više koraka, a bez MDL-a sprezanje ne mijenja ukupnu snagu nakon slabljenja.
+        """
+        print("\nTest: Prilagodljiv korak split-step metode")
+        symbols = self._symbols(4, 512)
+        steps = []
+        for launch_power_dbm in (0.0, 10.0):
+            result = propagate_fiber(launch_waveform(symbols, launch_power_dbm=launch_power_dbm), 100.0, 0.2, dmd=20.0,
+                                     mdl_per_segment=0.0, rng=np.random.RandomState(1))
+            print(f"  {launch_power_dbm:.0f} dBm: {result.num_steps} koraka, {result.wall_time:.3f} s")
+            steps.append(result.num_steps)
+            self.assertAlmostEqual(result.power_dbm[0] - result.power_dbm[-1], 20.0, places=9)
+            self.assertLess(np.max(np.diff(result.nonlinear_phase)), 5e-3 * 1.5)
+        self.assertGreater(steps[1], steps[0])
+        propagator = SplitStepPropagator(4, 1024, 64.0, 0.2)
+        self.assertIs(propagator.linear_operator(0.5), propagator.linear_operator(0.5))
+        self.assertLessEqual(propagator.nonlinear_step_limit(1.0), 1.0)
+        self.assertEqual(propagator.nonlinear_step_limit(0.0), 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+"""Frame-based streaming pipeline with bounded memory.
+
+Bits are produced in fixed-size blocks and every block is carried through
+modulation, channel, noise and detection by a chain of generators. Results
+are folded into running accumulators, so memory use depends only on the
+block size and not on the total run length.
+"""
+import numpy as np
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from QPSK_MIMO_engine import (SimulationParameters, generate_bits, qpsk_modulate, generate_noise, demodulate,
+                              count_bit_errors, noise_variance, equalize_received)
+from QPSK_MIMO_channel import OverlapSaveConvolver
+from QPSK_MIMO_detector import DEFAULT_K
+
+DEFAULT_BLOCK_SIZE = 2**16
+HISTOGRAM_BINS = 128
+HISTOGRAM_RANGE = ((-2.0, 2.0), (-2.0, 2.0))
+
+
+@dataclass
+class Frame:
+    """One block of the stream; each pipeline stage fills in its own field."""
+    index: int
+    tx_bits: np.ndarray
+    tx_symbols: Optional[np.ndarray] = None
+    rx_signals: Optional[np.ndarray] = None
+    received_symbols: Optional[np.ndarray] = None
+    equalized_symbols: Optional[np.ndarray] = None
+    demodulated_bits: Optional[np.ndarray] = None
+
+
+def received_signal_power(H: np.ndarray) -> float:
+    """Mean received power when every transmit stream carries the same unit-power QPSK symbol.
+
+    H may also be a (taps x rx x tx) impulse response; the power of the
+    independent taps then adds up.
+    """
+    row_sums = np.asarray(H).sum(axis=-1)
+    return float(np.mean(np.sum(np.abs(row_sums.reshape(-1, row_sums.shape[-1]))**2, axis=0)))
+
+
+def bit_frames(total_bits: int, block_size: int = DEFAULT_BLOCK_SIZE, rng=None) -> Iterator[Frame]:
+    """Yield frames of at most block_size random bits until total_bits are produced."""
+    if block_size < 2:
+        raise ValueError("Veličina bloka mora biti barem 2 bita.")
+    block_size -= block_size % 2
+    produced = 0
+    index = 0
+    while produced < total_bits:
+        current_block = min(block_size, total_bits - produced)
+        yield Frame(index=index, tx_bits=generate_bits(current_block, rng))
+        produced += current_block
+        index += 1
+
+
+def modulate_frames(frames: Iterable[Frame]) -> Iterator[Frame]:
+    """QPSK modulate every frame."""
+    for frame in frames:
+        frame.tx_symbols, frame.tx_bits = qpsk_modulate(frame.tx_bits)
+        yield frame
+
+
+def channel_frames(frames: Iterable[Frame], H: np.ndarray) -> Iterator[Frame]:
+    """Apply the MIMO channel to every frame.
+
+    All transmit streams carry the same symbols, so H @ tile(x) is evaluated as
+    the outer product of the row sums of H with x, without the tiled copy.
+    """
+    row_sums = H.sum(axis=1)
+    for frame in frames:
+        frame.rx_signals = np.outer(row_sums, frame.tx_symbols)
+        yield frame
+
+
+def dispersive_channel_frames(frames: Iterable[Frame], taps: np.ndarray, delay: int = 0) -> Iterator[Frame]:
+    """Apply a multi-tap MIMO channel to the stream by overlap-save convolution.
+
+    The convolver keeps its state across frames, so the stream is filtered as
+    one continuous signal. The output is advanced by delay samples to stay
+    aligned with the transmitted bits; a frame is therefore released once the
+    first delay samples of the next frame have been filtered, and the last
+    frame is completed with zero input.
+    """
+    convolver = OverlapSaveConvolver(taps)
+    pending = deque()
+    output = np.empty((convolver.num_rx, 0), dtype=complex)
+    skip = delay
+
+    def release():
+        nonlocal output
+        while pending and output.shape[1] >= len(pending[0].tx_symbols):
+            frame = pending.popleft()
+            num_symbols = len(frame.tx_symbols)
+            frame.rx_signals, output = output[:, :num_symbols], output[:, num_symbols:]
+            yield frame
+
+    for frame in frames:
+        filtered = convolver(np.broadcast_to(frame.tx_symbols, (convolver.num_tx, len(frame.tx_symbols))))
+        dropped = min(skip, filtered.shape[1])
+        skip -= dropped
+        output = np.concatenate([output, filtered[:, dropped:]], axis=1)
+        pending.append(frame)
+        yield from release()
+    if pending:
+        missing = sum(len(frame.tx_symbols) for frame in pending) - output.shape[1]
+        output = np.concatenate([output, convolver(np.zeros((convolver.num_tx, missing + skip)))[:, skip:]], axis=1)
+        yield from release()
+
+
+def noise_frames(frames: Iterable[Frame], snr_db: float, signal_power: float, rng=None) -> Iterator[Frame]:
+    """Add AWGN with a fixed, stream-wide noise level to every frame."""
+    for frame in frames:
+        frame.received_symbols = frame.rx_signals + generate_noise(frame.rx_signals, snr_db, rng, signal_power)
+        yield frame
+
+
+def equalize_frames(frames: Iterable[Frame], H: np.ndarray, noise_var: float, kind: str,
+                    num_taps: Optional[int] = None, kbest_k: int = DEFAULT_K) -> Iterator[Frame]:
+    """Equalize every frame with the (cached) filter for H and the stream noise variance.
+
+    Adaptive equalizers are trained on each frame separately.
+    """
+    for frame in frames:
+        frame.equalized_symbols = equalize_received(frame.received_symbols, H, noise_var, kind, frame.tx_symbols,
+                                                    num_taps, kbest_k)
+        yield frame
+
+
+def detect_frames(frames: Iterable[Frame]) -> Iterator[Frame]:
+    """Hard-decision demodulate every frame (after equalization when present)."""
+    for frame in frames:
+        symbols = frame.received_symbols if frame.equalized_symbols is None else frame.equalized_symbols
+        frame.demodulated_bits = demodulate(symbols)
+        yield frame
+
+
+def stream_pipeline(params: SimulationParameters, total_bits: int, block_size: int = DEFAULT_BLOCK_SIZE,
+                    snr_db: Optional[float] = None, rng=None) -> Iterator[Frame]:
+    """Chain all stages into one generator of fully processed frames."""
+    if snr_db is None:
+        snr_db = params.snr_db
+    if rng is None:
+        rng = np.random.RandomState(params.seed)
+    H = params.channel_matrix
+    frames = bit_frames(total_bits, block_size, rng)
+    frames = modulate_frames(frames)
+    if params.channel_taps is None:
+        frames = channel_frames(frames, H)
+        signal_power = received_signal_power(H)
+    else:
+        frames = dispersive_channel_frames(frames, params.channel_taps, params.channel_delay)
+        signal_power = received_signal_power(params.channel_taps)
+    frames = noise_frames(frames, snr_db, signal_power, rng)
+    if params.equalizer != 'none':
+        frames = equalize_frames(frames, H, noise_variance(signal_power, snr_db), params.equalizer, params.adaptive_taps,
+                                 params.kbest_k)
+    return detect_frames(frames)
+
+
+class ErrorCounter:
+    """Running bit error count over all detected streams."""
+
+    def __init__(self, num_streams: int):
+        self.num_streams = num_streams
+        self.bit_errors = 0
+        self.num_bits = 0
+
+    def update(self, frame: Frame):
+        errors, compared = count_bit_errors(frame.tx_bits, frame.demodulated_bits, self.num_streams)
+        self.bit_errors += errors
+        self.num_bits += compared
+
+    @property
+    def ber(self) -> float:
+        return self.bit_errors / self.num_bits if self.num_bits else np.nan
+
+
+class EVMAccumulator:
+    """Running error vector magnitude per receive branch.
+
+    The reference is the noise-free received signal, so the EVM measures the
+    distortion added after the channel.
+    """
+
+    def __init__(self, num_rx_streams: int):
+        self.error_power = np.zeros(num_rx_streams)
+        self.reference_power = np.zeros(num_rx_streams)
+
+    def update(self, frame: Frame):
+        self.error_power += np.sum(np.abs(frame.received_symbols - frame.rx_signals)**2, axis=1)
+        self.reference_power += np.sum(np.abs(frame.rx_signals)**2, axis=1)
+
+    @property
+    def evm(self) -> np.ndarray:
+        """RMS EVM per receive branch (as a fraction, not in percent)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.sqrt(self.error_power / self.reference_power)
+
+
+class ConstellationHistogram:
+    """Running 2D histogram of the received I/Q samples of all receive branches."""
+
+    def __init__(self, bins: int = HISTOGRAM_BINS, value_range: Tuple[Tuple[float, float], Tuple[float, float]] = HISTOGRAM_RANGE):
+        self.value_range = value_range
+        self.counts = np.zeros((bins, bins), dtype=np.int64)
+        self.x_edges = np.linspace(value_range[0][0], value_range[0][1], bins + 1)
+        self.y_edges = np.linspace(value_range[1][0], value_range[1][1], bins + 1)
+
+    def update(self, frame: Frame):
+        samples = frame.received_symbols.ravel()
+        counts, _, _ = np.histogram2d(samples.real, samples.imag, bins=(self.x_edges, self.y_edges))
+        self.counts += counts.astype(np.int64)
+
+
+@dataclass
+class StreamResult:
+    """Summary of a streamed run."""
+    num_frames: int
+    bit_errors: int
+    num_bits: int
+    ber: float
+    evm: np.ndarray
+    histogram: ConstellationHistogram
+
+
+def run_stream(params: SimulationParameters, total_bits: int, block_size: int = DEFAULT_BLOCK_SIZE,
+               snr_db: Optional[float] = None, rng=None, accumulators: Optional[List] = None) -> StreamResult:
+    """Stream total_bits through the pipeline and fold them into the accumulators.
+
+    Extra objects with an update(frame) method may be passed in accumulators;
+    they receive every processed frame.
+    """
+    errors = ErrorCounter(params.num_detected_streams)
+    evm = EVMAccumulator(params.num_rx_streams)
+    histogram = ConstellationHistogram()
+    all_accumulators = [errors, evm, histogram] + list(accumulators or [])
+    num_frames = 0
+    for frame in stream_pipeline(params, total_bits, block_size, snr_db, rng):
+        for accumulator in all_accumulators:
+            accumulator.update(frame)
+        num_frames += 1
+    return StreamResult(num_frames=num_frames, bit_errors=errors.bit_errors, num_bits=errors.num_bits,
+                        ber=errors.ber, evm=evm.evm, histogram=histogram)
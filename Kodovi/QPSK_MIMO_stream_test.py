@@ -0,0 +1,108 @@
+import unittest
+import tracemalloc
+import numpy as np
+from QPSK_MIMO_engine import SimulationParameters, qpsk_modulate, count_bit_errors
+from QPSK_MIMO_stream import (bit_frames, modulate_frames, dispersive_channel_frames, stream_pipeline, run_stream,
+                              received_signal_power)
+from QPSK_MIMO_channel import fiber_impulse_response, main_cursor, mimo_convolve
+
+class TestQPSK_MIMO_stream(unittest.TestCase):
+
+    def setUp(self):
+        self.params = SimulationParameters(num_modes=1, channel_matrix=np.array([[1, 0.2], [0.1, 0.9]]), snr_db=6)
+
+    ## @brief Testira podjelu bita u okvire.
+    ## @details Okviri imaju zadanu veličinu, a zadnji okvir sadrži ostatak bita.
+    def test_podjela_u_okvire(self):
+        """
+        @brief Testira podjelu bita u okvire.
+        @details Okviri imaju zadanu veličinu, a zadnji okvir sadrži ostatak bita.
+        """
+        print("\nTest: Podjela u okvire")
+        sizes = [len(frame.tx_bits) for frame in bit_frames(2500, 1000, np.random.RandomState(0))]
+        print(f"  Veličine okvira: {sizes}")
+        self.assertEqual(sizes, [1000, 1000, 500])
+
+    ## @brief Testira da okvir prolazi kroz isti lanac kao engine.
+    ## @details Kanal bez kopiranja simbola mora dati isti signal kao H @ tile(x), a akumulator iste greške.
+    def test_okvir_odgovara_lancu_enginea(self):
+        """
+        @brief Testira da okvir prolazi kroz isti lanac kao engine.
+        @details Kanal bez kopiranja simbola mora dati isti signal kao H @ tile(x), a akumulator iste greške.
+        """
+        print("\nTest: Okvir odgovara lancu enginea")
+        frames = list(stream_pipeline(self.params, 4000, 4000, rng=np.random.RandomState(3)))
+        self.assertEqual(len(frames), 1)
+        frame = frames[0]
+        expected_rx = np.dot(self.params.channel_matrix, np.tile(frame.tx_symbols, (2, 1)))
+        np.testing.assert_allclose(frame.rx_signals, expected_rx)
+        errors, compared = count_bit_errors(frame.tx_bits, frame.demodulated_bits, 2)
+        result = run_stream(self.params, 4000, 4000, rng=np.random.RandomState(3))
+        print(f"  Greške: {errors}/{compared}, stream: {result.bit_errors}/{result.num_bits}")
+        self.assertEqual((result.bit_errors, result.num_bits), (errors, compared))
+
+    ## @brief Testira akumulatore EVM i histograma konstelacije.
+    ## @details EVM mora odgovarati zadanom SNR, a histogram mora sadržavati sve uzorke.
+    def test_akumulatori(self):
+        """
+        @brief Testira akumulatore EVM i histograma konstelacije.
+        @details EVM mora odgovarati zadanom SNR, a histogram mora sadržavati sve uzorke.
+        """
+        print("\nTest: Akumulatori EVM i histograma")
+        params = SimulationParameters(num_tx_antennas=1, num_rx_antennas=1, num_modes=1, snr_db=20)
+        result = run_stream(params, 200000, 8192)
+        print(f"  EVM: {result.evm}, BER: {result.ber}, okviri: {result.num_frames}")
+        self.assertAlmostEqual(result.evm[0], 10**(-20 / 20), places=2)
+        self.assertEqual(result.histogram.counts.sum(), 100000)
+        self.assertEqual(result.num_frames, 25)
+
+    ## @brief Testira ograničenu potrošnju memorije.
+    ## @details Vršna alocirana memorija ne smije rasti sa dužinom simulacije.
+    def test_ogranicena_memorija(self):
+        """
+        @brief Testira ograničenu potrošnju memorije.
+        @details Vršna alocirana memorija ne smije rasti sa dužinom simulacije.
+        """
+        print("\nTest: Ograničena memorija")
+        peaks = []
+        for total_bits in (10**5, 10**6):
+            tracemalloc.start()
+            run_stream(self.params, total_bits, 10**4)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        print(f"  Vršna memorija (B): {peaks}")
+        self.assertLess(peaks[1], 1.5 * peaks[0])
+
+    ## @brief Testira snagu primljenog signala.
+    ## @details Analitička snaga mora odgovarati izmjerenoj snazi signala nakon kanala.
+    def test_snaga_primljenog_signala(self):
+        """
+        @brief Testira snagu primljenog signala.
+        @details Analitička snaga mora odgovarati izmjerenoj snazi signala nakon kanala.
+        """
+        print("\nTest: Snaga primljenog signala")
+        symbols, _ = qpsk_modulate(np.random.RandomState(1).randint(0, 2, 2000))
+        rx_signals = np.dot(self.params.channel_matrix, np.tile(symbols, (2, 1)))
+        measured = np.mean(np.abs(rx_signals)**2)
+        print(f"  Analitička: {received_signal_power(self.params.channel_matrix)}, izmjerena: {measured}")
+        self.assertAlmostEqual(received_signal_power(self.params.channel_matrix), measured, delta=0.05)
+
+    ## @brief Testira disperzivni kanal u toku okvira.
+    ## @details Konvolucija okvir po okvir mora dati isti poravnati signal kao jednokratna konvolucija cijelog niza.
+    def test_disperzivni_kanal_po_okvirima(self):
+        """
+        @brief Testira disperzivni kanal u toku okvira.
+        @details Konvolucija okvir po okvir mora dati isti poravnati signal kao jednokratna konvolucija cijelog niza.
+        """
+        print("\nTest: Disperzivni kanal po okvirima")
+        taps = fiber_impulse_response(3, 2, 50.0, 0.2, 80.0, rng=np.random.RandomState(4))
+        frames = list(modulate_frames(bit_frames(5001, 600, np.random.RandomState(5))))
+        symbols = np.concatenate([frame.tx_symbols for frame in frames])
+        output = list(dispersive_channel_frames(frames, taps, main_cursor(taps)))
+        self.assertEqual(len(output), len(frames))
+        expected = mimo_convolve(np.tile(symbols, (2, 1)), taps, main_cursor(taps))
+        np.testing.assert_allclose(np.concatenate([frame.rx_signals for frame in output], axis=1), expected, atol=1e-12)
+        self.assertAlmostEqual(received_signal_power(taps), np.mean(np.abs(expected)**2), delta=0.1 * received_signal_power(taps))
+
+if __name__ == '__main__':
+    unittest.main()
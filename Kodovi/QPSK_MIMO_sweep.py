@@ -0,0 +1,104 @@
+"""Parallel SNR sweep across a process pool with reproducible seeding.
+
+Every SNR point is split into fixed-size Monte Carlo chunks. Each chunk gets
+its own random stream derived from one root seed via SeedSequence.spawn, so
+the result depends only on the seed and the chunk plan, never on the number
+of workers or the order in which chunks finish.
+"""
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from QPSK_MIMO_engine import SimulationParameters
+from QPSK_MIMO_monte_carlo import MonteCarloResult, CONFIDENCE_INTERVALS, DEFAULT_CONFIDENCE
+from QPSK_MIMO_stream import run_stream, DEFAULT_BLOCK_SIZE
+
+DEFAULT_CHUNK_BITS = 10**6
+DEFAULT_BITS_PER_POINT = 10**7
+
+
+def chunk_rng(seed_sequence: np.random.SeedSequence) -> np.random.RandomState:
+    """Legacy-API random state (randint/randn) driven by an independent MT19937 stream."""
+    return np.random.RandomState(np.random.MT19937(seed_sequence))
+
+
+def _run_chunk(job: Tuple[SimulationParameters, float, int, int, np.random.SeedSequence]) -> Tuple[int, int]:
+    """Worker entry point: stream one chunk and return (bit_errors, compared_bits)."""
+    params, snr_db, chunk_bits, block_size, seed_sequence = job
+    result = run_stream(params, chunk_bits, block_size, snr_db, chunk_rng(seed_sequence))
+    return result.bit_errors, result.num_bits
+
+
+def run_sweep(params: SimulationParameters, snr_db_range: Optional[np.ndarray] = None,
+              bits_per_point: int = DEFAULT_BITS_PER_POINT, chunk_bits: int = DEFAULT_CHUNK_BITS,
+              target_errors: Optional[int] = None, num_workers: Optional[int] = None,
+              block_size: int = DEFAULT_BLOCK_SIZE, seed: Optional[int] = None,
+              confidence: float = DEFAULT_CONFIDENCE, method: str = 'wilson') -> List[MonteCarloResult]:
+    """Estimate the BER for every SNR point, spreading chunks over a process pool.
+
+    A point uses the shortest prefix of its chunks whose error count reaches
+    target_errors (all chunks up to bits_per_point when target_errors is None).
+    Chunks computed beyond that prefix are discarded, which keeps the result
+    bit-identical for any num_workers.
+    """
+    if method not in CONFIDENCE_INTERVALS:
+        raise ValueError(f"Nepoznata metoda intervala povjerenja: {method}")
+    if snr_db_range is None:
+        snr_db_range = params.snr_db_range
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if seed is None:
+        seed = params.seed
+
+    num_chunks = max(1, -(-bits_per_point // chunk_bits))
+    chunk_sizes = [min(chunk_bits, bits_per_point - i * chunk_bits) for i in range(num_chunks)]
+    point_sequences = np.random.SeedSequence(seed).spawn(len(snr_db_range))
+    chunk_sequences = [point_sequence.spawn(num_chunks) for point_sequence in point_sequences]
+
+    chunk_results = [[] for _ in snr_db_range]
+    finished = [False] * len(snr_db_range)
+
+    def pending_jobs(round_size):
+        jobs = []
+        for point, snr_db in enumerate(snr_db_range):
+            if finished[point]:
+                continue
+            start = len(chunk_results[point])
+            for chunk in range(start, min(start + round_size, num_chunks)):
+                jobs.append((point, (params, float(snr_db), chunk_sizes[chunk], block_size, chunk_sequences[point][chunk])))
+        return jobs
+
+    def collect(jobs, outputs):
+        for (point, _), output in zip(jobs, outputs):
+            chunk_results[point].append(output)
+        for point in range(len(snr_db_range)):
+            cumulative_errors = np.cumsum([chunk_errors for chunk_errors, _ in chunk_results[point]])
+            if target_errors is not None and np.any(cumulative_errors >= target_errors):
+                del chunk_results[point][int(np.argmax(cumulative_errors >= target_errors)) + 1:]
+                finished[point] = True
+            elif len(chunk_results[point]) == num_chunks:
+                finished[point] = True
+
+    # Bez cilja grešaka svi dijelovi su potrebni, pa se šalju odjednom
+    round_size = num_chunks if target_errors is None else max(1, num_workers)
+    if num_workers <= 1:
+        while not all(finished):
+            jobs = pending_jobs(round_size)
+            collect(jobs, [_run_chunk(job) for _, job in jobs])
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            while not all(finished):
+                jobs = pending_jobs(round_size)
+                collect(jobs, list(executor.map(_run_chunk, [job for _, job in jobs])))
+
+    results = []
+    for point, snr_db in enumerate(snr_db_range):
+        bit_errors = sum(errors for errors, _ in chunk_results[point])
+        num_bits = sum(compared for _, compared in chunk_results[point])
+        ber = bit_errors / num_bits if num_bits else np.nan
+        ci_low, ci_high = CONFIDENCE_INTERVALS[method](bit_errors, num_bits, confidence)
+        results.append(MonteCarloResult(snr_db=float(snr_db), bit_errors=bit_errors, num_bits=num_bits,
+                                        num_frames=len(chunk_results[point]), ber=ber, ci_low=ci_low,
+                                        ci_high=ci_high, confidence=confidence, method=method))
+    return results
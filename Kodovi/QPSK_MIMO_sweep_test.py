@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from QPSK_MIMO_engine import SimulationParameters
+from QPSK_MIMO_sweep import run_sweep
+
+class TestQPSK_MIMO_sweep(unittest.TestCase):
+
+    def setUp(self):
+        self.params = SimulationParameters(num_tx_antennas=1, num_rx_antennas=1, num_modes=1)
+        self.snr_db_range = np.array([0.0, 4.0, 8.0])
+
+    ## @brief Testira da rezultat ne zavisi od broja procesa.
+    ## @details Isti seed mora dati identične brojeve grešaka za 1, 2 i 3 procesa.
+    def test_neovisnost_o_broju_procesa(self):
+        """
+        @brief Testira da rezultat ne zavisi od broja procesa.
+        @details Isti seed mora dati identične brojeve grešaka za 1, 2 i 3 procesa.
+        """
+        print("\nTest: Neovisnost o broju procesa")
+        outcomes = []
+        for num_workers in (1, 2, 3):
+            results = run_sweep(self.params, self.snr_db_range, bits_per_point=40000, chunk_bits=10000,
+                                num_workers=num_workers, block_size=4096)
+            outcomes.append([(result.bit_errors, result.num_bits) for result in results])
+            print(f"  {num_workers} procesa: {outcomes[-1]}")
+        self.assertEqual(outcomes[0], outcomes[1])
+        self.assertEqual(outcomes[0], outcomes[2])
+
+    ## @brief Testira zaustavljanje po ciljanom broju grešaka.
+    ## @details Niski SNR koristi manje dijelova od budžeta, a rezultat ne zavisi od broja procesa.
+    def test_ciljani_broj_gresaka(self):
+        """
+        @brief Testira zaustavljanje po ciljanom broju grešaka.
+        @details Niski SNR koristi manje dijelova od budžeta, a rezultat ne zavisi od broja procesa.
+        """
+        print("\nTest: Ciljani broj grešaka")
+        snr_db_range = np.array([0.0, 4.0, 12.0])
+        serial = run_sweep(self.params, snr_db_range, bits_per_point=100000, chunk_bits=5000,
+                           target_errors=300, num_workers=1)
+        parallel = run_sweep(self.params, snr_db_range, bits_per_point=100000, chunk_bits=5000,
+                             target_errors=300, num_workers=4)
+        for result in serial:
+            print(f"  SNR {result.snr_db} dB: {result.bit_errors} grešaka, {result.num_frames} dijelova")
+        self.assertGreaterEqual(serial[0].bit_errors, 300)
+        self.assertLess(serial[0].num_frames, 20)
+        self.assertEqual(serial[-1].num_frames, 20)
+        self.assertEqual([(r.bit_errors, r.num_bits) for r in serial], [(r.bit_errors, r.num_bits) for r in parallel])
+
+    ## @brief Testira različite seedove.
+    ## @details Različiti korijenski seedovi moraju dati različite nezavisne tokove.
+    def test_razliciti_seedovi(self):
+        """
+        @brief Testira različite seedove.
+        @details Različiti korijenski seedovi moraju dati različite nezavisne tokove.
+        """
+        print("\nTest: Različiti seedovi")
+        first = run_sweep(self.params, [0.0], bits_per_point=20000, chunk_bits=10000, num_workers=1, seed=1)
+        second = run_sweep(self.params, [0.0], bits_per_point=20000, chunk_bits=10000, num_workers=1, seed=2)
+        print(f"  Greške: {first[0].bit_errors}, {second[0].bit_errors}")
+        self.assertNotEqual(first[0].bit_errors, second[0].bit_errors)
+
+if __name__ == '__main__':
+    unittest.main()
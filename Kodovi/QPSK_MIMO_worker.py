@@ -0,0 +1,89 @@
+"""Background execution of simulation jobs for the Tk GUI.
+
+Tk widgets may only be used from the main thread, so a job never calls back
+into the GUI: it runs on a daemon thread and reports through a queue, which
+the GUI drains from an after() callback (poll). Cancellation is cooperative:
+once cancel() is requested, the next report() of the job raises
+SimulationCancelled. run_simulation reports after every SNR point and the
+split-step propagation after every step, so a run stops within one pass over
+the bits.
+"""
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from QPSK_MIMO_engine import ProgressCallback, SweepPoint
+
+
+class SimulationCancelled(Exception):
+    """Raised inside a job by SimulationWorker.report after cancel()."""
+
+
+@dataclass
+class WorkerMessage:
+    """One message from the worker thread; result is set for 'done', error for 'error'."""
+    kind: str
+    fraction: float = 0.0
+    stage: str = ''
+    point: Optional[SweepPoint] = None
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+class SimulationWorker:
+    """Runs job(worker) on a background thread; the job reports progress through worker.report."""
+
+    def __init__(self, job: Callable[['SimulationWorker'], Any]):
+        self.job = job
+        self._messages = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='qpsk-mimo-simulacija', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    def report(self, fraction: float, stage: str, point: Optional[SweepPoint] = None):
+        """Queue a progress message; raises SimulationCancelled once cancel() was requested."""
+        if self._cancel.is_set():
+            raise SimulationCancelled()
+        self._messages.put(WorkerMessage('progress', fraction, stage, point))
+
+    def stage_progress(self, start: float, stop: float) -> ProgressCallback:
+        """Progress callback for run_simulation that maps its [0, 1] onto [start, stop] of the job."""
+        def progress(fraction: float, stage: str, point: Optional[SweepPoint] = None):
+            self.report(start + (stop - start) * fraction, stage, point)
+        return progress
+
+    def poll(self) -> List[WorkerMessage]:
+        """All messages queued since the last poll (never blocks)."""
+        messages = []
+        while True:
+            try:
+                messages.append(self._messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def _run(self):
+        try:
+            result = self.job(self)
+        except SimulationCancelled:
+            self._messages.put(WorkerMessage('cancelled'))
+        except Exception as e:
+            self._messages.put(WorkerMessage('error', error=e))
+        else:
+            self._messages.put(WorkerMessage('done', 1.0, result=result))
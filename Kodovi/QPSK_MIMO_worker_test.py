@@ -0,0 +1,121 @@
+import time
+import unittest
+import numpy as np
+from QPSK_MIMO_worker import SimulationWorker, SimulationCancelled
+from QPSK_MIMO_engine import SimulationParameters, run_simulation
+from QPSK_MIMO_propagation import launch_waveform, propagate_fiber
+from QPSK_MIMO_capacity import analyze_ensemble
+from QPSK_MIMO_detector import kbest_tradeoff
+
+class TestQPSK_MIMO_worker(unittest.TestCase):
+
+    def _wait(self, worker, timeout=60.0):
+        """Poll the worker like the GUI main loop until its final message arrives."""
+        messages = []
+        deadline = time.monotonic() + timeout
+        while not messages or messages[-1].kind == 'progress':
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+            messages += worker.poll()
+        return messages
+
+    ## @brief Testira izvještavanje o napretku simulacije.
+    ## @details Simulacija tačku po tačku daje isti rezultat kao vektorizovana, a napredak raste do 1.
+    def test_napredak(self):
+        """
+        @brief Testira izvještavanje o napretku simulacije.
+        @details Simulacija tačku po tačku daje isti rezultat kao vektorizovana, a napredak raste do 1.
+        """
+        print("\nTest: Izvještavanje o napretku simulacije")
+        for params in (SimulationParameters(equalizer='mmse', channel_model='rayleigh'),
+                       SimulationParameters(equalizer='zf', fec='ldpc')):
+            reports = []
+            result = run_simulation(params, progress=lambda fraction, stage, point=None:
+                                    reports.append((fraction, stage, point)))
+            plain = run_simulation(params)
+            np.testing.assert_array_equal(result.ber_values, plain.ber_values)
+            np.testing.assert_array_equal(result.post_fec_ber_values, plain.post_fec_ber_values)
+            fractions = [fraction for fraction, _, _ in reports]
+            self.assertEqual(fractions, sorted(fractions))
+            self.assertAlmostEqual(fractions[-1], 1.0)
+            points = [point for _, _, point in reports if point is not None]
+            self.assertEqual([point.index for point in points], list(range(params.snr_points)))
+            self.assertEqual([point.ber for point in points], plain.ber_values)
+            self.assertEqual([point.capacity for point in points], plain.capacity_values)
+            if params.fec == 'ldpc':
+                self.assertEqual([point.post_fec_ber for point in points], plain.post_fec_ber_values)
+
+    ## @brief Testira simulaciju u pozadinskoj niti.
+    ## @details Glavna nit preuzima napredak, djelimične tačke i rezultat; greška posla stiže kao poruka.
+    def test_pozadinska_nit(self):
+        """
+        @brief Testira simulaciju u pozadinskoj niti.
+        @details Glavna nit preuzima napredak, djelimične tačke i rezultat; greška posla stiže kao poruka.
+        """
+        print("\nTest: Simulacija u pozadinskoj niti")
+        params = SimulationParameters(equalizer='mmse')
+        worker = SimulationWorker(lambda worker: run_simulation(params, progress=worker.stage_progress(0.0, 0.5)))
+        worker.start()
+        messages = self._wait(worker)
+        self.assertEqual(messages[-1].kind, 'done')
+        self.assertEqual(messages[-1].fraction, 1.0)
+        self.assertLessEqual(max(message.fraction for message in messages[:-1]), 0.5)
+        points = [message.point for message in messages if message.point is not None]
+        self.assertEqual(len(points), params.snr_points)
+        self.assertEqual(messages[-1].result.ber_values, [point.ber for point in points])
+        self.assertEqual(messages[-1].result.ber, run_simulation(params).ber)
+
+        def failing(worker):
+            raise ValueError("Neispravan parametar.")
+        worker = SimulationWorker(failing)
+        worker.start()
+        messages = self._wait(worker)
+        self.assertEqual(messages[-1].kind, 'error')
+        self.assertIsInstance(messages[-1].error, ValueError)
+
+    ## @brief Testira prekid simulacije.
+    ## @details Nakon zahtjeva za prekid simulacija ne završava sljedeću SNR tačku, a propagacija, ansambl kanala i K-best kompleksnost sljedeći dio posla.
+    def test_prekid(self):
+        """
+        @brief Testira prekid simulacije.
+        @details Nakon zahtjeva za prekid simulacija ne završava sljedeću SNR tačku, a propagacija, ansambl kanala i K-best kompleksnost sljedeći dio posla.
+        """
+        print("\nTest: Prekid simulacije")
+        def job(worker):
+            def progress(fraction, stage, point=None):
+                worker.report(fraction, stage, point)
+                if point is not None:
+                    worker.cancel()  # prekid odmah nakon prve tačke
+            return run_simulation(SimulationParameters(equalizer='mmse', fec='ldpc'), progress=progress)
+        worker = SimulationWorker(job)
+        worker.start()
+        messages = self._wait(worker)
+        worker.join(1.0)
+        self.assertFalse(worker.running)
+        self.assertEqual(messages[-1].kind, 'cancelled')
+        self.assertEqual(len([message for message in messages if message.point is not None]), 1)
+
+        steps = []
+        def propagation_progress(fraction):
+            steps.append(fraction)
+            if len(steps) == 3:
+                raise SimulationCancelled()
+        waveform = launch_waveform(np.ones((2, 64), dtype=complex))
+        with self.assertRaises(SimulationCancelled):
+            propagate_fiber(waveform, 100.0, 0.2, progress=propagation_progress)
+        self.assertEqual(len(steps), 3)
+        self.assertLess(steps[-1], 1.0)
+
+        H = np.eye(4, dtype=complex)
+        analyses = (lambda progress: analyze_ensemble(128, 128, 10.0, 200, rng=np.random.RandomState(0),
+                                                      progress=progress),
+                    lambda progress: kbest_tradeoff(H, 10.0, (1, 4), 2000, np.random.RandomState(0), progress=progress))
+        for analysis in analyses:
+            steps = []
+            with self.assertRaises(SimulationCancelled):
+                analysis(propagation_progress)
+            self.assertEqual(len(steps), 3)
+            self.assertLess(steps[-1], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()